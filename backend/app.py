@@ -1,10 +1,25 @@
 import os
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from backend.config import config
-from backend.models import db, User
+from backend.models import db
+from backend.cache import response_cache
+from backend.conditional import register_cache_policies
+from backend.compression import register_compression
+from backend.profiling import query_profiler
+from backend.pooling import pool_monitor
+from backend.replicas import replica_router
+from backend.jobs import job_queue
+from backend.images import image_pipeline
+from backend.uploads import upload_store
+from backend.static_files import static_files
+from backend.identity import identity_cache
+from backend.sessions import init_sessions
+from backend.passwords import password_hasher
+from backend.ratelimit import rate_limiter
 
 
 def create_app(config_name=None):
@@ -20,9 +35,27 @@ def create_app(config_name=None):
 
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+    # Client address and scheme from the trusted reverse proxies (rate limits key on remote_addr)
+    proxies = app.config.get('TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
     # Initialize extensions with dependency injection pattern
+    pool_monitor.init_app(app)  # builds SQLALCHEMY_ENGINE_OPTIONS, so it runs before the engine is created
+    replica_router.init_app(app)  # adds the replicas to SQLALCHEMY_BINDS, likewise
     db.init_app(app)
     Migrate(app, db)
+    query_profiler.init_app(app)
+    response_cache.init_app(app)
+    register_compression(app)  # registered first so it runs after the ETag/cache policy hook
+    register_cache_policies(app)
+    job_queue.init_app(app)
+    image_pipeline.init_app(app)
+    upload_store.init_app(app)
+    static_files.init_app(app)
+    init_sessions(app)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
 
     # CORS: enables React frontend to communicate with Flask backend across different ports
     CORS(app,
@@ -34,11 +67,12 @@ def create_app(config_name=None):
     # Flask-Login: manages user authentication and sessions
     login_manager = LoginManager()
     login_manager.init_app(app)
+    identity_cache.init_app(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        """CRUD READ: loads User object from database using session ID"""
-        return User.query.get(int(user_id))
+        """Rebuilds current_user from the session snapshot; the users row is read at most once per IDENTITY_TTL"""
+        return identity_cache.load(user_id)
 
     @login_manager.unauthorized_handler
     def unauthorized():
@@ -51,14 +85,54 @@ def create_app(config_name=None):
     from backend.routes.comments import comments_bp
     from backend.routes.ratings import ratings_bp
     from backend.routes.saved_recipes import saved_bp
+    from backend.routes.bulk import bulk_bp
 
     # CRUD operations: each blueprint handles CREATE, READ, UPDATE, DELETE for its resource
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(recipes_bp, url_prefix='/api/recipes')
+    app.register_blueprint(bulk_bp, url_prefix='/api/recipes')
     app.register_blueprint(comments_bp, url_prefix='/api/recipes')
     app.register_blueprint(ratings_bp, url_prefix='/api/recipes')
     app.register_blueprint(saved_bp, url_prefix='/api')
 
+    # CLI: maintenance commands (flask procook ...)
+    from backend.commands import procook_cli
+    app.cli.add_command(procook_cli)
+
+    if app.config.get('DEBUG_ENDPOINTS'):
+        @app.route('/api/_debug/cache', methods=['GET'])
+        def cache_stats():
+            """Returns response cache hit/miss counters for this worker process"""
+            return jsonify({'success': True, 'data': response_cache.stats()})
+
+        @app.route('/api/_debug/profile', methods=['GET'])
+        def profile_stats():
+            """Returns per-route query/latency aggregates for this worker process (?reset=1 clears them)"""
+            if not query_profiler.enabled:
+                return jsonify({'success': False, 'message': 'Query profiling is disabled (QUERY_PROFILING=1).'}), 404
+            data = query_profiler.report()
+            if request.args.get('reset') in ('1', 'true'):
+                query_profiler.reset()
+            return jsonify({'success': True, 'data': data, 'slowQueryMs': query_profiler.slow_query_ms})
+
+        @app.route('/api/_debug/jobs', methods=['GET'])
+        def job_stats():
+            """Returns job queue depth per queue and status"""
+            return jsonify({'success': True, 'data': job_queue.stats(), 'inline': job_queue.inline})
+
+        @app.route('/api/_debug/pool', methods=['GET'])
+        def pool_stats():
+            """Returns connection pool occupancy and checkout wait counters for this worker process (?reset=1 clears them)"""
+            data = pool_monitor.report()
+            if request.args.get('reset') in ('1', 'true'):
+                pool_monitor.reset()
+            return jsonify({'success': True, 'data': data})
+
+        @app.route('/api/_debug/replicas', methods=['GET'])
+        def replica_stats():
+            """Returns read-replica health as last probed by this worker process"""
+            return jsonify({'success': True, 'data': replica_router.status()})
+
     @app.route('/sanctum/csrf-cookie', methods=['GET'])
     def csrf_cookie():
         """Compatibility endpoint for Laravel Sanctum-style CSRF protection"""
@@ -67,22 +141,21 @@ def create_app(config_name=None):
     @app.route('/uploads/<path:filename>')
     def serve_upload(filename):
         """Serves uploaded recipe images from backend/uploads/ directory"""
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
-
-    # SPA serving: handles React frontend routing in production
-    dist_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dist')
+        return static_files.serve_upload(filename)
 
+    # SPA serving: handles React frontend routing in production (dist/ is indexed once at startup)
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_frontend(path):
         """Serves React SPA - returns index.html for client-side routing or static assets"""
-        if path and os.path.exists(os.path.join(dist_dir, path)):
-            return send_from_directory(dist_dir, path)
-        
-        index_file = os.path.join(dist_dir, 'index.html')
-        if os.path.exists(index_file):
-            return send_from_directory(dist_dir, 'index.html')
-        
+        entry = static_files.lookup(path) if path else None
+        if entry is not None:
+            return static_files.serve_asset(entry)
+
+        index_entry = static_files.lookup('index.html')
+        if index_entry is not None:
+            return static_files.serve_asset(index_entry)
+
         return jsonify({'message': 'ProCook API is running. Build the frontend with: npm run build'}), 200
 
     return app
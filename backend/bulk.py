@@ -0,0 +1,258 @@
+"""
+Bulk recipe import/export: streams JSONL or CSV records, validates them with the same rules as
+POST /api/recipes and loads each batch in one transaction with multi-row INSERTs
+(ingredients go through COPY on Postgres).
+"""
+import csv
+import io
+import json
+import os
+from itertools import islice
+from datetime import datetime
+from backend.models import db, Recipe, Ingredient
+from backend.search import recipe_search
+from backend.routes.recipes import validate_recipe_data, normalize_ingredients
+
+FORMATS = ('jsonl', 'csv')
+DEFAULT_BATCH_SIZE = 500
+RECIPE_COLUMNS = ('title', 'short_description', 'cuisine_type', 'category', 'prep_time', 'cook_time',
+                  'serving_size', 'preparation_notes')
+INGREDIENT_KEYS = ('name', 'measurement', 'substitution_option', 'allergen_info')
+TEXT_COLUMNS = ('title', 'short_description', 'cuisine_type', 'category', 'preparation_notes')
+
+
+class BulkFormatError(ValueError):
+    """Raised when an input line cannot be parsed as a record at all"""
+
+
+def iter_records(stream, fmt):
+    """Yields (line number, record dict or BulkFormatError) from a text stream, one record at a time"""
+    if fmt == 'csv':
+        # CSV rows carry the ingredient list as a JSON array in the 'ingredients' column
+        reader = csv.DictReader(stream)
+        while True:
+            previous_line = reader.line_num
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # line_num is not advanced reliably on errors: report the record's first line.
+                # The reader resumes at the next line; without a header there is nothing to map rows onto
+                yield BulkFormatError(f'Invalid CSV: {e}'), previous_line + 1
+                if previous_line == 0:
+                    return
+                continue
+            yield record, reader.line_num
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('expected a JSON object')
+        except ValueError as e:
+            record = BulkFormatError(f'Invalid JSON: {e}')
+        yield record, line_no
+
+
+def type_errors(record):
+    """
+    Shape errors the form validation does not expect (it assumes strings and ingredient objects):
+    text fields must be strings and ingredients a list of objects with string values
+    """
+    errors = {}
+    for key in TEXT_COLUMNS:
+        if not isinstance(record.get(key) or '', str):
+            errors[key] = ['Must be a string.']
+    ingredients = record.get('ingredients')
+    if isinstance(ingredients, str):
+        try:
+            ingredients = json.loads(ingredients)
+        except ValueError:
+            return errors  # reported by validate_recipe_data
+    if ingredients is not None and not isinstance(ingredients, list):
+        errors['ingredients'] = ['Must be a list of ingredient objects.']
+    for i, ingredient in enumerate(ingredients if isinstance(ingredients, list) else []):
+        if not isinstance(ingredient, dict):
+            errors[f'ingredients.{i}'] = ['Must be an ingredient object.']
+            continue
+        for key in INGREDIENT_KEYS:
+            if not isinstance(ingredient.get(key) or '', str):
+                errors[f'ingredients.{i}.{key}'] = ['Must be a string.']
+    return errors
+
+
+def batches(records, size):
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copy_ingredients(rows):
+    """Streams ingredient rows into Postgres with COPY on the session's connection (same transaction)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    now = datetime.utcnow().isoformat(sep=' ')
+    for row in rows:
+        writer.writerow([row['recipe_id'], row['name'], row['measurement'],
+                         r'\N' if row['substitution_option'] is None else row['substitution_option'],
+                         r'\N' if row['allergen_info'] is None else row['allergen_info'],
+                         row['order'], now, now])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            'COPY ingredients (recipe_id, name, measurement, substitution_option, allergen_info, "order", '
+            "created_at, updated_at) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    finally:
+        cursor.close()
+
+
+class RecipeImporter:
+    """
+    Loads recipe records for one owner in batches. Each batch is validated, inserted and committed
+    on its own, so a failure only loses the current batch and a checkpoint can resume after the last commit.
+    """
+
+    def __init__(self, user_id, batch_size=DEFAULT_BATCH_SIZE, use_copy=None):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        dialect = db.session.get_bind().dialect
+        # COPY needs psycopg2's copy_expert; other drivers fall back to multi-row INSERT
+        self.use_copy = dialect.name == 'postgresql' and dialect.driver == 'psycopg2' if use_copy is None else use_copy
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, records, skip=0, on_batch=None, max_errors=100):
+        """Imports (record, line) pairs; skip= resumes after that many records; on_batch(importer) after each commit"""
+        records = iter(records)
+        for _ in islice(records, skip):
+            self.processed += 1
+        for batch in batches(records, self.batch_size):
+            self.import_batch(batch, max_errors)
+            if on_batch is not None:
+                on_batch(self)
+        return self
+
+    def import_batch(self, batch, max_errors=100):
+        valid = []
+        for record, line in batch:
+            if isinstance(record, BulkFormatError):
+                errors = {'record': [str(record)]}
+            else:
+                errors = type_errors(record) or validate_recipe_data(record)
+            if errors:
+                self.failed += 1
+                if len(self.errors) < max_errors:
+                    self.errors.append({'line': line, 'errors': errors})
+            else:
+                valid.append(record)
+
+        try:
+            recipe_ids = self._insert(valid)
+            recipe_search.index_recipes(recipe_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.imported += len(valid)
+        self.processed += len(batch)
+
+    def _insert(self, records):
+        if not records:
+            return []
+        now = datetime.utcnow()
+        recipe_rows = []
+        for record in records:
+            prep_time, cook_time = int(record['prep_time']), int(record['cook_time'])
+            recipe_rows.append({
+                'user_id': self.user_id,
+                'title': record['title'].strip(),
+                'short_description': record['short_description'].strip(),
+                'cuisine_type': record['cuisine_type'].strip(),
+                'category': record['category'].strip(),
+                'prep_time': prep_time,
+                'cook_time': cook_time,
+                'total_time': prep_time + cook_time,
+                'serving_size': int(record['serving_size']),
+                'preparation_notes': (record.get('preparation_notes') or '').strip() or None,
+                'created_at': now,
+                'updated_at': now,
+            })
+        # insertmanyvalues: multi-row INSERT ... RETURNING, ids in parameter order
+        recipe_ids = db.session.scalars(
+            db.insert(Recipe).returning(Recipe.id, sort_by_parameter_order=True), recipe_rows
+        ).all()
+
+        ingredient_rows = []
+        for recipe_id, record in zip(recipe_ids, records):
+            raw = record['ingredients']
+            for row in normalize_ingredients(json.loads(raw) if isinstance(raw, str) else raw):
+                row.pop('id')
+                row['recipe_id'] = recipe_id
+                ingredient_rows.append(row)
+        if self.use_copy:
+            copy_ingredients(ingredient_rows)
+        else:
+            for chunk in batches(ingredient_rows, 1000):
+                db.session.execute(db.insert(Ingredient).values([
+                    dict(row, created_at=now, updated_at=now) for row in chunk
+                ]))
+        return recipe_ids
+
+    def summary(self):
+        return {'processed': self.processed, 'imported': self.imported, 'failed': self.failed, 'errors': self.errors}
+
+
+def load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def save_checkpoint(path, importer, source):
+    """Atomically records how many input records are committed, so --resume can skip them"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'source': source, 'records_done': importer.processed, 'imported': importer.imported,
+                   'failed': importer.failed, 'updated_at': datetime.utcnow().isoformat() + 'Z'}, f)
+    os.replace(tmp, path)
+
+
+def export_record(recipe):
+    """Import-compatible representation of a recipe (ingredients must be loaded)"""
+    record = {key: getattr(recipe, key) for key in RECIPE_COLUMNS}
+    record['ingredients'] = [{key: getattr(i, key) for key in INGREDIENT_KEYS} for i in recipe.ingredients]
+    return record
+
+
+def iter_export_lines(fmt, user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yields JSONL lines or CSV rows (header first) for every recipe, streaming from the database"""
+    query = Recipe.query.options(db.selectinload(Recipe.ingredients)).order_by(Recipe.id)
+    if user_id is not None:
+        query = query.filter(Recipe.user_id == user_id)
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(RECIPE_COLUMNS + ('ingredients',))
+        yield buffer.getvalue()
+    for recipe in query.yield_per(batch_size):
+        record = export_record(recipe)
+        if fmt == 'csv':
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([record[key] for key in RECIPE_COLUMNS] +
+                            [json.dumps(record['ingredients'], separators=(',', ':'))])
+            yield buffer.getvalue()
+        else:
+            yield json.dumps(record, separators=(',', ':')) + '\n'
@@ -0,0 +1,315 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, request
+from backend.replicas import replica_router
+
+# Cache tags: each cached response records the version of every tag it depends on;
+# bumping a tag invalidates exactly the responses that carried it. Every bump also advances one
+# generation counter, so a response built while any invalidation happened is not stored.
+RECIPE_LIST_TAG = 'recipes:list'
+BUMP_TIME_TTL = 3600  # bump times only matter for REPLICA_STICKY_SECONDS
+
+
+def recipe_tag(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def comments_tag(recipe_id):
+    return f'recipe:{recipe_id}:comments'
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+class CacheBackend:
+    """Abstract cache backend - stores string values with a TTL plus monotonically increasing tag versions"""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def get_versions(self, tags):
+        raise NotImplementedError
+
+    def generation(self):
+        """Number of bump() calls so far; advanced before the tag versions"""
+        raise NotImplementedError
+
+    def bumped_at(self, tags):
+        """Unix time of each tag's last bump (0 if unknown); recorded before the versions change"""
+        raise NotImplementedError
+
+    def bump(self, tags):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Backend used when caching is disabled - never stores anything"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def get_versions(self, tags):
+        return [0] * len(tags)
+
+    def generation(self):
+        return 0
+
+    def bumped_at(self, tags):
+        return [0] * len(tags)
+
+    def bump(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU with per-entry TTL; each worker process keeps its own copy"""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.versions = {}  # tag -> int, kept outside the LRU so evictions never reset a version
+        self.bumps = 0
+        self.bump_times = {}  # tag -> time.time() of its last bump
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_versions(self, tags):
+        with self.lock:
+            return [self.versions.get(t, 0) for t in tags]
+
+    def generation(self):
+        with self.lock:
+            return self.bumps
+
+    def bumped_at(self, tags):
+        with self.lock:
+            return [self.bump_times.get(t, 0) for t in tags]
+
+    def bump(self, tags):
+        now = time.time()
+        with self.lock:
+            self.bumps += 1
+            for t in tags:
+                self.versions[t] = self.versions.get(t, 0) + 1
+                self.bump_times[t] = now
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions.clear()
+            self.bump_times.clear()
+            self.bumps += 1  # responses being built now may predate the clear
+
+
+class RedisCache(CacheBackend):
+    """
+    Shared backend speaking the Redis protocol through any client exposing
+    get/set(ex=)/mget/incr/scan_iter/delete (redis-py, or a local fake in tests).
+    """
+
+    def __init__(self, client, prefix='procook:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed when CACHE_BACKEND=redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def get_versions(self, tags):
+        if not tags:
+            return []
+        return [int(v) if v is not None else 0 for v in self.client.mget([self.prefix + 'tag:' + t for t in tags])]
+
+    def generation(self):
+        return int(self.client.get(self.prefix + 'generation') or 0)
+
+    def bumped_at(self, tags):
+        if not tags:
+            return []
+        return [float(v) if v is not None else 0 for v in self.client.mget([self.prefix + 'bumped:' + t for t in tags])]
+
+    def bump(self, tags):
+        now = time.time()
+        for t in tags:
+            self.client.set(self.prefix + 'bumped:' + t, now, ex=BUMP_TIME_TTL)
+        self.client.incr(self.prefix + 'generation')
+        for t in tags:
+            self.client.incr(self.prefix + 'tag:' + t)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    """
+    Read-through cache for anonymous JSON GET endpoints.
+    Views declare the tags their response depends on with add_cache_tags(); writes call invalidate(tags).
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self.default_ttl = 60
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'lru')
+        if backend == 'redis':
+            self.backend = RedisCache.from_url(app.config['CACHE_REDIS_URL'])
+        elif backend == 'lru':
+            self.backend = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 2048))
+        else:
+            self.backend = NullCache()
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        app.extensions['response_cache'] = self
+
+    def cached(self, ttl=None, unless=None):
+        """Decorator: serves a stored copy of a successful response while none of its tags changed"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if unless is not None and unless():
+                    return view(*args, **kwargs)
+                key = self._request_key()
+                # A client pinned to the primary after its own write skips stored copies, which may
+                # predate that write; its fresh response replaces the entry
+                hit = self._load(key) if not replica_router.pinned() else None
+                if hit is not None:
+                    self._count('hits')
+                    return current_app.response_class(hit['body'], status=hit['status'], mimetype=hit['mimetype'])
+
+                self._count('misses')
+                # Tags are only known once the view ran; the generation taken now tells whether an
+                # invalidation (of any tag) landed while it read the database
+                generation = self._generation()
+                g.cache_tags = set()
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed and generation is not None:
+                    self._store(key, response, sorted(g.cache_tags), ttl or self.default_ttl, generation)
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        """Bumps tag versions so every response carrying one of them is treated as stale"""
+        try:
+            self.backend.bump(tags)
+            self._count('invalidations')
+        except Exception:
+            current_app.logger.exception('Cache invalidation failed for %s', tags)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hitRatio': round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+    def _request_key(self):
+        query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        return f'resp:{request.path}?{query}'
+
+    def _load(self, key):
+        try:
+            raw = self.backend.get(key)
+            if raw is None:
+                return None
+            entry = json.loads(raw)
+            tags = list(entry['tags'])
+            if self.backend.get_versions(tags) != [entry['tags'][t] for t in tags]:
+                return None
+            return entry
+        except Exception:
+            current_app.logger.exception('Cache read failed for %s', key)
+            return None
+
+    def _generation(self):
+        try:
+            return self.backend.generation()
+        except Exception:
+            current_app.logger.exception('Cache generation read failed')
+            return None
+
+    def _store(self, key, response, tags, ttl, generation):
+        try:
+            # Versions first: a bump visible in them has already advanced the generation
+            versions = dict(zip(tags, self.backend.get_versions(tags)))
+            if self.backend.generation() != generation:
+                return  # the body may predate that write; the next miss stores a fresh one
+            if tags and replica_router.used_replica():
+                # A replica may not have replayed a recent write yet; storing what it returned would
+                # outlive the lag by the whole TTL
+                if max(self.backend.bumped_at(tags)) > time.time() - replica_router.sticky_seconds:
+                    return
+            entry = {
+                'body': response.get_data(as_text=True),
+                'status': response.status_code,
+                'mimetype': response.mimetype,
+                'tags': versions,
+            }
+            self.backend.set(key, json.dumps(entry, separators=(',', ':')), ttl)
+        except Exception:
+            current_app.logger.exception('Cache write failed for %s', key)
+
+    def _count(self, name):
+        with self.stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def add_cache_tags(*tags):
+    """Declares which tags the response being built depends on (no-op outside a cached view)"""
+    if 'cache_tags' in g:
+        g.cache_tags.update(tags)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,203 @@
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from backend.models import db, Recipe, User
+from backend.cache import response_cache, RECIPE_LIST_TAG, user_tag
+from backend.bulk import FORMATS, RecipeImporter, iter_records, iter_export_lines, load_checkpoint, save_checkpoint
+from backend.search import recipe_search
+from backend.images import image_pipeline
+from backend.uploads import upload_store
+from backend.static_files import precompress
+from backend.jobs import job_queue, Worker, DEFAULT_QUEUE
+from backend.pooling import pool_monitor
+
+# CLI: groups maintenance commands under `flask procook ...`
+procook_cli = AppGroup('procook', help='ProCook maintenance commands.')
+
+
+# CRUD UPDATE: backfills / repairs the denormalized rating aggregates on recipes
+@procook_cli.command('reconcile-ratings')
+@click.option('--recipe-id', 'recipe_ids', type=int, multiple=True,
+              help='Only reconcile these recipe ids (repeatable). Defaults to every recipe.')
+def reconcile_ratings(recipe_ids):
+    """Recompute recipes.ratings_sum / ratings_count from the ratings table."""
+    try:
+        updated = Recipe.reconcile_rating_aggregates(list(recipe_ids) or None)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'✓ Reconciled rating aggregates for {updated} recipe(s).')
+
+
+# CRUD UPDATE: rebuilds full-text search documents for every recipe
+@procook_cli.command('reindex-search')
+def reindex_search():
+    """Rebuild the recipe search index (tsvector column on Postgres, in-process index elsewhere)."""
+    try:
+        indexed = recipe_search.reindex_all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'✓ Indexed {indexed} recipe(s) for search.')
+
+
+# CRUD UPDATE: renders missing image variants for recipes uploaded before the pipeline existed
+@procook_cli.command('process-images')
+@click.option('--all', 'reprocess_all', is_flag=True, help='Re-render recipes that already have variants.')
+def process_images(reprocess_all):
+    """Render thumbnail/card/detail WebP and JPEG variants for recipe images."""
+    if not image_pipeline.available:
+        raise click.ClickException('Pillow is not installed (pip install Pillow).')
+    query = db.session.query(Recipe.id, Recipe.image).filter(Recipe.image.isnot(None))
+    if not reprocess_all:
+        query = query.filter(Recipe.image_variants.is_(None))
+    processed = failed = 0
+    for recipe_id, image in query.all():
+        try:
+            image_pipeline.process(recipe_id, image)
+            processed += 1
+        except Exception as e:
+            db.session.rollback()
+            failed += 1
+            click.echo(f'✗ Recipe {recipe_id} ({image}): {e}', err=True)
+    click.echo(f'✓ Processed images for {processed} recipe(s), {failed} failed.')
+
+
+# CRUD DELETE: reclaims upload files no recipe references any more
+@procook_cli.command('gc-uploads')
+@click.option('--dry-run', is_flag=True, help='Only report what would be removed.')
+@click.option('--grace', type=int, default=None, help='Override UPLOAD_GC_GRACE_SECONDS for this run.')
+def gc_uploads(dry_run, grace):
+    """Delete unreferenced image blobs, variants and stale temp uploads."""
+    if grace is not None:
+        upload_store.grace_seconds = grace
+    removed, reclaimed = upload_store.sweep(dry_run=dry_run)
+    verb = 'Would remove' if dry_run else 'Removed'
+    click.echo(f'✓ {verb} {removed} file(s), {reclaimed / 1024 / 1024:.1f} MB.')
+
+
+# Build step: writes .gz/.br siblings for the frontend bundle so they are served without runtime compression
+@procook_cli.command('precompress-assets')
+@click.option('--min-size', type=int, default=1024, help='Skip files smaller than this many bytes.')
+def precompress_assets(min_size):
+    """Precompress compressible files in dist/ (run after npm run build)."""
+    written = precompress(current_app.config['STATIC_DIST_DIR'], min_size=min_size)
+    click.echo(f'✓ Wrote {written} precompressed file(s).')
+
+
+# CRUD CREATE: loads recipes from a JSONL/CSV file in batched transactions, resumable from a checkpoint
+@procook_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-email', required=True, help='Owner of the imported recipes.')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+              help='Input format (defaults to the file extension, else jsonl).')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Records per transaction.')
+@click.option('--checkpoint', type=click.Path(dir_okay=False), default=None,
+              help='Progress file written after every committed batch (default: PATH.checkpoint).')
+@click.option('--resume', is_flag=True, help='Skip the records already committed according to the checkpoint.')
+def import_recipes(path, user_email, fmt, batch_size, checkpoint, resume):
+    """Bulk-import recipes (one JSON object per line, or CSV with a JSON `ingredients` column)."""
+    user = User.query.filter_by(email=user_email.strip().lower()).first()
+    if user is None:
+        raise click.ClickException(f'No user with email {user_email}.')
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    checkpoint = checkpoint or path + '.checkpoint'
+
+    importer = RecipeImporter(user.id, batch_size=batch_size)
+    skip = 0
+    if resume:
+        state = load_checkpoint(checkpoint)
+        if state is None:
+            raise click.ClickException(f'No checkpoint at {checkpoint}.')
+        skip = state['records_done']
+        importer.imported, importer.failed = state['imported'], state['failed']
+        click.echo(f'Resuming after {skip} record(s).')
+
+    def report(importer):
+        save_checkpoint(checkpoint, importer, path)
+        click.echo(f'  {importer.processed} processed, {importer.imported} imported, {importer.failed} failed')
+
+    with open(path, newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+        importer.run(iter_records(f, fmt), skip=skip, on_batch=report)
+    response_cache.invalidate(RECIPE_LIST_TAG, user_tag(user.id))
+
+    for error in importer.errors:
+        click.echo(f'✗ Line {error["line"]}: {error["errors"]}', err=True)
+    click.echo(f'✓ Imported {importer.imported} recipe(s), {importer.failed} failed '
+               f'(checkpoint: {checkpoint}).')
+
+
+# CRUD READ: writes every recipe (optionally one owner's) in the format `import` reads back
+@procook_cli.command('export')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='jsonl', show_default=True)
+@click.option('--output', '-o', type=click.Path(dir_okay=False), default=None, help='Defaults to stdout.')
+@click.option('--user-email', default=None, help='Only export this user\'s recipes.')
+def export_recipes(fmt, output, user_email):
+    """Bulk-export recipes with their ingredients, streamed from the database."""
+    user_id = None
+    if user_email:
+        user = User.query.filter_by(email=user_email.strip().lower()).first()
+        if user is None:
+            raise click.ClickException(f'No user with email {user_email}.')
+        user_id = user.id
+
+    out = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    count = 0
+    try:
+        for line in iter_export_lines(fmt, user_id=user_id):
+            out.write(line)
+            count += 1
+    finally:
+        if output:
+            out.close()
+    if output:
+        exported = count - 1 if fmt == 'csv' else count  # minus the header row
+        click.echo(f'✓ Exported {exported} recipe(s) to {output}.')
+
+
+# Background processing: runs deferred jobs (image variants, upload GC, cascade cleanup)
+@procook_cli.command('worker')
+@click.option('--queue', 'queues', multiple=True, default=[DEFAULT_QUEUE], show_default=True,
+              help='Queue to consume (repeatable).')
+@click.option('--concurrency', type=int, default=1, show_default=True, help='Worker threads in this process.')
+@click.option('--poll-interval', type=float, default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def worker(queues, concurrency, poll_interval, burst):
+    """Process queued jobs until interrupted (run several processes to scale out)."""
+    click.echo(f'Worker consuming {", ".join(queues)} with {concurrency} thread(s)...')
+    capacity = pool_monitor.capacity()
+    if capacity is not None and concurrency > capacity:
+        click.echo(f'Warning: {concurrency} threads share {capacity} pooled connection(s); '
+                   'raise DB_POOL_SIZE or run with DB_POOL_PROFILE=worker.', err=True)
+    processed, failed = Worker(current_app._get_current_object(), job_queue, queues=queues, concurrency=concurrency,
+                               poll_interval=poll_interval, burst=burst, log=click.echo).run()
+    click.echo(f'✓ Processed {processed} job(s), {failed} failed.')
+
+
+# Visibility: queue depth per queue/status, optionally re-queueing failed jobs
+@procook_cli.command('jobs')
+@click.option('--retry-failed', is_flag=True, help='Re-queue every failed job with a fresh attempt budget.')
+def jobs(retry_failed):
+    """Show job queue depth (queued / running / failed) per queue."""
+    if retry_failed:
+        click.echo(f'✓ Re-queued {job_queue.retry_failed()} failed job(s).')
+    stats = job_queue.stats()
+    if not stats:
+        click.echo('Queue is empty.')
+    for queue, entry in sorted(stats.items()):
+        click.echo(f'{queue}: {entry["queued"]} queued (oldest {entry["oldest_ready_seconds"]}s), '
+                   f'{entry["running"]} running, {entry["failed"]} failed')
+
+
+# CRUD DELETE: removes expired server-side sessions (also queued automatically as new sessions are created)
+@procook_cli.command('sweep-sessions')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Rows deleted per transaction.')
+def sweep_sessions(batch_size):
+    """Delete expired sessions from the session store."""
+    store = current_app.extensions.get('session_store')
+    if store is None:
+        raise click.ClickException('SESSION_BACKEND=cookie keeps no server-side sessions.')
+    click.echo(f'✓ Removed {store.sweep(batch_size=batch_size)} expired session(s).')
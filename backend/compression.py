@@ -0,0 +1,106 @@
+import zlib
+from flask import request
+
+try:
+    import brotli  # optional
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    import zstandard  # optional
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+DEFAULT_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+
+
+def available_encodings(preferred):
+    """Server preference order, limited to the codecs importable in this environment"""
+    installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    return [encoding for encoding in preferred if installed.get(encoding)]
+
+
+class StreamCompressor:
+    """Incremental compressor with the same interface for every codec; flush() emits a decodable prefix"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self.obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+        elif encoding == 'br':
+            self.obj = brotli.Compressor(quality=level)
+        else:
+            self.obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.obj.process(data) if self.encoding == 'br' else self.obj.compress(data)
+
+    def flush(self):
+        if self.encoding == 'gzip':
+            return self.obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == 'br':
+            return self.obj.flush()
+        return self.obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        if self.encoding == 'gzip':
+            return self.obj.flush(zlib.Z_FINISH)
+        if self.encoding == 'br':
+            return self.obj.finish()
+        return self.obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def compress_stream(chunks, compressor):
+    """Compresses a streamed body chunk by chunk, flushing each so clients can parse progressively"""
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+def register_compression(app):
+    """
+    Negotiates gzip/br/zstd for text-like responses (COMPRESSION_* settings).
+    Buffered bodies below COMPRESSION_MIN_SIZE stay uncompressed; streamed bodies are compressed
+    incrementally. Files sent by send_file (precompressed assets, uploads) are left alone.
+    Must be registered before other after_request hooks that compute ETags (hooks run in reverse).
+    """
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+
+    encodings = available_encodings(app.config.get('COMPRESSION_ALGORITHMS', ['br', 'zstd', 'gzip']))
+    mimetypes = set(app.config.get('COMPRESSION_MIMETYPES', ()))
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 500)
+    levels = app.config.get('COMPRESSION_LEVELS', {})
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in mimetypes or response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers or response.cache_control.no_transform):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None or request.method == 'HEAD':
+            return response
+        level = levels.get(response.mimetype, {}).get(encoding, DEFAULT_LEVELS[encoding])
+
+        if response.is_streamed:
+            response.response = compress_stream(response.iter_encoded(), StreamCompressor(encoding, level))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            compressor = StreamCompressor(encoding, level)
+            body = compressor.compress(data) + compressor.finish()
+            if len(body) >= len(data):
+                return response
+            response.set_data(body)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)  # same resource, different bytes; If-None-Match compares weakly
+        return response
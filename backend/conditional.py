@@ -0,0 +1,97 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from werkzeug.http import is_resource_modified
+from backend.models import db, User, Recipe, Comment
+
+
+def compute_etag(parts):
+    """Hashes the version parts together with the request path/query so each page gets its own validator"""
+    digest = hashlib.sha1(repr((request.full_path, parts)).encode()).hexdigest()
+    return digest[:32]
+
+
+def conditional(version_fn, cache_control=None):
+    """
+    Decorator for GET views: version_fn(**view_kwargs) runs one cheap query and returns
+    (version_parts, last_modified) - or None when the resource does not exist.
+    A matching If-None-Match / If-Modified-Since short-circuits to 304 before the view serializes anything.
+    ETags are weak: compression may re-encode the 200 body, and the 304 must carry the same validator.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return view(*args, **kwargs)
+
+            parts, last_modified = version
+            etag = compute_etag(parts)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            if cache_control:
+                response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+
+def register_cache_policies(app):
+    """Applies per-blueprint Cache-Control defaults and body-hash ETags to the remaining JSON GETs"""
+    policies = app.config.get('CACHE_CONTROL_POLICIES', {})
+
+    @app.after_request
+    def apply_cache_policy(response):
+        if request.method != 'GET' or request.blueprint is None:
+            return response
+        if 'Cache-Control' not in response.headers and request.blueprint in policies:
+            response.headers['Cache-Control'] = policies[request.blueprint]
+        if (response.status_code == 200 and not response.is_streamed and not response.get_etag()[0]
+                and response.mimetype == 'application/json'):
+            response.add_etag(weak=True)  # weak for the same reason as conditional(): 200 and 304 must match
+            response.make_conditional(request)
+        return response
+
+
+# Version queries: each touches only the row(s) that determine the representation
+
+def recipe_version(recipe_id):
+    row = (db.session.query(Recipe.updated_at, Recipe.ratings_updated_at, Recipe.ratings_sum,
+                            Recipe.ratings_count, User.updated_at)
+           .outerjoin(User, Recipe.user_id == User.id)
+           .filter(Recipe.id == recipe_id).first())
+    if row is None:
+        return None
+    return tuple(row), max(ts for ts in (row[0], row[1], row[4]) if ts is not None)
+
+
+def recipe_rating_version(recipe_id):
+    row = (db.session.query(Recipe.user_id, Recipe.ratings_sum, Recipe.ratings_count,
+                            Recipe.ratings_updated_at, Recipe.created_at)
+           .filter(Recipe.id == recipe_id).first())
+    if row is None:
+        return None
+    return tuple(row), row.ratings_updated_at or row.created_at
+
+
+def comments_version(recipe_id):
+    # Comment deletions leave no timestamp behind, so comment threads are validated by ETag only
+    of_recipe = Comment.recipe_id == Recipe.id
+    row = db.session.query(
+        Recipe.id,
+        db.select(db.func.count(Comment.id)).where(of_recipe).scalar_subquery(),
+        db.select(db.func.max(Comment.id)).where(of_recipe).scalar_subquery(),
+        db.select(db.func.max(Comment.updated_at)).where(of_recipe).scalar_subquery(),
+        db.select(db.func.max(User.updated_at)).join(Comment, Comment.user_id == User.id).where(of_recipe).scalar_subquery(),
+    ).filter(Recipe.id == recipe_id).first()
+    if row is None:
+        return None
+    return tuple(row), None
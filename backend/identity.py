@@ -0,0 +1,140 @@
+import threading
+import time
+from datetime import datetime
+from flask import session
+from flask_login import UserMixin, user_logged_in, user_logged_out
+from backend.models import db, User, session_stamp
+
+IDENTITY_SESSION_KEY = '_identity'
+MAX_VERIFIED_ENTRIES = 10000
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class UserIdentity(UserMixin):
+    """
+    current_user for authenticated requests: the User columns responses need, rebuilt from the
+    session instead of the users table. load() (or any other User attribute) fetches the full row once.
+    """
+
+    def __init__(self, id, name, email, created_at=None, updated_at=None, stamp=None, user=None):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.stamp = stamp
+        self._user = user
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.name, user.email, user.created_at, user.updated_at,
+                   stamp=session_stamp(user), user=user)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(snapshot['id'], snapshot['name'], snapshot['email'],
+                   _parse_timestamp(snapshot['created_at']), _parse_timestamp(snapshot['updated_at']),
+                   stamp=snapshot.get('stamp'))
+
+    def get_id(self):
+        return f'{self.id}:{self.stamp}'
+
+    def load(self):
+        """CRUD READ: the full User row, for routes that modify it or need relationships"""
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        # Only reached for attributes the snapshot does not carry (password, relationships, methods)
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    # Same output as User.to_dict()
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'created_at': self.created_at.isoformat() + 'Z' if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() + 'Z' if self.updated_at else None,
+        }
+
+
+class IdentityCache:
+    """
+    Flask-Login user loader backed by a snapshot in the session.
+    The snapshot is trusted for IDENTITY_TTL seconds, then re-verified against the users table
+    (so deleted accounts, password changes and edits from other sessions are picked up within that window).
+    IDENTITY_TTL=0 loads the row on every request. Verification times are kept per process, not in the
+    session, so a re-verification that finds nothing changed does not rewrite the stored session.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 60
+        self.verified = {}  # (user id, stamp) -> time.time() of the last users-table check
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('IDENTITY_TTL', 60)
+        user_logged_in.connect(self._on_login, app)
+        user_logged_out.connect(self._on_logout, app)
+        app.extensions['identity_cache'] = self
+
+    def load(self, login_id):
+        """Resolves a '<id>:<stamp>' login id; ids without a matching stamp (logins revoked since) are rejected"""
+        user_id, _, stamp = str(login_id).partition(':')
+        if not user_id.isdigit() or not stamp:
+            return None
+        user_id = int(user_id)
+        snapshot = session.get(IDENTITY_SESSION_KEY)
+        if (snapshot and snapshot.get('id') == user_id and snapshot.get('stamp') == stamp
+                and 0 <= time.time() - self.verified.get((user_id, stamp), 0) < self.ttl):
+            return UserIdentity.from_snapshot(snapshot)
+
+        user = db.session.get(User, user_id)
+        if user is None or session_stamp(user) != stamp:
+            self.forget()
+            return None
+        self.remember(user)
+        return UserIdentity.from_user(user)
+
+    def _mark_verified(self, user_id, stamp):
+        now = time.time()
+        with self.lock:
+            if len(self.verified) >= MAX_VERIFIED_ENTRIES:
+                self.verified = {k: t for k, t in self.verified.items() if now - t < self.ttl}
+            self.verified[(user_id, stamp)] = now
+
+    def remember(self, user):
+        """Stores a fresh snapshot of the user; call after changing fields the snapshot carries"""
+        snapshot = {
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'created_at': user.created_at.isoformat() if user.created_at else None,
+            'updated_at': user.updated_at.isoformat() if user.updated_at else None,
+            'stamp': session_stamp(user),
+        }
+        self._mark_verified(user.id, snapshot['stamp'])
+        # Assigning an equal snapshot would still mark the session modified and cost a session write
+        if session.get(IDENTITY_SESSION_KEY) != snapshot:
+            session[IDENTITY_SESSION_KEY] = snapshot
+
+    def forget(self):
+        session.pop(IDENTITY_SESSION_KEY, None)
+
+    def _on_login(self, sender, user, **extra):
+        self.remember(user)
+
+    def _on_logout(self, sender, user, **extra):
+        self.forget()
+
+
+identity_cache = IdentityCache()
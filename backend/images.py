@@ -0,0 +1,160 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.models import db, Recipe
+from backend.cache import response_cache, RECIPE_LIST_TAG, recipe_tag
+from backend.jobs import job_queue
+
+try:
+    from PIL import Image, ImageOps  # optional: without Pillow recipes keep serving the original upload
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = ImageOps = None
+
+# Variant name -> maximum width in pixels; each one is written as WebP and JPEG
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'detail': 1200}
+VARIANT_FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}),
+                   'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True})}
+VARIANT_DIR = 'variants'
+
+
+def file_digest(path, chunk_size=64 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(image, target, fmt, options):
+    """Encodes into a temp file next to the target and renames it, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, fmt, **options)  # no exif/icc arguments: metadata is stripped
+        os.replace(tmp, target)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+def _reuse(target):
+    """True if the file exists; restarts its GC grace period like a reused upload blob"""
+    try:
+        os.utime(target)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def render_variants(upload_folder, relative_path):
+    """
+    Produces the resized WebP/JPEG variants of an upload and returns the variant map stored in
+    Recipe.image_variants. Variants are named after the SHA-256 of the original and the output width,
+    so identical uploads share files and already rendered variants are not encoded again.
+    """
+    source = os.path.join(upload_folder, relative_path)
+    digest = file_digest(source)
+    variants = {}
+    with Image.open(source) as original:
+        original.seek(0)  # first frame of animated GIF/WebP
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        for name, max_width in IMAGE_VARIANTS.items():
+            width = min(max_width, image.width)  # never upscale
+            height = max(1, round(image.height * width / image.width))
+            resized = None
+            entry = {'width': width, 'height': height}
+            for ext, (fmt, options) in VARIANT_FORMATS.items():
+                path = f'{VARIANT_DIR}/{digest[:2]}/{digest}_{width}.{ext}'
+                target = os.path.join(upload_folder, path)
+                if not _reuse(target):
+                    if resized is None:
+                        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+                    frame = resized
+                    if fmt == 'JPEG' and frame.mode == 'RGBA':
+                        frame = Image.new('RGB', frame.size, (255, 255, 255))
+                        frame.paste(resized, mask=resized.getchannel('A'))
+                    _write_atomic(frame, target, fmt, options)
+                entry[ext] = path
+            variants[name] = entry
+    return variants
+
+
+class ImagePipeline:
+    """
+    Renders image variants after the upload request has committed.
+    The request only enqueues an images.render job; the worker writes Recipe.image_variants when it is done.
+    With JOBS_INLINE (development) there is no worker, so the job runs on a small per-process thread pool
+    instead of inside the upload request.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.threads = 2
+        self.executor = None
+        self.executor_pid = None
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.threads = app.config.get('IMAGE_RENDER_THREADS', 2)
+        self.executor = None
+        app.extensions['image_pipeline'] = self
+
+    @property
+    def available(self):
+        return Image is not None
+
+    def enqueue(self, recipe_id, image):
+        """Schedules variant rendering for a recipe's current image (no-op without Pillow)"""
+        if not self.available or not image:
+            return
+        if job_queue.inline and self.threads:
+            return self._executor().submit(self._render_in_background, recipe_id, image)
+        job_queue.enqueue('images.render', {'recipe_id': recipe_id, 'image': image})
+
+    def _render_in_background(self, recipe_id, image):
+        with self.app.app_context():
+            try:
+                self.process(recipe_id, image)
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Rendering variants for recipe %s failed', recipe_id)
+
+    def _executor(self):
+        # Created lazily per process: a pool inherited through a pre-fork server has no live workers
+        with self.lock:
+            if self.executor is None or self.executor_pid != os.getpid():
+                self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='image-render')
+                self.executor_pid = os.getpid()
+            return self.executor
+
+    def process(self, recipe_id, image):
+        """Renders variants and records them, unless the recipe's image changed in the meantime"""
+        variants = render_variants(self.app.config['UPLOAD_FOLDER'], image)
+        result = db.session.execute(
+            db.update(Recipe)
+            .where(Recipe.id == recipe_id, Recipe.image == image)
+            .values(image_variants=variants)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount:
+            response_cache.invalidate(RECIPE_LIST_TAG, recipe_tag(recipe_id))
+        return variants
+
+
+image_pipeline = ImagePipeline()
+
+
+@job_queue.task('images.render')
+def render_recipe_image(recipe_id, image):
+    image_pipeline.process(recipe_id, image)
@@ -0,0 +1,244 @@
+"""
+Database-backed job queue: request handlers enqueue slow side effects as rows in the jobs table
+and return; `flask procook worker` processes claim them with SELECT ... FOR UPDATE SKIP LOCKED,
+so any number of workers share one queue without running a job twice.
+"""
+import os
+import random
+import signal
+import socket
+import threading
+from datetime import datetime, timedelta
+from backend.models import db, Job
+
+DEFAULT_QUEUE = 'default'
+
+
+class UnknownJob(KeyError):
+    """Raised when enqueueing a job name no task was registered for"""
+
+
+class JobQueue:
+    """
+    Registry of task functions plus the enqueue/claim/execute cycle around the jobs table.
+    Tasks are plain functions registered with @job_queue.task(name); payloads are JSON keyword arguments.
+    JOBS_INLINE runs tasks synchronously inside enqueue() instead (development, tests).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.tasks = {}
+        self.inline = False
+        self.max_attempts = 5
+        self.backoff_seconds = 5
+        self.backoff_max_seconds = 3600
+        self.lease_seconds = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.inline = app.config.get('JOBS_INLINE', False)
+        self.max_attempts = app.config.get('JOB_MAX_ATTEMPTS', 5)
+        self.backoff_seconds = app.config.get('JOB_BACKOFF_SECONDS', 5)
+        self.backoff_max_seconds = app.config.get('JOB_BACKOFF_MAX_SECONDS', 3600)
+        self.lease_seconds = app.config.get('JOB_LEASE_SECONDS', 300)
+        app.extensions['job_queue'] = self
+
+    def task(self, name, max_attempts=None):
+        """Decorator registering a task function under a job name"""
+        def decorator(fn):
+            self.tasks[name] = (fn, max_attempts)
+            return fn
+        return decorator
+
+    def enqueue(self, name, payload=None, delay=0, queue=DEFAULT_QUEUE, dedupe_key=None):
+        """
+        Queues a job and commits it; returns the job id (None when run inline or de-duplicated).
+        Call it after committing the change the job depends on, so a worker never sees the job first.
+        """
+        if name not in self.tasks:
+            raise UnknownJob(name)
+        payload = payload or {}
+        if self.inline:
+            self._run_inline(name, payload)
+            return None
+
+        if dedupe_key is not None:
+            pending = db.session.query(db.exists().where(Job.dedupe_key == dedupe_key, Job.status == Job.QUEUED)).scalar()
+            if pending:
+                return None
+        now = datetime.utcnow()
+        job_id = db.session.execute(db.insert(Job).values(
+            queue=queue, name=name, payload=payload, status=Job.QUEUED, attempts=0,
+            max_attempts=self.tasks[name][1] or self.max_attempts, run_at=now + timedelta(seconds=delay),
+            dedupe_key=dedupe_key, created_at=now, updated_at=now,
+        ).returning(Job.id)).scalar()
+        db.session.commit()
+        return job_id
+
+    def claim(self, worker_id, queues=(DEFAULT_QUEUE,), limit=1):
+        """
+        Locks up to `limit` ready jobs for this worker and commits the claim.
+        Running jobs whose lease expired (crashed worker) are ready again.
+        """
+        now = datetime.utcnow()
+        ready = db.and_(Job.queue.in_(queues), db.or_(
+            db.and_(Job.status == Job.QUEUED, Job.run_at <= now),
+            db.and_(Job.status == Job.RUNNING, Job.locked_at < now - timedelta(seconds=self.lease_seconds)),
+        ))
+        ids = db.session.scalars(
+            db.select(Job.id).where(ready).order_by(Job.run_at, Job.id).limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            db.session.rollback()
+            return []
+        # Re-checking `ready` keeps the claim safe on databases without SKIP LOCKED (SQLite)
+        db.session.execute(
+            db.update(Job).where(Job.id.in_(ids), ready)
+            .values(status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = db.session.execute(
+            db.select(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+            .where(Job.id.in_(ids), Job.locked_by == worker_id, Job.locked_at == now)
+            .order_by(Job.run_at, Job.id)
+        ).all()
+        db.session.commit()
+        return claimed
+
+    def execute(self, job, worker_id):
+        """Runs one claimed job; success deletes the row, failure schedules a retry with backoff"""
+        task = self.tasks.get(job.name)
+        try:
+            if task is None:
+                raise UnknownJob(job.name)
+            if job.attempts > job.max_attempts:
+                raise RuntimeError('Lease expired on the final attempt.')
+            task[0](**job.payload)
+            db.session.execute(db.delete(Job).where(Job.id == job.id, Job.locked_by == worker_id))
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.exception('Job %s (%s) failed on attempt %d', job.id, job.name, job.attempts)
+            self._record_failure(job, worker_id, e, permanent=task is None)
+            return False
+
+    def backoff(self, attempts):
+        """Exponential delay before the next attempt, with jitter so failed batches do not retry in lockstep"""
+        delay = min(self.backoff_seconds * 2 ** (attempts - 1), self.backoff_max_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+    def stats(self):
+        """Queue depth per queue and status, plus how long the oldest ready job has been waiting"""
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            db.select(Job.queue, Job.status, db.func.count(), db.func.min(Job.run_at))
+            .group_by(Job.queue, Job.status)
+        ).all()
+        queues = {}
+        for queue, status, count, oldest in rows:
+            entry = queues.setdefault(queue, {Job.QUEUED: 0, Job.RUNNING: 0, Job.FAILED: 0, 'oldest_ready_seconds': 0})
+            entry[status] = count
+            if status == Job.QUEUED and oldest is not None:
+                entry['oldest_ready_seconds'] = max(0, round((now - oldest).total_seconds(), 1))
+        return queues
+
+    def retry_failed(self, job_ids=None):
+        """Puts failed jobs back in the queue with a fresh attempt budget; returns how many"""
+        query = db.update(Job).where(Job.status == Job.FAILED)
+        if job_ids:
+            query = query.where(Job.id.in_(job_ids))
+        result = db.session.execute(
+            query.values(status=Job.QUEUED, attempts=0, run_at=datetime.utcnow(), locked_by=None, locked_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def _record_failure(self, job, worker_id, error, permanent=False):
+        now = datetime.utcnow()
+        values = {'last_error': f'{type(error).__name__}: {error}'[:2000], 'locked_by': None, 'locked_at': None,
+                  'updated_at': now}
+        if permanent or job.attempts >= job.max_attempts:
+            values['status'] = Job.FAILED
+        else:
+            values.update(status=Job.QUEUED, run_at=now + timedelta(seconds=self.backoff(job.attempts)))
+        db.session.execute(
+            db.update(Job).where(Job.id == job.id, Job.locked_by == worker_id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _run_inline(self, name, payload):
+        try:
+            self.tasks[name][0](**payload)
+        except Exception:
+            db.session.rollback()
+            self.app.logger.exception('Inline job %s failed', name)
+
+
+class Worker:
+    """
+    Polls the queue from `concurrency` threads (each with its own app context and session) until
+    SIGINT/SIGTERM; the job in progress finishes first. burst=True exits once the queue is empty.
+    Scale out by running more worker processes - SKIP LOCKED keeps them from claiming the same job.
+    """
+
+    def __init__(self, app, queue, queues=(DEFAULT_QUEUE,), concurrency=1, poll_interval=1.0, burst=False, log=print):
+        self.app = app
+        self.queue = queue
+        self.queues = tuple(queues)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.log = log
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def run(self):
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: self.stop())
+        threads = [threading.Thread(target=self._loop, args=(f'{socket.gethostname()}:{os.getpid()}:{i}',),
+                                    name=f'job-worker-{i}', daemon=True)
+                   for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+        return self.processed, self.failed
+
+    def stop(self):
+        if not self.stopping.is_set():
+            self.log('Stopping after the current job...')
+        self.stopping.set()
+
+    def _loop(self, worker_id):
+        while not self.stopping.is_set():
+            with self.app.app_context():
+                try:
+                    jobs = self.queue.claim(worker_id, self.queues)
+                    for job in jobs:
+                        ok = self.queue.execute(job, worker_id)
+                        with self.lock:
+                            self.processed += ok
+                            self.failed += not ok
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Job worker %s could not poll the queue', worker_id)
+                    jobs = None
+                finally:
+                    db.session.remove()
+            if not jobs:
+                if self.burst and jobs is not None:
+                    return
+                self.stopping.wait(self.poll_interval)
+
+
+job_queue = JobQueue()
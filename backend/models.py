@@ -1,9 +1,12 @@
+import hashlib
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from backend.passwords import password_hasher
+from backend.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # CRUD: Many-to-many relationship table - stores which users saved which recipes
 saved_recipes = db.Table(
@@ -17,6 +20,19 @@ saved_recipes = db.Table(
 )
 
 
+# Rounds a stored rating sum/count pair to the one-decimal average exposed by the API
+def average_from_aggregates(ratings_sum, ratings_count):
+    return round(ratings_sum / ratings_count, 1) if ratings_count else 0
+
+
+# Short digest carried in login ids (session and remember cookie): bumping users.session_version
+# (password change) changes it, which invalidates every login made before. created_at ties it to
+# the account, so a reused id never matches a deleted account's logins.
+def session_stamp(user):
+    created_at = user.created_at.isoformat() if user.created_at else ''
+    return hashlib.sha256(f'{user.id}:{created_at}:{user.session_version or 0}'.encode()).hexdigest()[:16]
+
+
 # OOP: User class inherits from UserMixin (authentication methods) and db.Model (database ORM)
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -27,6 +43,7 @@ class User(UserMixin, db.Model):
     email_verified_at = db.Column(db.DateTime, nullable=True)
     password = db.Column(db.String(255), nullable=False)
     remember_token = db.Column(db.String(100), nullable=True)
+    session_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -39,13 +56,21 @@ class User(UserMixin, db.Model):
     saved = db.relationship('Recipe', secondary=saved_recipes, lazy='dynamic',
                             backref=db.backref('saved_by', lazy='dynamic'))
 
+    # Flask-Login id: '<id>:<session stamp>' so logins made before a password change stop resolving
+    def get_id(self):
+        return f'{self.id}:{session_stamp(self)}'
+
+    # Signs out every existing login of this user once committed (rehashing the password does not)
+    def rotate_session_stamp(self):
+        self.session_version = (self.session_version or 0) + 1
+
     # OOP Encapsulation: hashes password securely instead of storing plain text
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     # OOP Encapsulation: verifies password against stored hash
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
     # OOP Abstraction: converts User object to dictionary for JSON API responses
     def to_dict(self):
@@ -67,6 +92,8 @@ class Recipe(db.Model):
     title = db.Column(db.String(255), nullable=False)
     short_description = db.Column(db.Text, nullable=False)
     image = db.Column(db.String(255), nullable=True)
+    # Resized WebP/JPEG renditions of image, filled in by the background pipeline (backend/images.py)
+    image_variants = db.Column(db.JSON(none_as_null=True), nullable=True)
     cuisine_type = db.Column(db.String(100), nullable=False)
     category = db.Column(db.String(100), nullable=False)
     prep_time = db.Column(db.Integer, nullable=False)
@@ -74,29 +101,76 @@ class Recipe(db.Model):
     total_time = db.Column(db.Integer, nullable=False)
     serving_size = db.Column(db.Integer, nullable=False)
     preparation_notes = db.Column(db.Text, nullable=True)
+    # Denormalized rating aggregates - maintained by the rating routes so serializers never query ratings
+    ratings_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    ratings_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    ratings_updated_at = db.Column(db.DateTime, nullable=True)  # last rating change, feeds HTTP validators
+    # Full-text search document (title A, description/ingredients B, notes C) - see backend/search.py
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite'), nullable=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # OOP: One-to-many relationships - Recipe has many ingredients, comments, and ratings
     # CASCADE delete ensures child records are deleted when recipe is deleted
-    ingredients = db.relationship('Ingredient', backref='recipe', lazy='joined',
+    # Ingredients are never loaded implicitly: queries that render them add selectinload(Recipe.ingredients),
+    # and touching them without it raises instead of issuing one query per recipe
+    ingredients = db.relationship('Ingredient', backref='recipe', lazy='raise',
                                   cascade='all, delete-orphan', order_by='Ingredient.order')
     comments = db.relationship('Comment', backref='recipe', lazy='dynamic', cascade='all, delete-orphan')
     ratings = db.relationship('Rating', backref='recipe', lazy='dynamic', cascade='all, delete-orphan')
 
+    # Composite indexes match the (filter, created_at, id) keyset used by the paginated recipe list
     __table_args__ = (
-        db.Index('ix_recipes_user_created', 'user_id', 'created_at'),
+        db.Index('ix_recipes_created_id', 'created_at', 'id'),
+        db.Index('ix_recipes_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_recipes_cuisine_created', 'cuisine_type', 'created_at', 'id'),
+        db.Index('ix_recipes_category_created', 'category', 'created_at', 'id'),
+        db.Index('ix_recipes_total_time', 'total_time', 'created_at', 'id'),
         db.Index('ix_recipes_title', 'title'),
+        db.Index('ix_recipes_image', 'image'),  # upload reference counts
+        db.Index('ix_recipes_search_vector', 'search_vector', postgresql_using='gin'),
     )
 
-    # CRUD READ: calculates average rating using SQL aggregate function
-    def average_rating(self):
-        avg = db.session.query(db.func.avg(Rating.rating)).filter(Rating.recipe_id == self.id).scalar()
-        return round(float(avg), 1) if avg else 0
+    # CRUD READ: existence check for routes that only validate the recipe id (no row hydration)
+    @staticmethod
+    def exists(recipe_id):
+        return db.session.query(db.exists().where(Recipe.id == recipe_id)).scalar()
 
-    # CRUD READ: counts total ratings for this recipe
-    def ratings_count(self):
-        return self.ratings.count()
+    # CRUD READ: owner and rating aggregates by primary key, without loading the recipe object
+    @staticmethod
+    def rating_summary(recipe_id):
+        return (db.session.query(Recipe.user_id, Recipe.ratings_sum, Recipe.ratings_count)
+                .filter(Recipe.id == recipe_id).first())
+
+    # CRUD READ: calculates average rating from the denormalized aggregate columns (no extra query)
+    def average_rating(self):
+        return average_from_aggregates(self.ratings_sum, self.ratings_count)
+
+    # CRUD UPDATE: atomically shifts the rating aggregates inside the caller's transaction
+    @staticmethod
+    def apply_rating_delta(recipe_id, sum_delta, count_delta=0):
+        db.session.execute(
+            db.update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(ratings_sum=Recipe.ratings_sum + sum_delta,
+                    ratings_count=Recipe.ratings_count + count_delta,
+                    ratings_updated_at=datetime.utcnow(),
+                    updated_at=Recipe.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    # CRUD UPDATE: recomputes the rating aggregates from the ratings table (backfill / drift repair)
+    @staticmethod
+    def reconcile_rating_aggregates(recipe_ids=None):
+        totals = db.select(
+            db.func.coalesce(db.func.sum(Rating.rating), 0),
+        ).where(Rating.recipe_id == Recipe.id).scalar_subquery()
+        counts = db.select(db.func.count(Rating.id)).where(Rating.recipe_id == Recipe.id).scalar_subquery()
+        stmt = db.update(Recipe).values(ratings_sum=totals, ratings_count=counts, updated_at=Recipe.updated_at)
+        if recipe_ids is not None:
+            stmt = stmt.where(Recipe.id.in_(recipe_ids))
+        result = db.session.execute(stmt.execution_options(synchronize_session=False))
+        return result.rowcount
 
     # OOP Abstraction: converts Recipe object to dictionary for JSON API responses
     def to_dict(self, include_ingredients=False, include_user=True):
@@ -106,6 +180,7 @@ class Recipe(db.Model):
             'title': self.title,
             'short_description': self.short_description,
             'image': self.image,
+            'image_variants': self.image_variants,
             'cuisine_type': self.cuisine_type,
             'category': self.category,
             'prep_time': self.prep_time,
@@ -114,7 +189,7 @@ class Recipe(db.Model):
             'serving_size': self.serving_size,
             'preparation_notes': self.preparation_notes,
             'average_rating': self.average_rating(),
-            'ratings_count': self.ratings_count(),
+            'ratings_count': self.ratings_count,
             'created_at': self.created_at.isoformat() + 'Z' if self.created_at else None,
             'updated_at': self.updated_at.isoformat() + 'Z' if self.updated_at else None,
         }
@@ -160,6 +235,63 @@ class Ingredient(db.Model):
             'updated_at': self.updated_at.isoformat() + 'Z' if self.updated_at else None,
         }
 
+    # Columns written from submitted recipe forms (besides recipe_id)
+    VALUE_FIELDS = ('name', 'measurement', 'substitution_option', 'allergen_info', 'order')
+
+    # CRUD CREATE: inserts a recipe's ingredients with one multi-row INSERT
+    @staticmethod
+    def bulk_insert(recipe_id, rows):
+        if not rows:
+            return
+        now = datetime.utcnow()
+        db.session.execute(db.insert(Ingredient).values([
+            {**{key: row[key] for key in Ingredient.VALUE_FIELDS}, 'recipe_id': recipe_id,
+             'created_at': now, 'updated_at': now}
+            for row in rows
+        ]))
+
+    # CRUD UPDATE: diffs submitted ingredients against the stored ones - at most one UPDATE ... FROM (VALUES ...),
+    # one multi-row INSERT and one DELETE ... WHERE id IN; unchanged rows are not touched at all
+    @staticmethod
+    def sync_for_recipe(recipe_id, rows):
+        fields = Ingredient.VALUE_FIELDS
+        existing = {row.id: row for row in db.session.query(Ingredient.id, *(getattr(Ingredient, f) for f in fields))
+                    .filter(Ingredient.recipe_id == recipe_id)}
+
+        # Match by submitted id first, then by name, so edited ingredients keep their row ids
+        matches = [existing.pop(row.get('id'), None) for row in rows]
+        by_name = {}
+        for stored in existing.values():
+            by_name.setdefault(stored.name.lower(), []).append(stored)
+        for i, row in enumerate(rows):
+            if matches[i] is None and by_name.get(row['name'].lower()):
+                matches[i] = by_name[row['name'].lower()].pop(0)
+                del existing[matches[i].id]
+
+        updates = [(stored.id, *(row[f] for f in fields)) for row, stored in zip(rows, matches)
+                   if stored is not None and any(getattr(stored, f) != row[f] for f in fields)]
+        inserts = [row for row, stored in zip(rows, matches) if stored is None]
+
+        if updates:
+            submitted = db.values(
+                db.column('id', db.Integer), db.column('name', db.String), db.column('measurement', db.String),
+                db.column('substitution_option', db.String), db.column('allergen_info', db.String),
+                db.column('order', db.Integer), name='submitted',
+            ).data(updates).cte('submitted')  # WITH submitted(...) AS (VALUES ...) works on Postgres and SQLite
+            db.session.execute(
+                db.update(Ingredient)
+                .where(Ingredient.id == submitted.c.id)
+                .values(**{f: submitted.c[f] for f in fields}, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+        Ingredient.bulk_insert(recipe_id, inserts)
+        if existing:
+            db.session.execute(
+                db.delete(Ingredient).where(Ingredient.id.in_(list(existing)))
+                .execution_options(synchronize_session=False)
+            )
+        return bool(updates or inserts or existing)
+
 
 # OOP: Comment class with self-referential relationship for nested replies
 class Comment(db.Model):
@@ -174,11 +306,13 @@ class Comment(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # OOP: Self-referential one-to-many relationship - Comment can have many replies
+    # Loaded on access only; full threads are fetched by load_comment_page (backend/routes/comments.py)
     replies = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]),
-                              lazy='joined', order_by='Comment.created_at.asc()')
+                              lazy='select', order_by='Comment.created_at.asc()')
 
     __table_args__ = (
         db.Index('ix_comments_recipe_created', 'recipe_id', 'created_at'),
+        db.Index('ix_comments_recipe_parent_created', 'recipe_id', 'parent_id', 'created_at', 'id'),
         db.Index('ix_comments_parent', 'parent_id'),
     )
 
@@ -231,6 +365,68 @@ class Rating(db.Model):
         }
 
 
+# Server-side session records (backend/sessions.py); id is the SHA-256 of the cookie's session id
+class UserSession(db.Model):
+    __tablename__ = 'sessions'
+
+    id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Revocation deletes by user; the sweeper deletes by expiry
+    __table_args__ = (
+        db.Index('ix_sessions_user_id', 'user_id'),
+        db.Index('ix_sessions_expires_at', 'expires_at'),
+    )
+
+
+# Deferred work claimed by `flask procook worker` processes (see backend/jobs.py)
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(50), nullable=False, default='default')
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # not before (retry backoff)
+    locked_by = db.Column(db.String(255), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    dedupe_key = db.Column(db.String(255), nullable=True)  # at most one queued job per key
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Workers scan ready jobs per queue in run_at order; finished jobs are deleted, so the table stays small
+    __table_args__ = (
+        db.Index('ix_jobs_ready', 'queue', 'status', 'run_at', 'id'),
+        db.Index('ix_jobs_dedupe_key', 'dedupe_key'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'queue': self.queue,
+            'name': self.name,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() + 'Z' if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() + 'Z' if self.created_at else None,
+        }
+
+
 class Category(db.Model):
     __tablename__ = 'categories'
 
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from backend.models import db
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(created_at, row_id):
+    """Builds an opaque cursor from the (created_at, id) keyset of the last row on a page"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Parses a cursor back into its (created_at, id) keyset"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise InvalidCursor('Invalid cursor.')
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamps the requested page size to 1..MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def keyset_filter(query, created_col, id_col, cursor):
+    """Restricts a newest-first query to rows strictly after the cursor"""
+    created_at, row_id = decode_cursor(cursor)
+    return query.filter(db.tuple_(created_col, id_col) < db.tuple_(created_at, row_id))
+
+
+def keyset_page(query, created_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Returns (rows, next_cursor) for a newest-first keyset page on (created_at, id).
+    Seeks past the cursor instead of using OFFSET, so every page costs the same index range scan.
+    """
+    if cursor:
+        query = keyset_filter(query, created_col, id_col, cursor)
+
+    ordered = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+    # ORM Query or Core Select (compact serializer rows)
+    rows = db.session.execute(ordered).all() if isinstance(ordered, db.Select) else ordered.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
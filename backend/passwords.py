@@ -0,0 +1,94 @@
+"""
+Password hashing with a configurable algorithm/cost (PASSWORD_HASH_METHOD, any werkzeug method string)
+run on a bounded pool, so a login burst queues on a fixed number of hashing slots instead of
+every request burning a core at once.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+POOL_KINDS = ('thread', 'process', 'inline')
+
+
+class HasherBusy(RuntimeError):
+    """Raised when more hash operations are pending than PASSWORD_HASH_MAX_PENDING allows"""
+
+
+class PasswordHasher:
+    """
+    hash()/verify() run on a per-process pool: threads by default (hashlib's scrypt and pbkdf2
+    release the GIL), processes for pure-Python backends, or inline. needs_rehash() tells login
+    to upgrade hashes created with other parameters.
+    """
+
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.pool_kind = 'thread'
+        self.workers = os.cpu_count() or 1
+        self.max_pending = self.workers * 4
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.executor = None
+        self.executor_pid = None
+        self.lock = threading.Lock()
+        self._reference_hash = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.pool_kind = app.config.get('PASSWORD_HASH_POOL', 'thread')
+        if self.pool_kind not in POOL_KINDS:
+            raise ValueError(f'PASSWORD_HASH_POOL must be one of {", ".join(POOL_KINDS)}')
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or self.workers * 4
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.executor = None
+        self._reference_hash = None
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._call(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._call(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True when the stored hash was made with a different algorithm or cost than configured"""
+        return stored_hash.split('$', 1)[0] != self._reference().split('$', 1)[0]
+
+    def dummy_verify(self, password):
+        """Spends one verification on a throwaway hash so unknown accounts cost the same as known ones"""
+        self.verify(self._reference(), password)
+        return False
+
+    def _reference(self):
+        # One hash with the configured parameters: its prefix is the normalized method string
+        if self._reference_hash is None:
+            self._reference_hash = self._call(generate_password_hash, os.urandom(16).hex(), self.method)
+        return self._reference_hash
+
+    def _call(self, fn, *args):
+        if self.pool_kind == 'inline':
+            return fn(*args)
+        if not self.slots.acquire(blocking=False):
+            raise HasherBusy('Too many password checks in progress.')
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+    def _executor(self):
+        # Created lazily per process: a pool inherited through a pre-fork server has no live workers
+        with self.lock:
+            if self.executor is None or self.executor_pid != os.getpid():
+                if self.pool_kind == 'process':
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self.executor_pid = os.getpid()
+            return self.executor
+
+
+password_hasher = PasswordHasher()
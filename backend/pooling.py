@@ -0,0 +1,206 @@
+"""
+Database connection pooling: SQLALCHEMY_ENGINE_OPTIONS built from a named profile (DB_POOL_PROFILE)
+plus per-setting overrides, a mode that is safe behind a transaction pooler such as PgBouncer
+(DB_PGBOUNCER), statement timeouts with per-endpoint overrides, and pool metrics for /api/_debug/pool.
+"""
+import threading
+import time
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from backend.models import db
+
+POOL_PROFILES = {
+    # Request threads of a web process: warm connections reused newest-first and no ping on checkout
+    # (pool_recycle stays under server/pooler idle timeouts; a dropped connection invalidates the pool)
+    'web': {'pool_size': 5, 'max_overflow': 5, 'pool_timeout': 10, 'pool_recycle': 1800,
+            'pool_pre_ping': False, 'pool_use_lifo': True, 'statement_timeout_ms': 15000},
+    # Job workers and maintenance commands: long idle gaps between jobs, long-running statements
+    'worker': {'pool_size': 4, 'max_overflow': 2, 'pool_timeout': 30, 'pool_recycle': 300,
+               'pool_pre_ping': True, 'pool_use_lifo': False, 'statement_timeout_ms': 0},
+    # Local development: few connections, tolerant of a restarted database
+    'small': {'pool_size': 2, 'max_overflow': 3, 'pool_timeout': 30, 'pool_recycle': 300,
+              'pool_pre_ping': True, 'pool_use_lifo': False, 'statement_timeout_ms': 0},
+}
+# Config keys overriding single profile settings (None = keep the profile's value)
+POOL_OVERRIDES = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+    'DB_STATEMENT_TIMEOUT_MS': 'statement_timeout_ms',
+}
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping', 'pool_use_lifo')
+
+
+def pool_settings(config):
+    """Profile settings with the DB_* overrides applied"""
+    name = config.get('DB_POOL_PROFILE', 'web')
+    if name not in POOL_PROFILES:
+        raise ValueError(f'DB_POOL_PROFILE must be one of {", ".join(POOL_PROFILES)}')
+    settings = dict(POOL_PROFILES[name], profile=name)
+    for key, setting in POOL_OVERRIDES.items():
+        if config.get(key) is not None:
+            settings[setting] = config[key]
+    return settings
+
+
+def engine_options(database_uri, settings, pgbouncer=False):
+    """create_engine() keyword arguments for the resolved pool settings"""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == 'sqlite':
+        # In-memory databases keep Flask-SQLAlchemy's static pool; file databases are only measured
+        return {} if url.database in (None, '', ':memory:') else {'poolclass': MonitoredQueuePool}
+
+    options = {key: settings[key] for key in POOL_OPTIONS}
+    options['poolclass'] = MonitoredQueuePool
+    connect_args = {}
+    if backend == 'postgresql':
+        if pgbouncer:
+            # Server connections change between transactions: no startup options (PgBouncer rejects them)
+            # and no prepared statements (psycopg 3 prepares repeated queries; psycopg2 never does)
+            if url.get_driver_name() == 'psycopg':
+                connect_args['prepare_threshold'] = None
+        elif settings['statement_timeout_ms']:
+            connect_args['options'] = f'-c statement_timeout={int(settings["statement_timeout_ms"])}'
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout took to get a connection (queueing or connecting)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_monitor.record_timeout()
+            raise
+        finally:
+            pool_monitor.record_wait(time.perf_counter() - started)
+
+
+class PoolMonitor:
+    """
+    Resolves the engine options at startup (init_app must run before db.init_app), applies
+    per-endpoint statement timeouts (DB_STATEMENT_TIMEOUTS) with SET LOCAL, and counts checkouts,
+    checkout waits, timeouts and invalidations for this worker process.
+    """
+
+    def __init__(self, app=None):
+        self.settings = pool_settings({})
+        self.pgbouncer = False
+        self.slow_wait_ms = 100.0
+        self.logger = None
+        self.lock = threading.Lock()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.settings = pool_settings(app.config)
+        self.pgbouncer = app.config.get('DB_PGBOUNCER', False)
+        self.slow_wait_ms = app.config.get('DB_POOL_SLOW_WAIT_MS', 100.0)
+        self.logger = app.logger
+        options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], self.settings, self.pgbouncer)
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})  # explicit options win
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+        for name, listener in (('checkout', self._on_checkout), ('connect', self._on_connect),
+                               ('invalidate', self._on_invalidate)):
+            if not event.contains(MonitoredQueuePool, name, listener):
+                event.listen(MonitoredQueuePool, name, listener)
+        if not event.contains(db.session, 'after_begin', self._apply_statement_timeout):
+            event.listen(db.session, 'after_begin', self._apply_statement_timeout)
+        app.extensions['pool_monitor'] = self
+
+    def statement_timeout(self, endpoint=None):
+        """Timeout (ms, 0 = none) for statements issued while handling `endpoint`"""
+        overrides = current_app.config.get('DB_STATEMENT_TIMEOUTS', {}) if has_app_context() else {}
+        return overrides.get(endpoint, self.settings['statement_timeout_ms'])
+
+    def _apply_statement_timeout(self, session, transaction, connection):
+        if connection.dialect.name != 'postgresql':
+            return
+        timeout = self.statement_timeout(request.endpoint if has_request_context() else None)
+        # Direct connections already carry the default from the startup options; behind PgBouncer
+        # every transaction sets its own, since the server connection underneath is shared
+        if timeout != self.settings['statement_timeout_ms'] or (self.pgbouncer and timeout):
+            connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+    def record_wait(self, elapsed):
+        wait_ms = elapsed * 1000
+        with self.lock:
+            self.waits += 1
+            self.wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if wait_ms >= self.slow_wait_ms:
+                self.slow_waits += 1
+        if has_request_context():
+            profile = g.get('query_profile')
+            if profile is not None:
+                profile.pool_wait += elapsed
+            if wait_ms >= self.slow_wait_ms and self.logger is not None:
+                self.logger.warning('Slow connection checkout (%.1f ms) on %s %s', wait_ms, request.method, request.path)
+
+    def record_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self.lock:
+            self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self.lock:
+            self.invalidations += 1
+
+    def capacity(self):
+        """Most connections this process can hold at once (None for pools without a limit)"""
+        pool = db.engine.pool
+        return pool.size() + max(pool._max_overflow, 0) if isinstance(pool, QueuePool) else None
+
+    def report(self):
+        """Current pool occupancy plus counters since startup (or the last reset)"""
+        pool = db.engine.pool
+        with self.lock:
+            data = {
+                'profile': self.settings['profile'],
+                'pgbouncer': self.pgbouncer,
+                'statementTimeoutMs': self.settings['statement_timeout_ms'],
+                'poolClass': type(pool).__name__,
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'avgWaitMs': round(self.wait_ms / self.waits, 2) if self.waits else 0.0,
+                'maxWaitMs': round(self.max_wait_ms, 2),
+                'slowWaits': self.slow_waits,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'size': pool.size(),
+                'maxOverflow': pool._max_overflow,
+                'checkedOut': pool.checkedout(),
+                'checkedIn': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+            })
+        return data
+
+    def reset(self):
+        with self.lock:
+            self.checkouts = self.connects = self.invalidations = self.timeouts = 0
+            self.waits = self.slow_waits = 0
+            self.wait_ms = self.max_wait_ms = 0.0
+
+
+pool_monitor = PoolMonitor()
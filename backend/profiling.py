@@ -0,0 +1,116 @@
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from backend.models import db
+
+
+class RequestProfile:
+    """Query count, time spent in the database and waiting for pooled connections for the current request"""
+    __slots__ = ('started', 'queries', 'db_time', 'pool_wait')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+
+
+class QueryProfiler:
+    """
+    Per-request SQL instrumentation: counts statements and DB time through cursor events,
+    logs statements slower than SLOW_QUERY_MS with their route, emits Server-Timing headers
+    and keeps per-route aggregates for /api/_debug/profile.
+    Nothing is registered unless QUERY_PROFILING is on, so a disabled profiler costs nothing.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_query_ms = 100.0
+        self.routes = {}  # "METHOD rule" -> [requests, queries, db_ms, total_ms, max_total_ms, max_queries]
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['query_profiler'] = self
+        self.enabled = app.config.get('QUERY_PROFILING', False)
+        if not self.enabled:
+            return
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', 100.0)
+        self.logger = app.logger
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+                event.listen(engine, 'handle_error', self._on_error)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        if not has_request_context():
+            return
+        profile = g.get('query_profile')
+        if profile is not None:
+            profile.queries += 1
+            profile.db_time += elapsed
+        if elapsed * 1000 >= self.slow_query_ms:
+            self.logger.warning('Slow query (%.1f ms) on %s %s: %s',
+                                elapsed * 1000, request.method, request.path, ' '.join(statement.split()))
+
+    def _on_error(self, context):
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    def _start_request(self):
+        g.query_profile = RequestProfile()
+
+    def _finish_request(self, response):
+        profile = g.get('query_profile')
+        if profile is None:
+            return response
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_time * 1000
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{profile.queries} queries"')
+        response.headers.add('Server-Timing', f'pool;dur={profile.pool_wait * 1000:.1f};desc="connection checkout"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+        if request.url_rule is not None:
+            key = f'{request.method} {request.url_rule.rule}'
+            with self.lock:
+                stats = self.routes.setdefault(key, [0, 0, 0.0, 0.0, 0.0, 0])
+                stats[0] += 1
+                stats[1] += profile.queries
+                stats[2] += db_ms
+                stats[3] += total_ms
+                stats[4] = max(stats[4], total_ms)
+                stats[5] = max(stats[5], profile.queries)
+        return response
+
+    def report(self):
+        """Per-route aggregates for this worker process, slowest total time first"""
+        with self.lock:
+            items = [(key, list(stats)) for key, stats in self.routes.items()]
+        rows = [{
+            'route': key,
+            'requests': n,
+            'avgQueries': round(queries / n, 2),
+            'maxQueries': max_queries,
+            'avgDbMs': round(db_ms / n, 2),
+            'avgTotalMs': round(total_ms / n, 2),
+            'maxTotalMs': round(max_ms, 2),
+        } for key, (n, queries, db_ms, total_ms, max_ms, max_queries) in items]
+        return sorted(rows, key=lambda r: r['avgTotalMs'] * r['requests'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+
+query_profiler = QueryProfiler()
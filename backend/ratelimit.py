@@ -0,0 +1,125 @@
+import re
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(spec):
+    """'10/minute' -> (10, 60)"""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(second|minute|hour|day)\s*', spec or '')
+    if not match:
+        raise ValueError(f'Invalid rate limit: {spec!r} (expected e.g. "10/minute").')
+    return int(match.group(1)), PERIODS[match.group(2)]
+
+
+class MemoryCounter:
+    """Fixed-window counters for this process only (each gunicorn worker counts separately)"""
+
+    def __init__(self):
+        self.windows = {}  # key -> (window end, count)
+        self.lock = threading.Lock()
+
+    def hit(self, key, period):
+        now = time.time()
+        with self.lock:
+            end, count = self.windows.get(key, (0, 0))
+            if end <= now:
+                end, count = (now // period + 1) * period, 0
+                if len(self.windows) > 10000:
+                    self.windows = {k: v for k, v in self.windows.items() if v[0] > now}
+            self.windows[key] = (end, count + 1)
+            return count + 1, end - now
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+
+class RedisCounter:
+    """Fixed-window counters shared by every process through INCR/EXPIRE (same client protocol as RedisCache)"""
+
+    def __init__(self, client, prefix='procook:rl:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed when RATE_LIMIT_STORAGE=redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def hit(self, key, period):
+        now = time.time()
+        window = int(now // period)
+        redis_key = f'{self.prefix}{key}:{window}'
+        count = self.client.incr(redis_key)
+        if count == 1:
+            self.client.expire(redis_key, period)
+        return count, (window + 1) * period - now
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class RateLimiter:
+    """
+    Per-endpoint request limits configured in RATE_LIMITS (name -> '10/minute').
+    Views opt in with @rate_limiter.limit(name, key_func); requests over the limit get a 429 with Retry-After.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.counter = MemoryCounter()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        if app.config.get('RATE_LIMIT_STORAGE', 'memory') == 'redis':
+            self.counter = RedisCounter.from_url(app.config['CACHE_REDIS_URL'])
+        else:
+            self.counter = MemoryCounter()
+        for spec in app.config.get('RATE_LIMITS', {}).values():
+            parse_limit(spec)  # fail at startup, not on the first request
+        app.extensions['rate_limiter'] = self
+
+    def limit(self, name, key_func=lambda: request.remote_addr):
+        """Decorator: counts requests per key_func() value; an empty key is not limited"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                spec = current_app.config.get('RATE_LIMITS', {}).get(name)
+                key = key_func() if self.enabled and spec else None
+                if key:
+                    allowed, period = parse_limit(spec)
+                    try:
+                        count, reset_in = self.counter.hit(f'{name}:{key}', period)
+                    except Exception:
+                        current_app.logger.exception('Rate limit check failed for %s', name)
+                        return view(*args, **kwargs)  # fail open: an unreachable counter must not block logins
+                    if count > allowed:
+                        response = jsonify({'success': False, 'message': 'Too many attempts. Please try again later.'})
+                        response.status_code = 429
+                        response.headers['Retry-After'] = str(max(1, int(reset_in + 0.999)))
+                        return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def request_email():
+    """
+    Rate-limit key for auth forms: the submitted email address from this client address, so guessing
+    from one address is slowed without letting anyone else lock the account owner out
+    """
+    data = request.get_json(silent=True) or {}
+    email = data.get('email')
+    email = email.strip().lower() if isinstance(email, str) else None
+    return f'{email}|{request.remote_addr}' if email else None
+
+
+rate_limiter = RateLimiter()
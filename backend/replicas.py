@@ -0,0 +1,222 @@
+"""
+Read-replica routing: db.session sends the statements of read-only requests (GET/HEAD) to a healthy
+replica from REPLICA_DATABASE_URLS and everything else to the primary. A client whose request
+committed a write is pinned to the primary for REPLICA_STICKY_SECONDS, so it reads its own writes.
+"""
+import random
+import threading
+import time
+from functools import partial
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+PRIMARY_COOKIE = 'procook_primary'
+# Seconds of replay lag; 0 when everything received has been replayed (an idle primary is not lag)
+POSTGRES_LAG_SQL = text(
+    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class RoutingSession(Session):
+    """db.session: reads go where replica_router decides; writes, and everything after one, go to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None:
+                # Later reads in this session must see the write; a commit pins the client (see _on_commit)
+                self.info['primary'] = self.info['wrote'] = True
+            elif not self.info.get('primary'):
+                engine = replica_router.read_engine()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _on_commit(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        g.wrote_primary = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _on_rollback(session):
+    session.info.pop('wrote', None)
+
+
+class Replica:
+    """Health of one replica bind, as last seen by this process"""
+
+    def __init__(self, name):
+        self.name = name
+        self.healthy = False
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self.listening = False
+        self.lock = threading.Lock()
+
+
+class ReplicaRouter:
+    """
+    Registers REPLICA_DATABASE_URLS as SQLALCHEMY_BINDS (init_app must run before db.init_app) and
+    picks one healthy replica per read-only request. Replicas are probed at most every
+    REPLICA_CHECK_INTERVAL seconds and skipped while unreachable or lagging by more than
+    REPLICA_MAX_LAG_SECONDS; with none available, reads fall back to the primary. Only a process's
+    first probe of a replica runs in a request, bounded by REPLICA_CONNECT_TIMEOUT; later ones run in
+    a background thread while requests go by the previous result.
+    """
+
+    def __init__(self, app=None):
+        self.replicas = []
+        self.sticky_seconds = 10
+        self.max_lag = 5.0
+        self.check_interval = 10.0
+        self.connect_timeout = 2
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10)
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', 5.0)
+        self.check_interval = app.config.get('REPLICA_CHECK_INTERVAL', 10.0)
+        self.connect_timeout = app.config.get('REPLICA_CONNECT_TIMEOUT', 2)
+        if app.config.get('REPLICA_DATABASE_URLS') and self.sticky_seconds <= self.max_lag:
+            raise ValueError('REPLICA_STICKY_SECONDS must exceed REPLICA_MAX_LAG_SECONDS, '
+                             'or clients may not see their own writes.')
+
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        self.replicas = []
+        for i, url in enumerate(app.config.get('REPLICA_DATABASE_URLS') or []):
+            replica = Replica(f'replica_{i}')
+            if make_url(url).get_backend_name() == 'postgresql' and self.connect_timeout:
+                # A replica whose host stopped answering fails fast instead of holding up the request
+                binds[replica.name] = {'url': url, 'connect_args': {'connect_timeout': int(self.connect_timeout)}}
+            else:
+                binds[replica.name] = url
+            self.replicas.append(replica)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        if self.replicas:
+            app.after_request(self._pin_writer)
+        app.extensions['replica_router'] = self
+
+    def read_engine(self):
+        """Replica engine for the current request's reads, or None for the primary"""
+        if not self.replicas or not has_request_context():
+            return None
+        if 'read_replica' not in g:
+            reads_only = request.method in READ_METHODS or getattr(
+                current_app.view_functions.get(request.endpoint), 'replica_reads', False)
+            g.read_replica = self._choose() if reads_only and not self.pinned() else None
+        replica = g.read_replica
+        return self._engine(replica) if replica is not None else None
+
+    @staticmethod
+    def reads_only(view):
+        """Marks a view whose method is not GET (e.g. a POST lookup) as read-only, so replicas may serve it"""
+        view.replica_reads = True
+        return view
+
+    def used_replica(self):
+        """True when the current request's reads were served by a replica"""
+        return has_request_context() and g.get('read_replica') is not None
+
+    def pinned(self):
+        """True while the current client is pinned to the primary after one of its own writes"""
+        if not self.replicas or not has_request_context():
+            return False
+        # The cookie carries its own deadline, so clients that keep expired cookies are not pinned forever
+        try:
+            return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def check(self, replica):
+        """Probes a replica: reachable and at most REPLICA_MAX_LAG_SECONDS behind; returns whether it is usable"""
+        engine = self._engine(replica)
+        if not replica.listening:
+            event.listen(engine, 'handle_error', partial(self._on_error, replica))
+            replica.listening = True
+        was_healthy = replica.healthy if replica.checked_at is not None else True  # first probe: report failures only
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    if self.connect_timeout:
+                        conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(self.connect_timeout * 1000)}')
+                    replica.lag = float(conn.execute(POSTGRES_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text('SELECT 1'))
+                    replica.lag = 0.0
+            replica.error = None
+            replica.healthy = replica.lag <= self.max_lag
+        except Exception as e:
+            replica.healthy, replica.lag, replica.error = False, None, str(e).splitlines()[0]
+        replica.checked_at = time.monotonic()
+        if replica.healthy != was_healthy:
+            current_app.logger.warning('Replica %s is %s (lag %s, %s)', replica.name,
+                                       'back in rotation' if replica.healthy else 'out of rotation',
+                                       replica.lag, replica.error or 'reachable')
+        return replica.healthy
+
+    def status(self):
+        """Per-replica health as last checked by this process"""
+        now = time.monotonic()
+        return [{
+            'name': replica.name,
+            'healthy': replica.healthy,
+            'lagSeconds': None if replica.lag is None else round(replica.lag, 3),
+            'error': replica.error,
+            'checkedSecondsAgo': None if replica.checked_at is None else round(now - replica.checked_at, 1),
+        } for replica in self.replicas]
+
+    def _choose(self):
+        healthy = [replica for replica in self.replicas if self._is_healthy(replica)]
+        return random.choice(healthy) if healthy else None
+
+    def _is_healthy(self, replica):
+        due = replica.checked_at is None or time.monotonic() - replica.checked_at >= self.check_interval
+        # One probe per replica and process at a time; meanwhile requests go by the last result
+        if due and replica.lock.acquire(blocking=False):
+            if replica.checked_at is None:
+                try:
+                    return self.check(replica)  # nothing to go by yet
+                finally:
+                    replica.lock.release()
+            threading.Thread(target=self._check_in_background, args=(current_app._get_current_object(), replica),
+                             name=f'probe-{replica.name}', daemon=True).start()
+        return replica.healthy
+
+    def _check_in_background(self, app, replica):
+        try:
+            with app.app_context():
+                self.check(replica)
+        except Exception:
+            app.logger.exception('Probing replica %s failed', replica.name)
+        finally:
+            replica.lock.release()
+
+    def _engine(self, replica):
+        return current_app.extensions['sqlalchemy'].engines[replica.name]
+
+    def _on_error(self, replica, context):
+        # A dropped replica connection takes it out of rotation until the next probe
+        if context.is_disconnect:
+            replica.healthy = False
+            replica.error = 'connection lost'
+            replica.checked_at = time.monotonic()
+
+    def _pin_writer(self, response):
+        # Only requests that committed a write: read-only POSTs such as /api/recipes/state stay unpinned
+        if g.get('wrote_primary') and response.status_code < 400:
+            pinned_until = f'{time.time() + self.sticky_seconds:.3f}'
+            response.set_cookie(PRIMARY_COOKIE, pinned_until, max_age=self.sticky_seconds, path='/', httponly=True,
+                                secure=current_app.config.get('SESSION_COOKIE_SECURE', False),
+                                samesite=current_app.config.get('SESSION_COOKIE_SAMESITE'))
+        return response
+
+
+replica_router = ReplicaRouter()
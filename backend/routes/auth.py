@@ -1,20 +1,43 @@
 import re
 from flask import Blueprint, request, jsonify, session
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash
 from backend.models import db, User, Recipe, Comment, Rating, saved_recipes
+from backend.cache import response_cache, user_tag
+from backend.identity import identity_cache
+from backend.sessions import revoke_user_sessions
+from backend.passwords import password_hasher, HasherBusy
+from backend.ratelimit import rate_limiter, request_email
+from backend.streaming import wants_stream, stream_query
+from backend.serializers import (use_compact_serializer, recipe_rows_select, serialize_recipe_rows, json_response,
+                                 parse_fields, recipe_load_options, serialize_recipe, InvalidFields)
 
 auth_bp = Blueprint('auth', __name__)
 
 
 # CRUD READ: retrieves all recipes created by current user
+# ?fields= selects the output keys (default: the card summary; add 'ingredients' to include them)
 @auth_bp.route('/my-recipes', methods=['GET'])
 @login_required
 def my_recipes():
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except InvalidFields as e:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'fields': [str(e)]}}), 422
+
         # OOP: uses foreign key relationship to filter recipes by user_id
-        recipes = Recipe.query.filter_by(user_id=current_user.id).order_by(Recipe.created_at.desc()).all()
-        return jsonify({'success': True, 'data': [r.to_dict(include_ingredients=True) for r in recipes], 'count': len(recipes)})
+        query = (Recipe.query.options(*recipe_load_options(fields))
+                 .filter_by(user_id=current_user.id).order_by(Recipe.created_at.desc()))
+        if wants_stream():
+            return stream_query(query, lambda r: serialize_recipe(r, fields))
+        if use_compact_serializer():
+            rows = db.session.execute(
+                recipe_rows_select(fields).filter(Recipe.user_id == current_user.id).order_by(Recipe.created_at.desc())
+            ).all()
+            data = serialize_recipe_rows(rows, fields)
+        else:
+            data = [serialize_recipe(r, fields) for r in query.all()]
+        return json_response({'success': True, 'data': data, 'count': len(data)})
     except Exception as e:
         return jsonify({'success': False, 'message': 'Failed to fetch your recipes.'}), 500
 
@@ -40,6 +63,7 @@ def validate_password(password):
 
 # CRUD CREATE: inserts new user into database
 @auth_bp.route('/register', methods=['POST'])
+@rate_limiter.limit('register')
 def register():
     try:
         data = request.get_json()
@@ -79,6 +103,9 @@ def register():
 
         login_user(user, remember=True)
         return jsonify({'success': True, 'message': 'Registration successful!', 'data': {'user': user.to_dict()}}), 201
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Server is busy. Please try again.'}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': 'Registration failed. Please try again.'}), 500
@@ -86,6 +113,8 @@ def register():
 
 # CRUD READ: authenticates user and creates session
 @auth_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login')
+@rate_limiter.limit('login_email', request_email)
 def login():
     try:
         data = request.get_json()
@@ -97,11 +126,22 @@ def login():
 
         # CRUD READ: queries user by email
         user = User.query.filter_by(email=email).first()
-        if not user or not user.check_password(password):  # OOP Encapsulation: verifies password
+        if not user:
+            password_hasher.dummy_verify(password)  # same cost as a real check, so timing does not reveal accounts
             return jsonify({'success': False, 'message': 'Invalid email or password.'}), 401
+        if not user.check_password(password):  # OOP Encapsulation: verifies password
+            return jsonify({'success': False, 'message': 'Invalid email or password.'}), 401
+
+        # Upgrades hashes made with an older algorithm/cost while the plain password is at hand
+        if password_hasher.needs_rehash(user.password):
+            user.set_password(password)
+            db.session.commit()
 
         login_user(user, remember=True)
         return jsonify({'success': True, 'message': 'Login successful!', 'data': {'user': user.to_dict()}})
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Server is busy. Please try again.'}), 503
     except Exception as e:
         return jsonify({'success': False, 'message': 'Login failed. Please try again.'}), 500
 
@@ -134,7 +174,8 @@ def profile():
     try:
         # CRUD READ: counts related records through relationships
         recipes_count = Recipe.query.filter_by(user_id=current_user.id).count()
-        saved_count = current_user.saved.count()  # OOP: uses many-to-many relationship
+        saved_count = (db.session.query(db.func.count()).select_from(saved_recipes)
+                       .filter(saved_recipes.c.user_id == current_user.id).scalar())
         comments_count = Comment.query.filter_by(user_id=current_user.id).count()
         ratings_count = Rating.query.filter_by(user_id=current_user.id).count()
 
@@ -172,9 +213,12 @@ def update_profile():
             return jsonify({'success': False, 'message': 'Validation failed.', 'errors': errors}), 422
 
         # CRUD UPDATE: modifies User object fields
-        current_user.name = name
+        user = current_user.load()
+        user.name = name
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Profile updated successfully.', 'data': {'user': current_user.to_dict()}})
+        identity_cache.remember(user)
+        response_cache.invalidate(user_tag(user.id))  # author name is embedded in cached recipes/comments
+        return jsonify({'success': True, 'message': 'Profile updated successfully.', 'data': {'user': user.to_dict()}})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': 'Failed to update profile.'}), 500
@@ -191,7 +235,8 @@ def change_password():
         password_confirmation = data.get('password_confirmation', '')
 
         # OOP Encapsulation: verifies current password
-        if not current_user.check_password(current_password):
+        user = current_user.load()
+        if not user.check_password(current_password):
             return jsonify({'success': False, 'message': 'Current password is incorrect.'}), 422
 
         is_valid, error_msg = validate_password(new_password)
@@ -202,9 +247,16 @@ def change_password():
             return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'password_confirmation': ['Passwords do not match.']}}), 422
 
         # CRUD UPDATE: modifies password using OOP encapsulation
-        current_user.set_password(new_password)
+        user.set_password(new_password)
+        user.rotate_session_stamp()
         db.session.commit()
+        # Signs out every other device: their sessions are deleted and their remember cookies carry the old stamp
+        revoke_user_sessions(user.id)
+        login_user(user, remember=True)
         return jsonify({'success': True, 'message': 'Password changed successfully.'})
+    except HasherBusy:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Server is busy. Please try again.'}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': 'Failed to change password.'}), 500
@@ -215,9 +267,17 @@ def change_password():
 @login_required
 def delete_account():
     try:
-        # CRUD DELETE: removes user (CASCADE deletes related comments and ratings)
-        db.session.delete(current_user)
+        user_id = current_user.id
+        # CRUD DELETE: set-based statements instead of the ORM loading related rows. Content is detached
+        # in the same transaction (as ON DELETE SET NULL would), also where foreign keys are not
+        # enforced (SQLite), so a reused user id never inherits it
+        for table in (Recipe.__table__, Comment.__table__, Rating.__table__):
+            db.session.execute(db.update(table).where(table.c.user_id == user_id).values(user_id=None))
+        db.session.execute(db.delete(saved_recipes).where(saved_recipes.c.user_id == user_id))
+        db.session.execute(db.delete(User).where(User.id == user_id))
         db.session.commit()
+        response_cache.invalidate(user_tag(user_id))
+        revoke_user_sessions(user_id)
         logout_user()
         return jsonify({'success': True, 'message': 'Account deleted successfully.'})
     except Exception as e:
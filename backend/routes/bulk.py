@@ -0,0 +1,42 @@
+import io
+from itertools import islice
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from backend.bulk import RecipeImporter, iter_records
+from backend.cache import response_cache, RECIPE_LIST_TAG, user_tag
+
+bulk_bp = Blueprint('bulk', __name__)
+
+CSV_MIMETYPES = ('text/csv', 'application/csv')
+
+
+# CRUD CREATE: imports many recipes for the current user from an NDJSON or CSV request body
+@bulk_bp.route('/bulk', methods=['POST'])
+@login_required
+def import_recipes():
+    """Streams the request body through the batch importer; each batch commits on its own"""
+    try:
+        request.max_content_length = current_app.config['BULK_IMPORT_MAX_BYTES']
+        fmt = 'csv' if request.mimetype in CSV_MIMETYPES or request.args.get('format') == 'csv' else 'jsonl'
+        max_records = current_app.config['BULK_IMPORT_MAX_RECORDS']
+
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace',
+                                  newline='' if fmt == 'csv' else None)
+        records = iter_records(stream, fmt)
+        importer = RecipeImporter(current_user.id, batch_size=current_app.config['BULK_IMPORT_BATCH_SIZE'])
+        importer.run(islice(records, max_records))
+        # Anything past the cap is left unread and reported, not silently dropped
+        truncated = next(records, None) is not None
+        if importer.imported:
+            response_cache.invalidate(RECIPE_LIST_TAG, user_tag(current_user.id))
+
+        summary = dict(importer.summary(), truncated=truncated)
+        if not importer.imported and importer.failed:
+            return jsonify({'success': False, 'message': 'No recipes were imported', **summary}), 422
+        message = f'Imported {importer.imported} recipe(s)'
+        if truncated:
+            message += f'; stopped after {max_records} records (use flask procook import for larger files)'
+        return jsonify({'success': True, 'message': message, **summary}), 201
+    except Exception:
+        current_app.logger.exception('Bulk import failed for user %s', current_user.id)
+        return jsonify({'success': False, 'message': 'Failed to import recipes. Please try again.'}), 500
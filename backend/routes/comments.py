@@ -1,26 +1,100 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from backend.models import db, Comment, Recipe
+from backend.models import db, Comment, Recipe, User
+from backend.cache import response_cache, add_cache_tags, comments_tag, user_tag
+from backend.conditional import conditional, comments_version
+from backend.pagination import keyset_page, parse_page_size, InvalidCursor
+
+COMMENT_COLUMNS = (Comment.id, Comment.recipe_id, Comment.user_id, Comment.parent_id,
+                   Comment.comment, Comment.created_at, Comment.updated_at, User.name.label('user_name'))
+MAX_THREAD_DEPTH = 100
+
+
+def comment_row_to_dict(row):
+    """Serializes a flat comment row (same shape as Comment.to_dict) without touching ORM relationships"""
+    return {
+        'id': row.id,
+        'recipe_id': row.recipe_id,
+        'user_id': row.user_id,
+        'parent_id': row.parent_id,
+        'comment': row.comment,
+        'created_at': row.created_at.isoformat() + 'Z' if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() + 'Z' if row.updated_at else None,
+        'user': {'id': row.user_id, 'name': row.user_name} if row.user_name is not None else None,
+        'replies': [],
+    }
+
+
+def load_comment_page(recipe_id, cursor=None, limit=None):
+    """
+    Loads one keyset page of top-level comments plus every nested reply beneath them.
+    Two queries total: the root page, then a recursive CTE for the whole reply tree; authors come
+    from the same joins, and the tree is assembled in memory (replies oldest first at every level).
+    """
+    roots_query = (db.session.query(*COMMENT_COLUMNS)
+                   .outerjoin(User, Comment.user_id == User.id)
+                   .filter(Comment.recipe_id == recipe_id, Comment.parent_id.is_(None)))
+    roots, next_cursor = keyset_page(roots_query, Comment.created_at, Comment.id, cursor=cursor, limit=limit)
+    if not roots:
+        return [], next_cursor
+
+    thread = (db.select(Comment.id, db.literal(1).label('depth'))
+              .where(Comment.parent_id.in_([r.id for r in roots]))
+              .cte('thread', recursive=True))
+    thread = thread.union_all(
+        db.select(Comment.id, (thread.c.depth + 1).label('depth'))
+        .join(thread, Comment.parent_id == thread.c.id)
+        .where(thread.c.depth < MAX_THREAD_DEPTH)
+    )
+    replies = db.session.execute(
+        db.select(*COMMENT_COLUMNS)
+        .join(thread, Comment.id == thread.c.id)
+        .outerjoin(User, Comment.user_id == User.id)
+        .order_by(Comment.created_at.asc(), Comment.id.asc())
+    ).all()
+
+    nodes = {r.id: comment_row_to_dict(r) for r in roots}
+    for row in replies:
+        nodes[row.id] = comment_row_to_dict(row)
+    for row in replies:
+        parent = nodes.get(row.parent_id)
+        if parent is not None:
+            parent['replies'].append(nodes[row.id])
+
+    return [nodes[r.id] for r in roots], next_cursor
+
+
+def iter_comment_authors(comments):
+    """Yields author ids across a serialized comment tree"""
+    stack = list(comments)
+    while stack:
+        node = stack.pop()
+        if node['user_id']:
+            yield node['user_id']
+        stack.extend(node['replies'])
 
 comments_bp = Blueprint('comments', __name__)
 
 
-# CRUD READ: fetches all parent comments with nested replies for a recipe
+# CRUD READ: fetches a page of parent comments with their full nested reply trees
 @comments_bp.route('/<int:recipe_id>/comments', methods=['GET'])
+@conditional(comments_version)
+@response_cache.cached()
 def index(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        if not Recipe.exists(recipe_id):
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
-        # OOP: queries parent comments and uses self-referential relationship to load replies
-        comments = Comment.query.filter_by(
-            recipe_id=recipe_id,
-            parent_id=None
-        ).order_by(Comment.created_at.desc()).all()
+        try:
+            limit = parse_page_size(request.args.get('limit'), default=50)
+            data, next_cursor = load_comment_page(recipe_id, cursor=request.args.get('cursor'), limit=limit)
+        except InvalidCursor:
+            return jsonify({'success': False, 'message': 'Invalid cursor.'}), 422
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid filter value.'}), 422
 
-        data = [c.to_dict(include_replies=True) for c in comments]
-        return jsonify({'success': True, 'data': data, 'count': len(data)})
+        add_cache_tags(comments_tag(recipe_id), *{user_tag(uid) for uid in iter_comment_authors(data)})
+        return jsonify({'success': True, 'data': data, 'count': len(data), 'next_cursor': next_cursor})
     except Exception as e:
         return jsonify({'success': False, 'message': 'Failed to fetch comments.'}), 500
 
@@ -30,8 +104,7 @@ def index(recipe_id):
 @login_required
 def store(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        if not Recipe.exists(recipe_id):
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
         data = request.get_json()
@@ -62,6 +135,7 @@ def store(recipe_id):
         )
         db.session.add(comment)
         db.session.commit()
+        response_cache.invalidate(comments_tag(recipe_id))
         return jsonify({'success': True, 'message': 'Comment added successfully.', 'data': comment.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
@@ -90,6 +164,7 @@ def update(recipe_id, comment_id):
         # CRUD UPDATE: modifies comment field
         comment.comment = comment_text
         db.session.commit()
+        response_cache.invalidate(comments_tag(recipe_id))
         return jsonify({'success': True, 'message': 'Comment updated successfully.', 'data': comment.to_dict()})
     except Exception as e:
         db.session.rollback()
@@ -110,6 +185,7 @@ def destroy(recipe_id, comment_id):
         # CRUD DELETE: removes comment (CASCADE automatically deletes nested replies)
         db.session.delete(comment)
         db.session.commit()
+        response_cache.invalidate(comments_tag(recipe_id))
         return jsonify({'success': True, 'message': 'Comment deleted successfully.'})
     except Exception as e:
         db.session.rollback()
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from backend.models import db, Rating, Recipe
+from backend.models import db, Rating, Recipe, average_from_aggregates
+from backend.cache import response_cache, add_cache_tags, recipe_tag
+from backend.conditional import conditional, recipe_rating_version
 
 ratings_bp = Blueprint('ratings', __name__)
 
@@ -10,7 +12,7 @@ ratings_bp = Blueprint('ratings', __name__)
 @login_required
 def store(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
+        recipe = Recipe.rating_summary(recipe_id)
         if not recipe:
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
         if recipe.user_id == current_user.id:
@@ -26,26 +28,27 @@ def store(recipe_id):
             return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'rating': ['Rating must be between 1 and 5.']}}), 422
 
         # CRUD CREATE/UPDATE: updates existing rating or creates new one
-        rating = Rating.query.filter_by(recipe_id=recipe_id, user_id=current_user.id).first()
+        # Aggregates on the recipe row are shifted in the same transaction as the rating write
+        rating = Rating.query.filter_by(recipe_id=recipe_id, user_id=current_user.id).with_for_update().first()
         if rating:
+            Recipe.apply_rating_delta(recipe_id, rating_value - rating.rating)
             rating.rating = rating_value
         else:
             rating = Rating(recipe_id=recipe_id, user_id=current_user.id, rating=rating_value)
             db.session.add(rating)
+            Recipe.apply_rating_delta(recipe_id, rating_value, 1)
 
         db.session.commit()
-
-        # CRUD READ: calculates average rating using SQL aggregate function
-        avg = db.session.query(db.func.avg(Rating.rating)).filter(Rating.recipe_id == recipe_id).scalar()
-        count = Rating.query.filter_by(recipe_id=recipe_id).count()
+        response_cache.invalidate(recipe_tag(recipe_id))
+        recipe = Recipe.rating_summary(recipe_id)  # aggregates after this rating was applied
 
         return jsonify({
             'success': True,
             'message': 'Rating submitted successfully.',
             'data': {
                 'rating': rating.to_dict(),
-                'averageRating': round(float(avg), 1) if avg else 0,
-                'ratingsCount': count
+                'averageRating': average_from_aggregates(recipe.ratings_sum, recipe.ratings_count),
+                'ratingsCount': recipe.ratings_count
             }
         })
     except Exception as e:
@@ -58,22 +61,19 @@ def store(recipe_id):
 @login_required
 def show(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
+        recipe = Recipe.rating_summary(recipe_id)
         if not recipe:
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
         user_rating = Rating.query.filter_by(recipe_id=recipe_id, user_id=current_user.id).first()
-        
-        # CRUD READ: calculates average using SQL aggregate function
-        avg = db.session.query(db.func.avg(Rating.rating)).filter(Rating.recipe_id == recipe_id).scalar()
-        count = Rating.query.filter_by(recipe_id=recipe_id).count()
 
+        # CRUD READ: reads denormalized aggregates already loaded with the recipe row
         return jsonify({
             'success': True,
             'data': {
                 'userRating': user_rating.rating if user_rating else None,
-                'averageRating': round(float(avg), 1) if avg else 0,
-                'ratingsCount': count
+                'averageRating': average_from_aggregates(recipe.ratings_sum, recipe.ratings_count),
+                'ratingsCount': recipe.ratings_count
             }
         })
     except Exception as e:
@@ -82,21 +82,21 @@ def show(recipe_id):
 
 # CRUD READ: retrieves public rating statistics for a recipe (no authentication required)
 @ratings_bp.route('/<int:recipe_id>/rating/public', methods=['GET'])
+@conditional(recipe_rating_version, cache_control='public, no-cache')
+@response_cache.cached()
 def show_public(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
+        recipe = Recipe.rating_summary(recipe_id)
         if not recipe:
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
-        # CRUD READ: calculates average using SQL aggregate function
-        avg = db.session.query(db.func.avg(Rating.rating)).filter(Rating.recipe_id == recipe_id).scalar()
-        count = Rating.query.filter_by(recipe_id=recipe_id).count()
-
+        # CRUD READ: reads denormalized aggregates already loaded with the recipe row
+        add_cache_tags(recipe_tag(recipe_id))
         return jsonify({
             'success': True,
             'data': {
-                'averageRating': round(float(avg), 1) if avg else 0,
-                'ratingsCount': count,
+                'averageRating': average_from_aggregates(recipe.ratings_sum, recipe.ratings_count),
+                'ratingsCount': recipe.ratings_count,
                 'recipeOwnerId': recipe.user_id
             }
         })
@@ -109,16 +109,17 @@ def show_public(recipe_id):
 @login_required
 def destroy(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        if not Recipe.exists(recipe_id):
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
-        rating = Rating.query.filter_by(recipe_id=recipe_id, user_id=current_user.id).first()
+        rating = Rating.query.filter_by(recipe_id=recipe_id, user_id=current_user.id).with_for_update().first()
         if not rating:
             return jsonify({'success': False, 'message': 'Rating not found.'}), 404
 
+        Recipe.apply_rating_delta(recipe_id, -rating.rating, -1)
         db.session.delete(rating)
         db.session.commit()
+        response_cache.invalidate(recipe_tag(recipe_id))
         return jsonify({'success': True, 'message': 'Rating deleted successfully.'})
     except Exception as e:
         db.session.rollback()
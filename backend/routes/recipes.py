@@ -1,10 +1,18 @@
-import os
 import json
-import uuid
-import time
-from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime
+from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from backend.models import db, Recipe, Ingredient
+from backend.models import db, Recipe, Ingredient, Comment, Rating, saved_recipes as saved_recipes_table, average_from_aggregates
+from backend.pagination import keyset_page, keyset_filter, parse_page_size, InvalidCursor
+from backend.search import recipe_search
+from backend.cache import response_cache, add_cache_tags, RECIPE_LIST_TAG, recipe_tag, comments_tag, user_tag
+from backend.conditional import conditional, recipe_version
+from backend.streaming import wants_stream, stream_query
+from backend.serializers import (use_compact_serializer, recipe_rows_select, serialize_recipe_rows, json_response,
+                                 parse_fields, recipe_load_options, serialize_recipe, InvalidFields)
+from backend.images import image_pipeline
+from backend.uploads import upload_store
+from backend.replicas import replica_router
 
 recipes_bp = Blueprint('recipes', __name__)
 
@@ -88,46 +96,197 @@ def validate_recipe_data(data, files=None):
 
 
 def save_image(file):
-    """Saves uploaded image file and returns relative path for database storage"""
-    upload_dir = current_app.config['UPLOAD_FOLDER']
-    recipes_dir = os.path.join(upload_dir, 'recipes')
-    os.makedirs(recipes_dir, exist_ok=True)
-    ext = file.filename.rsplit('.', 1)[-1].lower()
-    filename = f"{int(time.time())}_{uuid.uuid4().hex}.{ext}"
-    filepath = os.path.join(recipes_dir, filename)
-    file.save(filepath)
-    return f"recipes/{filename}"
-
-
-# CRUD READ: retrieves all recipes from database with author relationship
+    """Saves uploaded image file (content-addressed, deduplicated) and returns relative path for database storage"""
+    return upload_store.save(file)
+
+
+def normalize_ingredients(ingredients_raw):
+    """Turns validated ingredient input into column dicts in submitted order (id kept for update matching)"""
+    rows = []
+    for i, ing in enumerate(ingredients_raw):
+        try:
+            ingredient_id = int(ing['id']) if ing.get('id') not in (None, '') else None
+        except (TypeError, ValueError):
+            ingredient_id = None
+        rows.append({
+            'id': ingredient_id,
+            'name': ing['name'].strip(),
+            'measurement': ing['measurement'].strip(),
+            'substitution_option': (ing.get('substitution_option') or '').strip() or None,
+            'allergen_info': (ing.get('allergen_info') or '').strip() or None,
+            'order': i + 1,
+        })
+    return rows
+
+
+def load_recipe_detail(recipe_id):
+    """CRUD READ: recipe with author and ordered ingredients (one extra SELECT ... IN for the ingredients)"""
+    return (Recipe.query
+            .options(db.joinedload(Recipe.user), db.selectinload(Recipe.ingredients))
+            .populate_existing()
+            .filter(Recipe.id == recipe_id)
+            .first())
+
+
+def apply_recipe_filters(query, args):
+    """Applies server-side list filters; raises ValueError on malformed numeric values"""
+    cuisine_type = (args.get('cuisine_type') or '').strip()
+    if cuisine_type:
+        query = query.filter(Recipe.cuisine_type == cuisine_type)
+
+    category = (args.get('category') or '').strip()
+    if category:
+        query = query.filter(Recipe.category == category)
+
+    user_id = args.get('user_id')
+    if user_id:
+        query = query.filter(Recipe.user_id == int(user_id))
+
+    min_total_time = args.get('min_total_time')
+    if min_total_time:
+        query = query.filter(Recipe.total_time >= int(min_total_time))
+
+    max_total_time = args.get('max_total_time')
+    if max_total_time:
+        query = query.filter(Recipe.total_time <= int(max_total_time))
+
+    return query
+
+
+# CRUD READ: retrieves one keyset page of recipes (newest first) with author relationship
+# ?fields= selects the output keys (default: the card summary, without preparation_notes)
 @recipes_bp.route('', methods=['GET'])
+@response_cache.cached(unless=wants_stream)
 def index():
     try:
-        query = Recipe.query.options(db.joinedload(Recipe.user))
-        limit = request.args.get('limit')
-        if limit:
-            limit = min(int(limit), 100)
-            query = query.limit(limit)
-        recipes = query.order_by(Recipe.created_at.desc()).all()
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            limit = parse_page_size(request.args.get('limit'))
+            query = apply_recipe_filters(Recipe.query.options(*recipe_load_options(fields)), request.args)
+            if wants_stream():
+                # Export mode: every matching recipe after the optional cursor, streamed row by row
+                if request.args.get('cursor'):
+                    query = keyset_filter(query, Recipe.created_at, Recipe.id, request.args['cursor'])
+                return stream_query(query.order_by(Recipe.created_at.desc(), Recipe.id.desc()),
+                                    lambda r: serialize_recipe(r, fields))
+            if use_compact_serializer():
+                # Compact engine: Core rows straight to dicts, same values as Recipe.to_dict
+                rows, next_cursor = keyset_page(apply_recipe_filters(recipe_rows_select(fields), request.args),
+                                                Recipe.created_at, Recipe.id,
+                                                cursor=request.args.get('cursor'), limit=limit)
+                data = serialize_recipe_rows(rows, fields)
+            else:
+                recipes, next_cursor = keyset_page(query, Recipe.created_at, Recipe.id,
+                                                   cursor=request.args.get('cursor'), limit=limit)
+                data = [serialize_recipe(r, fields) for r in recipes]
+        except InvalidFields as e:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'fields': [str(e)]}}), 422
+        except InvalidCursor:
+            return jsonify({'success': False, 'message': 'Invalid cursor.'}), 422
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid filter value.'}), 422
+
+        add_cache_tags(RECIPE_LIST_TAG, *(recipe_tag(r['id']) for r in data),
+                       *(user_tag(r['user']['id']) for r in data if r.get('user')))
+        return json_response({
+            'success': True,
+            'data': data,
+            'count': len(data),
+            'next_cursor': next_cursor,
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to fetch recipes.'}), 500
+
+
+# CRUD READ: ranked full-text search over title, description, ingredients and instructions
+@recipes_bp.route('/search', methods=['GET'])
+def search():
+    try:
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'q': ['Search query is required.']}}), 422
+        if len(q) > 200:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'q': ['Search query cannot exceed 200 characters.']}}), 422
+
+        try:
+            limit = parse_page_size(request.args.get('limit'))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid filter value.'}), 422
+
+        recipes = recipe_search.search(q, limit)
         return jsonify({
             'success': True,
             'data': [r.to_dict(include_user=True) for r in recipes],
-            'count': len(recipes)
+            'count': len(recipes),
         })
     except Exception as e:
-        return jsonify({'success': False, 'message': 'Failed to fetch recipes.'}), 500
+        return jsonify({'success': False, 'message': 'Failed to search recipes.'}), 500
+
+
+MAX_STATE_IDS = 100
+
+
+# CRUD READ: batch lookup of saved state, user rating and rating aggregates for many recipes
+# Constant query count: recipes (aggregates), plus saved rows and user ratings when logged in
+@recipes_bp.route('/state', methods=['POST'])
+@replica_router.reads_only
+def state():
+    try:
+        data = request.get_json(silent=True) or {}
+        raw_ids = data.get('ids')
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'ids': ['A list of recipe ids is required.']}}), 422
+        if len(raw_ids) > MAX_STATE_IDS:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'ids': [f'Cannot request more than {MAX_STATE_IDS} recipes.']}}), 422
+        try:
+            recipe_ids = {int(i) for i in raw_ids}
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'ids': ['Recipe ids must be numbers.']}}), 422
+
+        rows = db.session.query(Recipe.id, Recipe.user_id, Recipe.ratings_sum, Recipe.ratings_count) \
+            .filter(Recipe.id.in_(recipe_ids)).all()
+
+        saved_ids, user_ratings = set(), {}
+        if current_user.is_authenticated:
+            saved_ids = set(db.session.scalars(
+                db.select(saved_recipes_table.c.recipe_id).where(
+                    saved_recipes_table.c.user_id == current_user.id,
+                    saved_recipes_table.c.recipe_id.in_(recipe_ids),
+                )
+            ))
+            user_ratings = dict(db.session.execute(
+                db.select(Rating.recipe_id, Rating.rating).where(
+                    Rating.user_id == current_user.id,
+                    Rating.recipe_id.in_(recipe_ids),
+                )
+            ).all())
+
+        # Keys are recipe ids; unknown ids are simply absent
+        result = {
+            str(row.id): {
+                'isSaved': row.id in saved_ids,
+                'userRating': user_ratings.get(row.id),
+                'averageRating': average_from_aggregates(row.ratings_sum, row.ratings_count),
+                'ratingsCount': row.ratings_count,
+                'recipeOwnerId': row.user_id,
+            }
+            for row in rows
+        }
+        return jsonify({'success': True, 'data': result})
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to fetch recipe state.'}), 500
 
 
 # CRUD READ: retrieves single recipe with related ingredients and author
 @recipes_bp.route('/<int:recipe_id>', methods=['GET'])
+@conditional(recipe_version)
+@response_cache.cached()
 def show(recipe_id):
     try:
-        recipe = Recipe.query.options(
-            db.joinedload(Recipe.user),
-            db.joinedload(Recipe.ingredients),
-        ).get(recipe_id)
+        recipe = load_recipe_detail(recipe_id)
         if not recipe:
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
+        add_cache_tags(recipe_tag(recipe.id), user_tag(recipe.user_id))
         return jsonify({'success': True, 'data': recipe.to_dict(include_ingredients=True, include_user=True)})
     except Exception as e:
         return jsonify({'success': False, 'message': 'Failed to fetch recipe details.'}), 500
@@ -137,6 +296,7 @@ def show(recipe_id):
 @recipes_bp.route('', methods=['POST'])
 @login_required
 def store():
+    image_path = None
     try:
         if request.content_type and 'multipart/form-data' in request.content_type:
             data = request.form.to_dict()
@@ -153,7 +313,6 @@ def store():
         if isinstance(ingredients_raw, str):
             ingredients_raw = json.loads(ingredients_raw)
 
-        image_path = None
         if files and 'image' in files:
             image_path = save_image(files['image'])
 
@@ -177,26 +336,22 @@ def store():
         db.session.add(recipe)
         db.session.flush()  # Get recipe.id before committing
 
-        # OOP: creates related Ingredient objects linked to recipe through foreign key
-        for i, ing in enumerate(ingredients_raw):
-            ingredient = Ingredient(
-                recipe_id=recipe.id,
-                name=ing['name'].strip(),
-                measurement=ing['measurement'].strip(),
-                substitution_option=(ing.get('substitution_option') or '').strip() or None,
-                allergen_info=(ing.get('allergen_info') or '').strip() or None,
-                order=i + 1,
-            )
-            db.session.add(ingredient)
+        # OOP: creates related Ingredient rows linked to recipe through foreign key (one multi-row INSERT)
+        Ingredient.bulk_insert(recipe.id, normalize_ingredients(ingredients_raw))
 
+        recipe_search.index_recipe(recipe)  # refresh search document in the same transaction
         db.session.commit()  # CRUD CREATE: commits transaction to database
+        response_cache.invalidate(RECIPE_LIST_TAG)
+        image_pipeline.enqueue(recipe.id, recipe.image)  # variants are rendered after the response
         return jsonify({
             'success': True,
             'message': 'Recipe created successfully!',
-            'data': recipe.to_dict(include_ingredients=True)
+            'data': load_recipe_detail(recipe.id).to_dict(include_ingredients=True)
         }), 201
     except Exception as e:
         db.session.rollback()
+        if image_path:
+            upload_store.release(image_path)
         return jsonify({'success': False, 'message': 'Failed to create recipe. Please try again.'}), 500
 
 
@@ -204,8 +359,9 @@ def store():
 @recipes_bp.route('/<int:recipe_id>', methods=['PUT'])
 @login_required
 def update(recipe_id):
+    new_image = None
     try:
-        recipe = Recipe.query.get(recipe_id)
+        recipe = db.session.get(Recipe, recipe_id)
         if not recipe:
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
         if recipe.user_id != current_user.id:
@@ -227,11 +383,13 @@ def update(recipe_id):
             ingredients_raw = json.loads(ingredients_raw)
 
         if files and 'image' in files:
-            if recipe.image:
-                old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], recipe.image)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-            recipe.image = save_image(files['image'])
+            # The previous file may be shared with other recipes; the upload GC reclaims it once unreferenced
+            new_image = save_image(files['image'])
+            if new_image != recipe.image:
+                recipe.image = new_image
+                recipe.image_variants = None
+            else:
+                new_image = None
 
         prep_time = int(data['prep_time'])
         cook_time = int(data['cook_time'])
@@ -246,28 +404,27 @@ def update(recipe_id):
         recipe.total_time = prep_time + cook_time
         recipe.serving_size = int(data['serving_size'])
         recipe.preparation_notes = (data.get('preparation_notes') or '').strip() or None
+        recipe.updated_at = datetime.utcnow()  # ingredient-only edits must still change the recipe version
 
-        # CRUD DELETE then CREATE: removes old ingredients and creates new ones
-        Ingredient.query.filter_by(recipe_id=recipe.id).delete()
-        for i, ing in enumerate(ingredients_raw):
-            ingredient = Ingredient(
-                recipe_id=recipe.id,
-                name=ing['name'].strip(),
-                measurement=ing['measurement'].strip(),
-                substitution_option=(ing.get('substitution_option') or '').strip() or None,
-                allergen_info=(ing.get('allergen_info') or '').strip() or None,
-                order=i + 1,
-            )
-            db.session.add(ingredient)
+        # CRUD UPDATE: diffs submitted ingredients against stored rows (bulk UPDATE/INSERT/DELETE)
+        db.session.flush()
+        Ingredient.sync_for_recipe(recipe.id, normalize_ingredients(ingredients_raw))
 
+        recipe_search.index_recipe(recipe)  # refresh search document in the same transaction
         db.session.commit()  # CRUD UPDATE: commits changes to database
+        response_cache.invalidate(RECIPE_LIST_TAG, recipe_tag(recipe_id))
+        image_pipeline.enqueue(recipe.id, new_image)
+        if new_image:
+            upload_store.schedule_gc()
         return jsonify({
             'success': True,
             'message': 'Recipe updated successfully!',
-            'data': recipe.to_dict(include_ingredients=True)
+            'data': load_recipe_detail(recipe.id).to_dict(include_ingredients=True)
         })
     except Exception as e:
         db.session.rollback()
+        if new_image:
+            upload_store.release(new_image)
         return jsonify({'success': False, 'message': 'Failed to update recipe. Please try again.'}), 500
 
 
@@ -276,19 +433,23 @@ def update(recipe_id):
 @login_required
 def destroy(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
+        recipe = db.session.query(Recipe.user_id, Recipe.image).filter(Recipe.id == recipe_id).first()
         if not recipe:
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
         if recipe.user_id != current_user.id:
             return jsonify({'success': False, 'message': 'You do not have permission to delete this recipe.'}), 403
 
-        if recipe.image:
-            image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], recipe.image)
-            if os.path.exists(image_path):
-                os.remove(image_path)
-
-        db.session.delete(recipe)  # CRUD DELETE: removes recipe (CASCADE deletes related records)
+        # CRUD DELETE: set-based statements instead of loading related rows into the ORM. Children go in the
+        # same transaction (as ON DELETE CASCADE would), also where foreign keys are not enforced (SQLite),
+        # so a recipe that reuses the id never inherits them
+        for table in (Ingredient.__table__, Comment.__table__, Rating.__table__, saved_recipes_table):
+            db.session.execute(db.delete(table).where(table.c.recipe_id == recipe_id))
+        db.session.execute(db.delete(Recipe).where(Recipe.id == recipe_id))
         db.session.commit()
+        recipe_search.remove_recipe(recipe_id)
+        response_cache.invalidate(recipe_tag(recipe_id), comments_tag(recipe_id))
+        if recipe.image is not None:
+            upload_store.schedule_gc()
         return jsonify({'success': True, 'message': 'Recipe deleted successfully.'})
     except Exception as e:
         db.session.rollback()
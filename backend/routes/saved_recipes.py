@@ -1,18 +1,41 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from backend.models import db, Recipe, saved_recipes as saved_recipes_table
+from backend.streaming import wants_stream, stream_query
+from backend.serializers import (use_compact_serializer, recipe_rows_select, serialize_recipe_rows, json_response,
+                                 parse_fields, recipe_load_options, serialize_recipe, InvalidFields)
 
 saved_bp = Blueprint('saved', __name__)
 
 
 # CRUD READ: retrieves all recipes saved by current user through many-to-many relationship
+# ?fields= selects the output keys (default: the card summary)
 @saved_bp.route('/saved-recipes', methods=['GET'])
 @login_required
 def index():
     try:
-        # OOP: uses User.saved relationship to query saved recipes through junction table
-        recipes = current_user.saved.order_by(saved_recipes_table.c.created_at.desc()).all()
-        return jsonify({'success': True, 'data': [r.to_dict(include_user=True) for r in recipes], 'count': len(recipes)})
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except InvalidFields as e:
+            return jsonify({'success': False, 'message': 'Validation failed.', 'errors': {'fields': [str(e)]}}), 422
+
+        # Joins through the saved_recipes junction table by user id (no User row needed)
+        query = (Recipe.query.join(saved_recipes_table, saved_recipes_table.c.recipe_id == Recipe.id)
+                 .filter(saved_recipes_table.c.user_id == current_user.id)
+                 .options(*recipe_load_options(fields)).order_by(saved_recipes_table.c.created_at.desc()))
+        if wants_stream():
+            return stream_query(query, lambda r: serialize_recipe(r, fields))
+        if use_compact_serializer():
+            rows = db.session.execute(
+                recipe_rows_select(fields)
+                .join(saved_recipes_table, saved_recipes_table.c.recipe_id == Recipe.id)
+                .filter(saved_recipes_table.c.user_id == current_user.id)
+                .order_by(saved_recipes_table.c.created_at.desc())
+            ).all()
+            data = serialize_recipe_rows(rows, fields)
+        else:
+            data = [serialize_recipe(r, fields) for r in query.all()]
+        return json_response({'success': True, 'data': data, 'count': len(data)})
     except Exception as e:
         return jsonify({'success': False, 'message': 'Failed to fetch saved recipes.'}), 500
 
@@ -22,8 +45,7 @@ def index():
 @login_required
 def check(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        if not Recipe.exists(recipe_id):
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
         # CRUD READ: queries many-to-many junction table directly
@@ -42,8 +64,7 @@ def check(recipe_id):
 @login_required
 def toggle(recipe_id):
     try:
-        recipe = Recipe.query.get(recipe_id)
-        if not recipe:
+        if not Recipe.exists(recipe_id):
             return jsonify({'success': False, 'message': 'Recipe not found.'}), 404
 
         # CRUD READ: checks if save relationship already exists in junction table
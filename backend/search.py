@@ -0,0 +1,213 @@
+import re
+import heapq
+import threading
+from collections import defaultdict
+from flask import current_app
+from backend.models import db, Recipe, Ingredient
+
+# Field weights mirror Postgres ts_rank defaults for setweight labels A/B/C
+FIELD_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+SEARCH_CONFIG = 'english'
+
+STOP_WORDS = frozenset('''
+a an and are as at be by for from has in is it its of on or that the to was were will with
+'''.split())
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+PLURAL_SUFFIXES = (('ies', 'y'), ('sses', 'ss'), ('ches', 'ch'), ('shes', 'sh'), ('xes', 'x'), ('oes', 'o'))
+
+
+def stem(word):
+    """Tiny plural stripper so 'tomatoes'/'tomato' share a posting, approximating Postgres' english stemmer"""
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 1:
+            return word[:-len(suffix)] + replacement
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercases, splits, drops stop words and stems"""
+    if not text:
+        return []
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def weighted_fields(recipe, ingredient_names):
+    """Returns (weight label, text) pairs indexed for a recipe"""
+    return (
+        ('A', recipe.title),
+        ('B', recipe.short_description),
+        ('B', ' '.join(ingredient_names)),
+        ('C', recipe.preparation_notes),
+    )
+
+
+class InvertedIndex:
+    """Pure-Python fallback index used when the database has no tsvector support (e.g. SQLite)"""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {recipe_id: weighted term frequency}
+        self.terms_by_recipe = {}
+        self.synced_until = None  # newest recipes.updated_at reflected in the index
+        self.lock = threading.Lock()
+
+    def add(self, recipe_id, fields):
+        scores = defaultdict(float)
+        for label, text in fields:
+            for term in tokenize(text):
+                scores[term] += FIELD_WEIGHTS[label]
+        with self.lock:
+            self._discard(recipe_id)
+            for term, score in scores.items():
+                self.postings[term][recipe_id] = score
+            self.terms_by_recipe[recipe_id] = set(scores)
+
+    def remove(self, recipe_id):
+        with self.lock:
+            self._discard(recipe_id)
+
+    def _discard(self, recipe_id):
+        for term in self.terms_by_recipe.pop(recipe_id, ()):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(recipe_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def search(self, query):
+        """Returns {recipe_id: rank} for recipes matching every query term (AND semantics, like websearch_to_tsquery)"""
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        with self.lock:
+            postings = [self.postings.get(t, {}) for t in terms]
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for p in postings[1:]:
+                candidates &= p.keys()
+            return {rid: sum(p[rid] for p in postings) for rid in candidates}
+
+
+class RecipeSearchEngine:
+    """
+    Ranked full-text search over recipes.
+    Postgres: weighted tsvector column + GIN index, ranked with ts_rank.
+    Other databases: in-process InvertedIndex with the same weights, built lazily per process and
+    caught up before each search with recipes changed or deleted by other processes (meant for
+    development on SQLite, not for serving production traffic).
+    """
+
+    def uses_tsvector(self):
+        return db.session.get_bind().dialect.name == 'postgresql'
+
+    def _fallback_index(self):
+        index = current_app.extensions.get('recipe_search_index')
+        if index is None:
+            index = current_app.extensions['recipe_search_index'] = InvertedIndex()
+        self._sync(index)
+        return index
+
+    def _sync(self, index):
+        # One aggregate query per search; other workers' writes show up as newer updated_at or a count change
+        count, latest = db.session.query(db.func.count(Recipe.id), db.func.max(Recipe.updated_at)).one()
+        if latest == index.synced_until and count == len(index.terms_by_recipe):
+            return
+        changed = Recipe.query.options(db.selectinload(Recipe.ingredients))
+        if index.synced_until is not None:
+            changed = changed.filter(Recipe.updated_at >= index.synced_until)
+        for recipe in changed.yield_per(500):
+            index.add(recipe.id, weighted_fields(recipe, [i.name for i in recipe.ingredients]))
+        if count != len(index.terms_by_recipe):
+            existing = set(db.session.scalars(db.select(Recipe.id)))
+            for recipe_id in set(index.terms_by_recipe) - existing:
+                index.remove(recipe_id)
+        index.synced_until = latest
+
+    def index_recipe(self, recipe):
+        """Refreshes the search document for a recipe; call after its ingredients are flushed"""
+        if self.uses_tsvector():
+            db.session.execute(
+                db.update(Recipe)
+                .where(Recipe.id == recipe.id)
+                .values(search_vector=self._tsvector_expression(), updated_at=Recipe.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        elif 'recipe_search_index' in current_app.extensions:
+            names = [name for (name,) in db.session.query(Ingredient.name)
+                     .filter(Ingredient.recipe_id == recipe.id).order_by(Ingredient.order)]
+            current_app.extensions['recipe_search_index'].add(recipe.id, weighted_fields(recipe, names))
+
+    def index_recipes(self, recipe_ids):
+        """Refreshes the search documents of many recipes at once (bulk imports)"""
+        if not recipe_ids:
+            return
+        if self.uses_tsvector():
+            db.session.execute(
+                db.update(Recipe)
+                .where(Recipe.id.in_(recipe_ids))
+                .values(search_vector=self._tsvector_expression(), updated_at=Recipe.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        elif 'recipe_search_index' in current_app.extensions:
+            index = current_app.extensions['recipe_search_index']
+            for recipe in Recipe.query.options(db.selectinload(Recipe.ingredients)).filter(Recipe.id.in_(recipe_ids)):
+                index.add(recipe.id, weighted_fields(recipe, [i.name for i in recipe.ingredients]))
+
+    def remove_recipe(self, recipe_id):
+        index = current_app.extensions.get('recipe_search_index')
+        if index is not None:
+            index.remove(recipe_id)
+
+    def reindex_all(self):
+        """Rebuilds every search document; returns the number of recipes indexed"""
+        if self.uses_tsvector():
+            result = db.session.execute(
+                db.update(Recipe)
+                .values(search_vector=self._tsvector_expression(), updated_at=Recipe.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            return result.rowcount
+        current_app.extensions.pop('recipe_search_index', None)
+        return len(self._fallback_index().terms_by_recipe)
+
+    def search(self, query, limit):
+        """Returns recipes ordered by rank (best first), ties broken by newest id"""
+        if self.uses_tsvector():
+            tsquery = db.func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            rank = db.func.ts_rank(Recipe.search_vector, tsquery)
+            return (Recipe.query.options(db.joinedload(Recipe.user))
+                    .filter(Recipe.search_vector.op('@@')(tsquery))
+                    .order_by(rank.desc(), Recipe.id.desc())
+                    .limit(limit).all())
+
+        ranks = self._fallback_index().search(query)
+        top_ids = [rid for rid, _ in heapq.nlargest(limit, ranks.items(), key=lambda kv: (kv[1], kv[0]))]
+        if not top_ids:
+            return []
+        recipes = {r.id: r for r in Recipe.query.options(db.joinedload(Recipe.user)).filter(Recipe.id.in_(top_ids))}
+        return [recipes[rid] for rid in top_ids if rid in recipes]
+
+    @staticmethod
+    def _tsvector_expression():
+        ingredient_names = (
+            db.select(db.func.string_agg(Ingredient.name, ' '))
+            .where(Ingredient.recipe_id == Recipe.id)
+            .scalar_subquery()
+        )
+
+        def weighted(column, label):
+            # label is passed as an untyped literal so Postgres resolves it to "char"
+            return db.func.setweight(db.func.to_tsvector(SEARCH_CONFIG, db.func.coalesce(column, '')),
+                                     db.literal_column(f"'{label}'"))
+
+        return (weighted(Recipe.title, 'A')
+                .op('||')(weighted(Recipe.short_description, 'B'))
+                .op('||')(weighted(ingredient_names, 'B'))
+                .op('||')(weighted(Recipe.preparation_notes, 'C')))
+
+
+recipe_search = RecipeSearchEngine()
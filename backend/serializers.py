@@ -0,0 +1,252 @@
+"""
+Compact serializer engine: selects only the columns a response needs as Core rows (no ORM
+identity map or attribute instrumentation) and turns each row into the exact dict the model's
+to_dict() would produce, using a per-shape plan built once at import time.
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+from flask import current_app, request
+from backend.models import db, User, Recipe, Ingredient, average_from_aggregates
+
+try:
+    import orjson  # optional fast encoder
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def format_timestamp(value):
+    return value.isoformat() + 'Z' if value else None
+
+
+class RowPlan:
+    """
+    Precompiled row-to-dict plan.
+    fields: sequence of (output key, column, kind) where kind is 'raw' or 'timestamp'.
+    derived: extra keys computed from the row dict (key -> function of the dict).
+    nested: key -> (plan, presence key) for joined objects that may be NULL.
+    prefix: column label prefix, needed for nested plans so labels stay unique.
+    drop: keys that are selected (e.g. for keyset cursors) but not part of the output.
+    """
+
+    def __init__(self, fields, derived=None, nested=None, prefix='', drop=()):
+        self.columns = [column.label(f'{prefix}{key}') for key, column, _ in fields]
+        self.keys = [key for key, _, _ in fields]
+        self.nested = nested or {}
+        self.width = len(fields) + sum(plan.width for plan, _ in self.nested.values())
+        self.to_dict = self._build(fields, list((derived or {}).items()), drop)
+
+    def _build(self, fields, derived, drop):
+        keys = self.keys
+        timestamps = [key for key, _, kind in fields if kind == 'timestamp']
+        children, position = [], len(fields)
+        for key, (plan, presence_key) in self.nested.items():
+            children.append((key, plan.to_dict, position, position + plan.keys.index(presence_key)))
+            position += plan.width
+        getters = {}  # row offset -> itemgetter over this plan's columns (nested plans sit at a fixed offset)
+
+        def getter_for(offset):
+            indices = range(offset, offset + len(keys))
+            getter = itemgetter(*indices) if len(keys) > 1 else lambda row: (row[offset],)
+            getters[offset] = getter
+            return getter
+
+        def to_dict(row, offset=0):
+            data = dict(zip(keys, (getters.get(offset) or getter_for(offset))(row)))
+            for key in timestamps:
+                data[key] = format_timestamp(data[key])
+            for key, compute in derived:
+                data[key] = compute(data)
+            for key, child, start, presence in children:
+                data[key] = child(row, offset + start) if row[offset + presence] is not None else None
+            for key in drop:
+                del data[key]
+            return data
+
+        return to_dict
+
+    def all_columns(self):
+        columns = list(self.columns)
+        for plan, _ in self.nested.values():
+            columns.extend(plan.all_columns())
+        return columns
+
+
+def _field(column, kind='raw'):
+    return column.key, column, kind
+
+
+# Same keys/values/order as User.to_dict()
+USER_PLAN = RowPlan(prefix='author_', fields=[
+    _field(User.id), _field(User.name), _field(User.email),
+    _field(User.created_at, 'timestamp'), _field(User.updated_at, 'timestamp'),
+])
+
+RECIPE_FIELDS = [
+    _field(Recipe.id), _field(Recipe.user_id), _field(Recipe.title), _field(Recipe.short_description),
+    _field(Recipe.image), _field(Recipe.image_variants), _field(Recipe.cuisine_type), _field(Recipe.category), _field(Recipe.prep_time),
+    _field(Recipe.cook_time), _field(Recipe.total_time), _field(Recipe.serving_size),
+    _field(Recipe.preparation_notes), ('ratings_sum', Recipe.ratings_sum, 'raw'),
+    _field(Recipe.ratings_count), _field(Recipe.created_at, 'timestamp'), _field(Recipe.updated_at, 'timestamp'),
+]
+
+# Output keys of Recipe.to_dict(include_user=True), the fields a list request may project with ?fields=
+RECIPE_FULL_FIELDS = frozenset([
+    'id', 'user_id', 'title', 'short_description', 'image', 'image_variants', 'cuisine_type', 'category',
+    'prep_time', 'cook_time', 'total_time', 'serving_size', 'preparation_notes', 'average_rating',
+    'ratings_count', 'created_at', 'updated_at', 'user',
+])
+# Default for list endpoints: everything a recipe card renders, without the unbounded TEXT notes
+RECIPE_SUMMARY_FIELDS = RECIPE_FULL_FIELDS - {'preparation_notes'}
+RECIPE_FIELD_SETS = {'summary': RECIPE_SUMMARY_FIELDS, 'full': RECIPE_FULL_FIELDS}
+# Always selected: id identifies the row, created_at feeds keyset cursors
+RECIPE_REQUIRED_COLUMNS = ('id', 'created_at')
+
+
+class InvalidFields(ValueError):
+    """Raised for a ?fields= list naming something a recipe does not have"""
+
+
+def parse_fields(value, default=RECIPE_SUMMARY_FIELDS):
+    """
+    Parses ?fields=title,image,... into a frozenset of output keys; 'summary' and 'full' expand to
+    their field sets and 'ingredients' opts into the ingredient list. id is always included.
+    """
+    if not value:
+        return frozenset(default | {'id'})
+    fields = {'id'}
+    for token in (t.strip() for t in value.split(',')):
+        if not token:
+            continue
+        if token in RECIPE_FIELD_SETS:
+            fields |= RECIPE_FIELD_SETS[token]
+        elif token in RECIPE_FULL_FIELDS or token == 'ingredients':
+            fields.add(token)
+        else:
+            raise InvalidFields(f'Unknown field: {token}.')
+    return frozenset(fields)
+
+
+def recipe_column_keys(fields):
+    """Recipe columns needed to produce the given output keys"""
+    keys = set(RECIPE_REQUIRED_COLUMNS) | (fields & {key for key, _, _ in RECIPE_FIELDS})
+    if 'average_rating' in fields:
+        keys |= {'ratings_sum', 'ratings_count'}
+    return [key for key, _, _ in RECIPE_FIELDS if key in keys]
+
+
+@lru_cache(maxsize=64)
+def recipe_plan(fields):
+    """Compiled plan for one field set; ratings_sum is only an input to average_rating"""
+    keys = recipe_column_keys(fields)
+    derived = {}
+    if 'average_rating' in fields:
+        derived['average_rating'] = lambda data: average_from_aggregates(data.pop('ratings_sum'), data['ratings_count'])
+    return RowPlan(
+        [field for field in RECIPE_FIELDS if field[0] in keys],
+        derived=derived,
+        nested={'user': (USER_PLAN, 'id')} if 'user' in fields else None,
+        drop=[key for key in keys if key not in fields and key != 'ratings_sum'],
+    )
+
+
+# Same output as Recipe.to_dict(include_user=True)
+RECIPE_WITH_USER_PLAN = recipe_plan(RECIPE_FULL_FIELDS)
+
+# Same output as Ingredient.to_dict()
+INGREDIENT_PLAN = RowPlan([
+    _field(Ingredient.id), _field(Ingredient.recipe_id), _field(Ingredient.name), _field(Ingredient.measurement),
+    _field(Ingredient.substitution_option), _field(Ingredient.allergen_info), _field(Ingredient.order),
+    _field(Ingredient.created_at, 'timestamp'), _field(Ingredient.updated_at, 'timestamp'),
+])
+
+
+def recipe_rows_select(fields=RECIPE_FULL_FIELDS):
+    """Core SELECT of just the columns behind `fields` (author joined only when requested); supports .filter/.order_by"""
+    query = db.select(*recipe_plan(fields - {'ingredients'}).all_columns()).select_from(Recipe)
+    if 'user' in fields:
+        query = query.outerjoin(User, Recipe.user_id == User.id)
+    return query
+
+
+def serialize_recipe_rows(rows, fields=RECIPE_FULL_FIELDS):
+    """
+    Turns recipe_rows_select(fields) rows into dicts with exactly those keys, matching Recipe.to_dict()
+    values; 'ingredients' costs one extra query for the whole page.
+    """
+    plan = recipe_plan(fields - {'ingredients'})
+    data = [plan.to_dict(row) for row in rows]
+    if 'ingredients' in fields:
+        by_recipe = defaultdict(list)
+        if data:
+            ingredient_rows = db.session.execute(
+                db.select(*INGREDIENT_PLAN.all_columns())
+                .where(Ingredient.recipe_id.in_([d['id'] for d in data]))
+                .order_by(Ingredient.recipe_id, Ingredient.order)
+            )
+            for row in ingredient_rows:
+                by_recipe[row[1]].append(INGREDIENT_PLAN.to_dict(row))
+        for d in data:
+            d['ingredients'] = by_recipe[d['id']]
+    return data
+
+
+def recipe_load_options(fields):
+    """ORM loader options for a field set: load_only the needed columns, eager-load only requested relations"""
+    return [
+        db.load_only(*(getattr(Recipe, key) for key in recipe_column_keys(fields))),
+        db.joinedload(Recipe.user) if 'user' in fields else db.lazyload(Recipe.user),
+        db.selectinload(Recipe.ingredients) if 'ingredients' in fields else db.raiseload(Recipe.ingredients),
+    ]
+
+
+def serialize_recipe(recipe, fields):
+    """Recipe.to_dict() restricted to `fields`; touches only attributes loaded by recipe_load_options(fields)"""
+    data = {}
+    for key in fields:
+        if key == 'average_rating':
+            data[key] = recipe.average_rating()
+        elif key == 'user':
+            data[key] = recipe.user.to_dict() if recipe.user else None
+        elif key == 'ingredients':
+            data[key] = [i.to_dict() for i in recipe.ingredients]
+        elif key in ('created_at', 'updated_at'):
+            data[key] = format_timestamp(getattr(recipe, key))
+        else:
+            data[key] = getattr(recipe, key)
+    return data
+
+
+def use_compact_serializer():
+    """True when the current endpoint is configured for the compact engine"""
+    return request.endpoint in current_app.config.get('COMPACT_SERIALIZER_ENDPOINTS', ())
+
+
+def _escape_non_ascii(match):
+    code = ord(match.group())
+    if code > 0xFFFF:
+        code -= 0x10000
+        return '\\u{:04x}\\u{:04x}'.format(0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return '\\u{:04x}'.format(code)
+
+
+def json_response(payload, status=200):
+    """
+    Encodes like jsonify(); uses orjson when the provider writes compact, sorted output (the
+    production default), escaping non-ASCII characters as json.dumps(ensure_ascii=True) does.
+    Debug (indented) output goes through the app's JSON provider.
+    """
+    provider = current_app.json
+    compact = not ((provider.compact is None and current_app.debug) or provider.compact is False)
+    if orjson is not None and compact and provider.sort_keys:
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        if provider.ensure_ascii and not body.isascii():
+            # Non-ASCII bytes only occur inside strings, so escaping them anywhere is safe
+            body = NON_ASCII.sub(_escape_non_ascii, body.decode()).encode()
+        return current_app.response_class(body, status=status, mimetype=provider.mimetype)
+    response = provider.response(payload)
+    response.status_code = status
+    return response
@@ -0,0 +1,298 @@
+"""
+Server-side sessions: the cookie carries only a random session id, the data lives in the sessions
+table (or Redis). Records are written only when the session changed (or its expiry needs extending),
+can be revoked per user from any worker, and expire after PERMANENT_SESSION_LIFETIME.
+"""
+import hashlib
+import secrets
+import time
+from datetime import datetime, timedelta
+from flask import current_app, session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from flask_login import user_logged_in
+from werkzeug.datastructures import CallbackDict
+from backend.models import db, UserSession
+from backend.jobs import job_queue
+
+SWEEP_BATCH_SIZE = 1000
+
+
+def session_key(sid):
+    """Storage key for a session id: only a digest is stored, so a leaked table holds no usable cookies"""
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+def session_user_id(data):
+    """User id from Flask-Login's '<id>:<stamp>' entry, for per-user revocation"""
+    user_id = str(data.get('_user_id') or '').partition(':')[0]
+    return int(user_id) if user_id.isdigit() else None
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.previous_sid = None
+        self.modified = False
+
+    def regenerate(self):
+        """Issues a new session id on save and drops the old record (login: prevents session fixation)"""
+        if self.sid is not None:
+            self.previous_sid = self.sid
+        self.sid = None
+        self.modified = True
+
+
+class SessionStore:
+    """Abstract store of serialized session data keyed by session_key()"""
+
+    def load(self, key):
+        """Returns (data, expires_at) or None"""
+        raise NotImplementedError
+
+    def save(self, key, data, user_id, expires_at, new):
+        raise NotImplementedError
+
+    def touch(self, key, expires_at, user_id):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def delete_for_user(self, user_id):
+        raise NotImplementedError
+
+    def sweep(self, batch_size=SWEEP_BATCH_SIZE):
+        """Deletes expired records in batches; returns how many"""
+        return 0
+
+    def before_write(self, response):
+        """Called by save_session before it writes, once the view's database work is done"""
+
+
+class DatabaseSessionStore(SessionStore):
+    """
+    sessions table accessed through short Core transactions on their own connection, so session
+    writes never commit (or roll back) the request's ORM session. Every request with a session cookie
+    reads the table once; production deployments should prefer SESSION_BACKEND=redis.
+    """
+
+    table = UserSession.__table__
+
+    def before_write(self, response):
+        # Hand the request's connection back to the pool first, so the write does not hold a second one
+        # (streamed bodies are generated after save_session and may still query through db.session)
+        if not response.is_streamed:
+            db.session.close()
+
+    def load(self, key):
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                db.select(self.table.c.data, self.table.c.expires_at).where(self.table.c.id == key)
+            ).first()
+        return (row.data, row.expires_at) if row else None
+
+    def save(self, key, data, user_id, expires_at, new):
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            if new:
+                conn.execute(db.insert(self.table).values(
+                    id=key, user_id=user_id, data=data, expires_at=expires_at, created_at=now, updated_at=now))
+            else:
+                conn.execute(db.update(self.table).where(self.table.c.id == key).values(
+                    user_id=user_id, data=data, expires_at=expires_at, updated_at=now))
+
+    def touch(self, key, expires_at, user_id):
+        with db.engine.begin() as conn:
+            conn.execute(db.update(self.table).where(self.table.c.id == key).values(expires_at=expires_at))
+
+    def delete(self, key):
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(self.table).where(self.table.c.id == key))
+
+    def delete_for_user(self, user_id):
+        with db.engine.begin() as conn:
+            return conn.execute(db.delete(self.table).where(self.table.c.user_id == user_id)).rowcount
+
+    def sweep(self, batch_size=SWEEP_BATCH_SIZE):
+        removed = 0
+        while True:
+            with db.engine.begin() as conn:
+                expired = (db.select(self.table.c.id).where(self.table.c.expires_at < datetime.utcnow())
+                           .limit(batch_size).scalar_subquery())
+                deleted = conn.execute(db.delete(self.table).where(self.table.c.id.in_(expired))).rowcount
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions as Redis strings with a TTL (Redis expires them itself), plus one set per user
+    listing their session keys for revocation. Works with any client exposing
+    get/set(ex=)/expire/delete/sadd/smembers/ttl.
+    """
+
+    def __init__(self, client, prefix='procook:session:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # optional dependency, only needed when SESSION_BACKEND=redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def load(self, key):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return None
+        ttl = self.client.ttl(self.prefix + key)
+        return (data.decode() if isinstance(data, bytes) else data), datetime.utcnow() + timedelta(seconds=max(ttl, 0))
+
+    def save(self, key, data, user_id, expires_at, new):
+        ttl = max(1, int((expires_at - datetime.utcnow()).total_seconds()))
+        self.client.set(self.prefix + key, data, ex=ttl)
+        if user_id is not None:
+            user_key = f'{self.prefix}user:{user_id}'
+            self.client.sadd(user_key, key)
+            self.client.expire(user_key, ttl)
+
+    def touch(self, key, expires_at, user_id):
+        ttl = max(1, int((expires_at - datetime.utcnow()).total_seconds()))
+        self.client.expire(self.prefix + key, ttl)
+        if user_id is not None:
+            # The user set must outlive every session it lists, or delete_for_user would miss them
+            self.client.expire(f'{self.prefix}user:{user_id}', ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def delete_for_user(self, user_id):
+        user_key = f'{self.prefix}user:{user_id}'
+        keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.smembers(user_key)]
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+        self.client.delete(user_key)
+        return len(keys)
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Flask session interface over a SessionStore. The cookie value is a 256-bit random id, so no
+    signature has to be computed or checked. Unchanged sessions are not written back, except to
+    extend the expiry once less than half of PERMANENT_SESSION_LIFETIME remains.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, sweep_interval=3600):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self.last_sweep = 0.0
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            record = self.store.load(session_key(sid))
+            if record is not None and record[1] > datetime.utcnow():
+                try:
+                    return ServerSession(self.serializer.loads(record[0]), sid=sid, expires_at=record[1])
+                except ValueError:
+                    app.logger.warning('Discarding unreadable session record')
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain, path = self.get_cookie_domain(app), self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+        if session.previous_sid is not None or session.modified or session.sid is None:
+            self.store.before_write(response)
+        if session.previous_sid is not None:
+            self.store.delete(session_key(session.previous_sid))
+
+        if not session:
+            if session.sid is not None:
+                self.store.delete(session_key(session.sid))
+            if session.sid is not None or session.previous_sid is not None:
+                response.delete_cookie(name, domain=domain, path=path, secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app), samesite=self.get_cookie_samesite(app))
+            return
+
+        lifetime = app.permanent_session_lifetime
+        now = datetime.utcnow()
+        expires_at = now + lifetime
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+            self.store.save(session_key(session.sid), self.serializer.dumps(dict(session)),
+                            session_user_id(session), expires_at, new=True)
+            self._schedule_sweep()
+        elif session.modified:
+            self.store.save(session_key(session.sid), self.serializer.dumps(dict(session)),
+                            session_user_id(session), expires_at, new=False)
+        elif session.expires_at - now < lifetime / 2:
+            # Active sessions keep their record alive; browser-session cookies need no re-send
+            self.store.before_write(response)
+            self.store.touch(session_key(session.sid), expires_at, session_user_id(session))
+            if not self.should_set_cookie(app, session):
+                return
+        else:
+            return
+
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session), domain=domain, path=path,
+            secure=self.get_cookie_secure(app), httponly=self.get_cookie_httponly(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    def _schedule_sweep(self):
+        # New sessions are the only thing that grows the table, so they also trigger the sweep
+        now = time.monotonic()
+        if now - self.last_sweep < self.sweep_interval:
+            return
+        self.last_sweep = now
+        try:
+            job_queue.enqueue('sessions.sweep', dedupe_key='sessions.sweep')
+        except Exception:
+            db.session.rollback()
+
+
+def init_sessions(app):
+    """Installs the server-side session interface selected by SESSION_BACKEND (cookie keeps Flask's default)"""
+    backend = app.config.get('SESSION_BACKEND', 'database')
+    if backend == 'cookie':
+        return
+    if backend == 'redis':
+        store = RedisSessionStore.from_url(app.config['CACHE_REDIS_URL'])
+    elif backend == 'database':
+        store = DatabaseSessionStore()
+    else:
+        raise ValueError(f'Unknown SESSION_BACKEND: {backend}')
+    app.session_interface = ServerSessionInterface(store, app.config.get('SESSION_SWEEP_INTERVAL', 3600))
+    user_logged_in.connect(_regenerate_on_login, app)
+    app.extensions['session_store'] = store
+
+
+def _regenerate_on_login(sender, user, **extra):
+    if isinstance(session._get_current_object(), ServerSession):
+        session.regenerate()
+
+
+def revoke_user_sessions(user_id):
+    """Deletes every stored session of a user (all devices, all workers); returns how many"""
+    store = current_app.extensions.get('session_store')
+    return store.delete_for_user(user_id) if store is not None else 0
+
+
+@job_queue.task('sessions.sweep', max_attempts=1)
+def sweep_sessions():
+    store = current_app.extensions.get('session_store')
+    if store is not None:
+        removed = store.sweep()
+        if removed:
+            current_app.logger.info('Session sweep removed %d expired session(s)', removed)
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import abort, request
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+try:
+    import brotli  # optional: only needed to write .br siblings
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 31536000  # one year
+# Vite emits content-hashed names under assets/ (e.g. assets/index-4f1c2b9a.js)
+HASHED_ASSET = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[a-z0-9]+$')
+# Precompressed siblings, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_SUFFIXES = ('.js', '.mjs', '.css', '.html', '.svg', '.json', '.txt', '.map', '.xml', '.wasm')
+# Touched by every Vite build (emptyOutDir recreates them) and by precompress; see StaticFiles.lookup
+BUILD_STAMP_PATHS = ('', 'assets', 'index.html')
+# Content-addressed upload paths never change once written (backend/uploads.py, backend/images.py)
+IMMUTABLE_UPLOAD_DIRS = ('blobs/', 'variants/')
+
+
+class StaticEntry:
+    """One file of the frontend build, as recorded in the startup manifest"""
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'mimetype', 'encodings', 'immutable')
+
+    def __init__(self, path, size, mtime, encodings):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = hashlib.sha1(f'{path}:{size}:{mtime}'.encode()).hexdigest()[:20]
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.encodings = encodings
+        self.immutable = bool(HASHED_ASSET.match(path))
+
+
+def build_manifest(root):
+    """Walks dist/ once and records every servable file with its precompressed siblings"""
+    manifest = {}
+    if not os.path.isdir(root):
+        return manifest
+    for dirpath, _, filenames in os.walk(root):
+        names = set(filenames)
+        for name in filenames:
+            if name.endswith(('.br', '.gz')) and name[:-3] in names:
+                continue
+            full = os.path.join(dirpath, name)
+            relative = os.path.relpath(full, root).replace(os.sep, '/')
+            stat = os.stat(full)
+            encodings = [encoding for encoding, suffix in ENCODINGS if name + suffix in names]
+            manifest[relative] = StaticEntry(relative, stat.st_size, int(stat.st_mtime), encodings)
+    return manifest
+
+
+def build_stamp(root):
+    """mtimes of the paths a rebuild touches: three stat calls instead of a walk of dist/"""
+    stamp = []
+    for relative in BUILD_STAMP_PATHS:
+        try:
+            stamp.append(os.stat(os.path.join(root, relative)).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def precompress(root, min_size=1024):
+    """Writes .gz (and .br when the brotli module is installed) next to compressible build files"""
+    written = 0
+    for relative, entry in build_manifest(root).items():
+        if not relative.endswith(COMPRESSIBLE_SUFFIXES) or entry.size < min_size:
+            continue
+        with open(os.path.join(root, relative), 'rb') as f:
+            data = f.read()
+        outputs = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            outputs.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, body in outputs:
+            if len(body) < len(data):
+                with open(os.path.join(root, relative + suffix), 'wb') as f:
+                    f.write(body)
+                written += 1
+    return written
+
+
+class StaticFiles:
+    """
+    Serves the SPA build and uploads without per-request filesystem probing: dist/ is indexed at startup,
+    hashed assets get immutable caching, precompressed .br/.gz siblings are preferred, and the file bytes
+    can be handed to the front server (STATIC_OFFLOAD = 'x-sendfile' or 'x-accel').
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.stamp = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.dist_dir = app.config['STATIC_DIST_DIR']
+        self.upload_dir = app.config['UPLOAD_FOLDER']
+        self.offload = app.config.get('STATIC_OFFLOAD', 'none')
+        self.accel_prefix = app.config.get('STATIC_ACCEL_PREFIX', '/_protected').rstrip('/')
+        self.asset_max_age = app.config.get('STATIC_MAX_AGE', 3600)
+        self.upload_max_age = app.config.get('UPLOAD_MAX_AGE', 86400)
+        self.stamp = build_stamp(self.dist_dir)
+        self.manifest = build_manifest(self.dist_dir)
+        app.extensions['static_files'] = self
+
+    def lookup(self, path):
+        if self.app.debug:
+            # Pick up rebuilds while developing, re-walking dist/ only when one happened
+            stamp = build_stamp(self.dist_dir)
+            if stamp != self.stamp:
+                self.stamp, self.manifest = stamp, build_manifest(self.dist_dir)
+        return self.manifest.get(path)
+
+    def serve_asset(self, entry):
+        encoding, suffix = self._negotiate(entry)
+        if entry.immutable:
+            max_age = IMMUTABLE_MAX_AGE
+        elif entry.path == 'index.html':
+            max_age = 0
+        else:
+            max_age = self.asset_max_age
+        response = self._send(os.path.join(self.dist_dir, entry.path + suffix), f'dist/{entry.path}{suffix}',
+                              entry.mimetype, f'{entry.etag}{suffix}', entry.mtime, max_age, entry.immutable)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if entry.encodings:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def serve_upload(self, filename):
+        full = safe_join(self.upload_dir, filename)
+        if full is None:
+            abort(404)
+        immutable = filename.startswith(IMMUTABLE_UPLOAD_DIRS)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        try:
+            return self._send(full, f'uploads/{filename}', mimetype, None, None,
+                              IMMUTABLE_MAX_AGE if immutable else self.upload_max_age, immutable)
+        except (FileNotFoundError, IsADirectoryError):
+            abort(404)
+
+    def _negotiate(self, entry):
+        # nginx X-Accel-Redirect does not forward Content-Encoding; let gzip_static/brotli_static pick there
+        if self.offload == 'x-accel':
+            return None, ''
+        for encoding, suffix in ENCODINGS:
+            if encoding in entry.encodings and request.accept_encodings[encoding]:
+                return encoding, suffix
+        return None, ''
+
+    def _send(self, full_path, accel_path, mimetype, etag, mtime, max_age, immutable):
+        if self.offload == 'x-accel':
+            response = self.app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = f'{self.accel_prefix}/{accel_path}'
+        else:
+            response = send_file(full_path, request.environ, mimetype=mimetype, etag=etag if etag else True,
+                                 last_modified=mtime, max_age=max_age,
+                                 use_x_sendfile=self.offload == 'x-sendfile',
+                                 response_class=self.app.response_class)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        if immutable:
+            response.cache_control.immutable = True
+        elif max_age == 0:
+            response.cache_control.no_cache = True
+        return response
+
+
+static_files = StaticFiles()
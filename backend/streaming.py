@@ -0,0 +1,62 @@
+import json
+from flask import current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_BATCH_SIZE = 500
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def wants_stream():
+    """True when the client asked for the streaming export mode (?stream=1 or Accept: application/x-ndjson)"""
+    return request.args.get('stream') in ('1', 'true') or wants_ndjson()
+
+
+def stream_query(query, serialize, batch_size=STREAM_BATCH_SIZE, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streams a query row by row instead of materializing the full list.
+    Rows are fetched with yield_per (server-side cursor on Postgres) and flushed in ~64KB chunks,
+    either as NDJSON (one object per line) or as the usual {"data", "count", "success"} envelope.
+    A failure mid-stream is reported in-band: a final {"success": false} line, or an envelope closed
+    with "success": false and a message (success comes last so it can still say so).
+    Queries must not joined-eager-load collections; use selectinload/lazyload for those.
+    """
+    ndjson = wants_ndjson()
+    rows = query.yield_per(batch_size)
+
+    def generate():
+        buffer, size, count = [], 0, 0
+        if not ndjson:
+            yield '{"data":['
+        try:
+            for row in rows:
+                item = json.dumps(serialize(row), separators=(',', ':'))
+                if ndjson:
+                    item += '\n'
+                elif count:
+                    item = ',' + item
+                count += 1
+                buffer.append(item)
+                size += len(item)
+                if size >= chunk_size:
+                    yield ''.join(buffer)
+                    buffer, size = [], 0
+        except Exception:
+            # Headers are already sent, so the failure can only be signalled in-band
+            current_app.logger.exception('Streaming export aborted after %d rows', count)
+            if ndjson:
+                buffer.append(json.dumps({'success': False, 'message': 'Stream interrupted.'}) + '\n')
+            else:
+                buffer.append(f'],"count":{count},"success":false,"message":"Stream interrupted."}}')
+            yield ''.join(buffer)
+            return
+        if buffer:
+            yield ''.join(buffer)
+        if not ndjson:
+            yield f'],"count":{count},"success":true}}'
+
+    return current_app.response_class(stream_with_context(generate()),
+                                      mimetype=NDJSON_MIMETYPE if ndjson else 'application/json')
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from backend.models import db, Recipe
+from backend.jobs import job_queue
+
+BLOB_DIR = 'blobs'
+TMP_DIR = 'tmp'
+# Directories the GC sweep may reclaim files from ('recipes' holds uploads from before the blob store)
+MANAGED_DIRS = ('blobs', 'variants', 'recipes', TMP_DIR)
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class UploadStore:
+    """
+    Content-addressed store for recipe images: files live at blobs/<sha[:2]>/<sha256>.<ext>, so
+    uploading the same image again reuses the existing file. A blob is referenced by every
+    Recipe.image row holding its path; unreferenced blobs (and their variants) are only removed
+    by the GC sweep, never inline by the request that dropped the last reference.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.grace_seconds = 3600
+        self.gc_interval = 900
+        self.last_gc = 0.0
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.grace_seconds = app.config.get('UPLOAD_GC_GRACE_SECONDS', 3600)
+        self.gc_interval = app.config.get('UPLOAD_GC_INTERVAL', 900)
+        app.extensions['upload_store'] = self
+
+    @property
+    def root(self):
+        return self.app.config['UPLOAD_FOLDER']
+
+    def save(self, file):
+        """Streams an upload to a temp file while hashing it, then moves it to its content address"""
+        ext = file.filename.rsplit('.', 1)[-1].lower()
+        tmp_dir = os.path.join(self.root, TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: file.stream.read(HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+            sha = digest.hexdigest()
+            relative = f'{BLOB_DIR}/{sha[:2]}/{sha}.{ext}'
+            target = os.path.join(self.root, relative)
+            if os.path.exists(target):
+                os.unlink(tmp)
+                os.utime(target)  # restart the GC grace period for a blob that is being reused
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp, target)
+            return relative
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def reference_counts():
+        """Recipe rows per stored image path"""
+        rows = (db.session.query(Recipe.image, db.func.count(Recipe.id))
+                .filter(Recipe.image.isnot(None))
+                .group_by(Recipe.image).all())
+        return Counter(dict(rows))
+
+    def referenced_paths(self):
+        """Every upload-relative path a recipe still points at: originals plus their rendered variants"""
+        paths = set(self.reference_counts())
+        for (variants,) in db.session.query(Recipe.image_variants).filter(Recipe.image_variants.isnot(None)):
+            for entry in variants.values():
+                paths.update(value for key, value in entry.items() if key not in ('width', 'height'))
+        return paths
+
+    @staticmethod
+    def is_referenced(relative):
+        """Fresh single-path version of referenced_paths(), checked right before a file is deleted"""
+        variants = db.cast(Recipe.image_variants, db.Text)
+        query = db.select(Recipe.id).where(db.or_(Recipe.image == relative, variants.contains(f'"{relative}"')))
+        return db.session.execute(query.limit(1)).first() is not None
+
+    def sweep(self, dry_run=False):
+        """
+        Deletes unreferenced files older than the grace period (which covers uploads whose recipe
+        has not committed yet). Returns (files removed, bytes reclaimed).
+        The referenced set is only a first filter: each file's reference and mtime are checked
+        again right before it is unlinked, since requests keep reusing blobs while the sweep runs.
+        """
+        referenced = self.referenced_paths()
+        cutoff = time.time() - self.grace_seconds
+        removed = reclaimed = 0
+        for directory in MANAGED_DIRS:
+            base = os.path.join(self.root, directory)
+            for dirpath, _, filenames in os.walk(base):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    try:
+                        stat = os.stat(path)
+                        if relative in referenced or stat.st_mtime > cutoff:
+                            continue
+                        if not dry_run:
+                            db.session.rollback()  # end the snapshot so references committed since are seen
+                            if self.is_referenced(relative):
+                                continue
+                            stat = os.stat(path)
+                            if stat.st_mtime > cutoff:
+                                continue
+                            os.unlink(path)
+                    except FileNotFoundError:
+                        continue  # removed concurrently by another sweep
+                    removed += 1
+                    reclaimed += stat.st_size
+        return removed, reclaimed
+
+    def release(self, relative):
+        """
+        For a saved upload whose recipe write failed: queues a sweep for once its grace period has
+        passed. The file is not deleted here, as another request may have just reused the same blob.
+        """
+        try:
+            job_queue.enqueue('uploads.gc', delay=self.grace_seconds + 60)
+        except Exception:
+            db.session.rollback()
+            self.app.logger.exception('Could not schedule the sweep of %s', relative)
+
+    def schedule_gc(self):
+        """Queues a sweep at most once per UPLOAD_GC_INTERVAL in this process (and never two at once)"""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_gc < self.gc_interval:
+                return
+            self.last_gc = now
+        job_queue.enqueue('uploads.gc', dedupe_key='uploads.gc')
+
+
+upload_store = UploadStore()
+
+
+@job_queue.task('uploads.gc', max_attempts=1)
+def sweep_uploads():
+    removed, reclaimed = upload_store.sweep()
+    if removed:
+        upload_store.app.logger.info('Upload GC removed %d file(s), %d bytes', removed, reclaimed)
@@ -0,0 +1,108 @@
+"""
+Serializer benchmark: rows/sec of Model.to_dict() over ORM objects vs the compact Core-row engine.
+
+Usage:
+    python -m bench.bench_serializers --recipes 5000 --repeat 5
+    python -m bench.bench_serializers --database-url postgresql://... --recipes 20000
+Defaults to a throwaway SQLite database; prints a JSON report.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--recipes', type=int, default=5000)
+    parser.add_argument('--ingredients', type=int, default=6, help='ingredients per recipe')
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.setdefault('CACHE_BACKEND', 'none')
+
+    from backend.app import create_app
+    from backend.models import db, User, Recipe, Ingredient
+    from backend.serializers import recipe_rows_select, serialize_recipe_rows, RECIPE_FULL_FIELDS
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        seed(db, User, Recipe, Ingredient, args.recipes, args.ingredients)
+
+        def orm_path(include_ingredients):
+            query = Recipe.query.options(db.joinedload(Recipe.user))
+            if include_ingredients:
+                query = query.options(db.selectinload(Recipe.ingredients))
+            else:
+                query = query.options(db.lazyload(Recipe.ingredients))
+            data = [r.to_dict(include_user=True, include_ingredients=include_ingredients) for r in query.all()]
+            db.session.expunge_all()
+            return data
+
+        def compact_path(include_ingredients):
+            fields = RECIPE_FULL_FIELDS | {'ingredients'} if include_ingredients else RECIPE_FULL_FIELDS
+            rows = db.session.execute(recipe_rows_select(fields)).all()
+            return serialize_recipe_rows(rows, fields)
+
+        report = {'database': db.engine.dialect.name, 'recipes': args.recipes, 'results': {}}
+        for include_ingredients in (False, True):
+            label = 'with_ingredients' if include_ingredients else 'cards'
+            orm, compact = orm_path(include_ingredients), compact_path(include_ingredients)
+            report['results'][label] = {
+                'identical_output': orm == compact,
+                'orm_rows_per_sec': rows_per_sec(orm_path, include_ingredients, args.repeat, args.recipes),
+                'compact_rows_per_sec': rows_per_sec(compact_path, include_ingredients, args.repeat, args.recipes),
+            }
+            r = report['results'][label]
+            r['speedup'] = round(r['compact_rows_per_sec'] / r['orm_rows_per_sec'], 2)
+
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+def rows_per_sec(fn, include_ingredients, repeat, rows):
+    best = min(timed(fn, include_ingredients) for _ in range(repeat))
+    return round(rows / best)
+
+
+def timed(fn, include_ingredients):
+    start = time.perf_counter()
+    fn(include_ingredients)
+    return time.perf_counter() - start
+
+
+def seed(db, User, Recipe, Ingredient, n_recipes, n_ingredients):
+    if db.session.query(Recipe.id).first():
+        return
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [
+        {'id': i, 'name': f'Bench User {i}', 'email': f'bench{i}@example.com', 'password': 'x',
+         'created_at': now, 'updated_at': now}
+        for i in range(1, 51)
+    ])
+    db.session.execute(db.insert(Recipe), [
+        {'id': i, 'user_id': i % 50 + 1, 'title': f'Recipe {i}', 'short_description': 'A benchmark recipe description.',
+         'cuisine_type': 'Italian', 'category': 'Pasta', 'prep_time': 10, 'cook_time': 20, 'total_time': 30,
+         'serving_size': 4, 'preparation_notes': 'Stir. ' * 40, 'ratings_sum': i % 23, 'ratings_count': i % 5,
+         'created_at': now - timedelta(seconds=i), 'updated_at': now}
+        for i in range(1, n_recipes + 1)
+    ])
+    db.session.execute(db.insert(Ingredient), [
+        {'recipe_id': r, 'name': f'Ingredient {k}', 'measurement': '1 cup', 'order': k,
+         'created_at': now, 'updated_at': now}
+        for r in range(1, n_recipes + 1) for k in range(1, n_ingredients + 1)
+    ])
+    db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Shared helpers for the benchmark suite: isolated app/database setup, query counting, latency stats."""
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def configure_environment(database_url=None):
+    """Points the app at the benchmark database; must run before backend.app is imported"""
+    os.environ['DATABASE_URL'] = database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.setdefault('CACHE_BACKEND', 'none')
+    return os.environ['DATABASE_URL']
+
+
+def create_bench_app(config_name='production'):
+    from backend.app import create_app
+    app = create_app(config_name)
+    app.config['SESSION_COOKIE_SECURE'] = False  # the test client talks plain HTTP
+    return app
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    @contextmanager
+    def listening(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        try:
+            yield self
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies_ms):
+    values = sorted(latencies_ms)
+    return {
+        'samples': len(values),
+        'p50_ms': round(percentile(values, 50), 3) if values else None,
+        'p95_ms': round(percentile(values, 95), 3) if values else None,
+        'p99_ms': round(percentile(values, 99), 3) if values else None,
+        'max_ms': round(values[-1], 3) if values else None,
+    }
@@ -0,0 +1,101 @@
+"""
+Scalable synthetic data generator using multi-row bulk inserts.
+
+Generates N users, M recipes (with ingredients), threaded comments, ratings and saves.
+Rating aggregates on recipes are computed while generating, so they match the ratings table.
+"""
+import random
+from datetime import datetime, timedelta
+
+CUISINES = ['Italian', 'Thai', 'Mexican', 'Indian', 'French', 'Japanese', 'Greek', 'American']
+CATEGORIES = ['Pasta', 'Curry', 'Dessert', 'Soup', 'Salad', 'Breakfast', 'Grill', 'Baking']
+WORDS = ('tomato garlic basil lemon butter onion pepper ginger chili coconut rice noodle chicken beef '
+         'mushroom spinach cheese cream honey thyme rosemary lime cumin paprika').split()
+
+BATCH_SIZE = 5000
+
+
+def insert_batched(db, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(db.insert(table), rows[start:start + BATCH_SIZE])
+
+
+def generate(db, users=100, recipes=1000, ingredients_per_recipe=8, comments_per_recipe=5,
+             reply_ratio=0.4, ratings_per_recipe=5, saves_per_user=10, seed=42):
+    """Bulk-inserts a synthetic dataset; returns a summary of row counts. Expects empty tables."""
+    from backend.models import User, Recipe, Ingredient, Comment, Rating, saved_recipes
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    words = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n))
+    # Password hash for 'Password123' is computed once; hashing per user would dominate generation time
+    from werkzeug.security import generate_password_hash
+    password = generate_password_hash('Password123')
+
+    insert_batched(db, User, [
+        {'id': u, 'name': f'Cook {u}', 'email': f'cook{u}@bench.procook', 'password': password,
+         'created_at': now, 'updated_at': now}
+        for u in range(1, users + 1)
+    ])
+
+    recipe_rows, ingredient_rows, rating_rows = [], [], []
+    for r in range(1, recipes + 1):
+        owner = rng.randint(1, users)
+        raters = rng.sample(range(1, users + 1), min(ratings_per_recipe, users))
+        raters = [u for u in raters if u != owner]
+        scores = [rng.randint(1, 5) for _ in raters]
+        prep, cook = rng.randint(5, 60), rng.randint(0, 120)
+        created = now - timedelta(minutes=recipes - r)
+        recipe_rows.append({
+            'id': r, 'user_id': owner, 'title': f'{words(2).title()} {r}', 'short_description': words(12),
+            'cuisine_type': rng.choice(CUISINES), 'category': rng.choice(CATEGORIES),
+            'prep_time': prep, 'cook_time': cook, 'total_time': prep + cook, 'serving_size': rng.randint(1, 8),
+            'preparation_notes': words(80), 'ratings_sum': sum(scores), 'ratings_count': len(scores),
+            'created_at': created, 'updated_at': created,
+        })
+        ingredient_rows.extend(
+            {'recipe_id': r, 'name': words(1).title(), 'measurement': f'{rng.randint(1, 500)} g', 'order': k,
+             'created_at': created, 'updated_at': created}
+            for k in range(1, ingredients_per_recipe + 1)
+        )
+        rating_rows.extend(
+            {'recipe_id': r, 'user_id': u, 'rating': s, 'created_at': now, 'updated_at': now}
+            for u, s in zip(raters, scores)
+        )
+    insert_batched(db, Recipe, recipe_rows)
+    insert_batched(db, Ingredient, ingredient_rows)
+    insert_batched(db, Rating, rating_rows)
+
+    # Comment trees: top-level comments first, then replies pointing at any earlier comment of the recipe
+    comment_rows, next_id = [], 1
+    for r in range(1, recipes + 1):
+        thread_ids = []
+        for c in range(comments_per_recipe):
+            parent = rng.choice(thread_ids) if thread_ids and rng.random() < reply_ratio else None
+            comment_rows.append({
+                'id': next_id, 'recipe_id': r, 'user_id': rng.randint(1, users), 'parent_id': parent,
+                'comment': words(15), 'created_at': now + timedelta(seconds=c), 'updated_at': now,
+            })
+            thread_ids.append(next_id)
+            next_id += 1
+    insert_batched(db, Comment, comment_rows)
+
+    save_rows = [
+        {'user_id': u, 'recipe_id': rid, 'created_at': now, 'updated_at': now}
+        for u in range(1, users + 1)
+        for rid in rng.sample(range(1, recipes + 1), min(saves_per_user, recipes))
+    ]
+    insert_batched(db, saved_recipes, save_rows)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # Explicit ids bypass the serial sequences; move them past the generated rows
+        for table in ('users', 'recipes', 'comments'):
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            ))
+
+    db.session.commit()
+    return {
+        'users': users, 'recipes': len(recipe_rows), 'ingredients': len(ingredient_rows),
+        'comments': len(comment_rows), 'ratings': len(rating_rows), 'saves': len(save_rows),
+    }
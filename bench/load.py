@@ -0,0 +1,147 @@
+"""
+HTTP load generator: hits the read endpoints over real sockets with several client processes,
+either against a running server (--url) or against gunicorn workers it starts on a generated dataset.
+Reports throughput and p50/p95/p99 latency per route as JSON.
+
+Usage:
+    python -m bench.load --workers 4 --clients 8 --duration 30
+    python -m bench.load --url http://127.0.0.1:5000 --clients 16 --duration 60
+Queries per request are only measurable in-process; see bench.routes for those.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from bench.common import configure_environment, latency_summary
+
+ROUTES = {
+    'recipes.index': lambda rng, n: '/api/recipes?limit=24',
+    'recipes.search': lambda rng, n: '/api/recipes/search?q=garlic+tomato',
+    'recipes.show': lambda rng, n: f'/api/recipes/{rng.randint(1, n)}',
+    'comments.index': lambda rng, n: f'/api/recipes/{rng.randint(1, n)}/comments',
+    'ratings.show_public': lambda rng, n: f'/api/recipes/{rng.randint(1, n)}/rating/public',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='target an already running server instead of starting gunicorn')
+    parser.add_argument('--database-url', default=None, help='database for the spawned gunicorn (default: SQLite)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per run')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--recipes', type=int, default=1000)
+    parser.add_argument('--only', action='append', default=[], help='run only these routes (repeatable)')
+    return parser.parse_args()
+
+
+def client_loop(base_url, routes, n_recipes, deadline, seed, results):
+    """One client process: sequential requests over a random route mix until the deadline"""
+    rng = random.Random(seed)
+    samples = {name: [] for name in routes}
+    errors = {name: 0 for name in routes}
+    while time.monotonic() < deadline:
+        name = rng.choice(routes)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + ROUTES[name](rng, n_recipes), timeout=30) as response:
+                response.read()
+            samples[name].append((time.perf_counter() - start) * 1000)
+        except (urllib.error.URLError, OSError):
+            errors[name] += 1
+    results.put((samples, errors))
+
+
+def run_load(base_url, routes, n_recipes, clients, duration):
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + duration
+    processes = [multiprocessing.Process(target=client_loop, args=(base_url, routes, n_recipes, deadline, i, results))
+                 for i in range(clients)]
+    for p in processes:
+        p.start()
+    collected = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    report = {}
+    for name in routes:
+        latencies = [ms for samples, _ in collected for ms in samples[name]]
+        summary = latency_summary(latencies)
+        summary['errors'] = sum(errors[name] for _, errors in collected)
+        summary['requests_per_sec'] = round(len(latencies) / duration, 1)
+        summary['queries_per_request'] = None
+        report[name] = summary
+    return report
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def prepare_database(args):
+    from bench.common import create_bench_app
+    from bench.datagen import generate
+    from backend.models import db
+
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        return generate(db, users=args.users, recipes=args.recipes)
+
+
+def start_gunicorn(workers, port):
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+               '--log-level', 'warning', "backend.app:create_app('production')"]
+    server = subprocess.Popen(command, env=dict(os.environ))
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        if server.poll() is not None:
+            sys.exit('gunicorn exited during startup (is it installed? pip install -r requirements.txt)')
+        try:
+            urllib.request.urlopen(base_url + '/api/recipes?limit=1', timeout=1).read()
+            return server, base_url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.1)
+    server.terminate()
+    sys.exit('gunicorn did not become ready in time')
+
+
+def main():
+    args = parse_args()
+    routes = [name for name in ROUTES if not args.only or name in args.only]
+    report = {'clients': args.clients, 'duration_s': args.duration, 'dataset': None}
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        database_url = configure_environment(args.database_url)
+        report['database'] = database_url.split('://', 1)[0]
+        report['dataset'] = prepare_database(args)
+        report['gunicorn_workers'] = args.workers
+        server, base_url = start_gunicorn(args.workers, free_port())
+
+    try:
+        report['routes'] = run_load(base_url, routes, args.recipes, args.clients, args.duration)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
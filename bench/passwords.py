@@ -0,0 +1,117 @@
+"""
+Password hashing benchmark: verifications/sec per core for each hash method, and end-to-end
+POST /api/login throughput through the Flask test client with the pool in front of it.
+
+Usage:
+    python -m bench.passwords
+    python -m bench.passwords --methods scrypt:32768:8:1,pbkdf2:sha256:600000 --threads 8 --seconds 5
+Defaults to a throwaway SQLite database; prints a JSON report.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from bench.common import configure_environment, create_bench_app, latency_summary
+
+DEFAULT_METHODS = 'scrypt:16384:8:1,scrypt:32768:8:1,pbkdf2:sha256:600000,pbkdf2:sha256:1000000'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--methods', default=DEFAULT_METHODS, help='comma-separated werkzeug method strings')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1, help='concurrent callers')
+    parser.add_argument('--seconds', type=float, default=3.0, help='duration of each measurement')
+    parser.add_argument('--pool', default='thread', choices=('thread', 'process', 'inline'))
+    return parser.parse_args()
+
+
+def run_for(seconds, threads, fn):
+    """Calls fn() from `threads` threads for `seconds`; returns (calls/sec, latencies in ms)"""
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    lock = threading.Lock()
+
+    def loop():
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            fn()
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(latencies) / (time.perf_counter() - started), latencies
+
+
+def main():
+    args = parse_args()
+    configure_environment(args.database_url)
+    cores = os.cpu_count() or 1
+    busy_threads = min(args.threads, cores)
+
+    from werkzeug.security import generate_password_hash, check_password_hash
+    report = {'cores': cores, 'threads': args.threads, 'pool': args.pool, 'methods': {}}
+
+    for method in (m.strip() for m in args.methods.split(',') if m.strip()):
+        stored = generate_password_hash('Password123', method)
+        single, single_latencies = run_for(args.seconds, 1, lambda: check_password_hash(stored, 'Password123'))
+        parallel, _ = run_for(args.seconds, args.threads, lambda: check_password_hash(stored, 'Password123'))
+
+        logins = login_throughput(args, method)
+        report['methods'][method] = {
+            'verify_ms': latency_summary(single_latencies)['p50_ms'],
+            'verifies_per_sec_single_thread': round(single, 1),
+            'verifies_per_sec_parallel': round(parallel, 1),
+            'verifies_per_sec_per_core': round(parallel / busy_threads, 1),
+            'logins_per_sec': logins['per_sec'],
+            'logins_per_sec_per_core': round(logins['per_sec'] / busy_threads, 1),
+            'login_latency': logins['latency'],
+        }
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def login_throughput(args, method):
+    """Successful logins/sec through the app (request handling + user lookup + pooled verification)"""
+    app = create_bench_app()
+    from backend.models import db, User
+    from backend.passwords import password_hasher
+    from backend.ratelimit import rate_limiter
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_POOL=args.pool, RATE_LIMIT_ENABLED=False)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User.query.filter_by(email='login@bench.procook').first()
+        if user is None:
+            user = User(name='Login Bench', email='login@bench.procook')
+            db.session.add(user)
+        user.set_password('Password123')  # hashed with the method under test, so no rehash happens mid-run
+        db.session.commit()
+
+    local = threading.local()
+
+    def login():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        response = local.client.post('/api/login', json={'email': 'login@bench.procook', 'password': 'Password123'})
+        if response.status_code != 200:
+            raise RuntimeError(f'Login failed with {response.status_code} for {method}')
+
+    per_sec, latencies = run_for(args.seconds, args.threads, login)
+    return {'per_sec': round(per_sec, 1), 'latency': latency_summary(latencies)}
+
+
+if __name__ == '__main__':
+    main()
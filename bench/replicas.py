@@ -0,0 +1,145 @@
+"""
+Read-replica routing check: drives reads and writes through the Flask test client, records which
+database served each request, and fails if routing, read-your-writes or replica fallback is wrong.
+
+Usage:
+    python -m bench.replicas
+    python -m bench.replicas --database-url postgresql://.../procook --replica-url postgresql://replica/procook
+Defaults to two SQLite files, the replica being a copy of the seeded primary (a replica frozen at that
+point, so it visibly lags every later write). Against Postgres, pass an empty primary whose streaming
+replica is --replica-url. A second, unreachable replica is always configured to exercise health checks.
+Prints a JSON report; exits non-zero when a check fails.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from functools import partial
+
+from bench.common import configure_environment, create_bench_app
+
+STICKY_SECONDS = 2
+# The server-side session store always reads the primary (sessions must see logins immediately)
+SESSION_STORE_SQL = re.compile(r'\bsessions\b')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help='primary; defaults to a throwaway SQLite file')
+    parser.add_argument('--replica-url', default=None, help='defaults to a SQLite copy of the primary')
+    parser.add_argument('--replication-timeout', type=float, default=10.0,
+                        help='seconds to wait for the seed data to reach a real replica')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    database_url = configure_environment(args.database_url)
+    sqlite = database_url.startswith('sqlite:')
+    replica_url = args.replica_url or database_url.replace('bench.db', 'bench-replica.db')
+    if sqlite == (args.replica_url is not None):
+        sys.exit('Pass --replica-url together with a --database-url that is not SQLite (or neither).')
+    down_url = 'sqlite:////nonexistent/procook/replica.db' if sqlite else 'postgresql://procook@127.0.0.1:1/procook'
+    os.environ.update(REPLICA_DATABASE_URLS=f'{replica_url},{down_url}', REPLICA_STICKY_SECONDS=str(STICKY_SECONDS),
+                      REPLICA_MAX_LAG_SECONDS='1', REPLICA_CHECK_INTERVAL='60')
+
+    from sqlalchemy import event
+    from backend.models import db, Recipe
+    from backend.cache import response_cache
+    from backend.replicas import replica_router
+    from bench.datagen import generate
+
+    app = create_bench_app()
+    served = set()
+    with app.app_context():
+        db.create_all(bind_key=None)  # the primary only: replicas receive schema and data by replication
+        generate(db, users=5, recipes=10, comments_per_recipe=2, saves_per_user=2)
+        db.session.commit()
+        if sqlite:
+            shutil.copyfile(database_url[len('sqlite:///'):], replica_url[len('sqlite:///'):])
+        else:
+            wait_for_replica(db.engines['replica_0'], db.select(db.func.count(Recipe.id)), args.replication_timeout)
+        own_recipe = db.session.scalar(db.select(Recipe.id).where(Recipe.user_id == 1).limit(1))
+        for key, engine in db.engines.items():
+            event.listen(engine, 'before_cursor_execute', partial(record, served, key or 'primary'))
+
+    checks = []
+
+    def request(name, client, method, path, expected, json_body=None, check=None):
+        """Runs one request; `expected` lists every database that must (and alone may) run its statements"""
+        served.clear()
+        response = client.open(path, method=method, json=json_body)
+        expected = {expected} if isinstance(expected, str) else set(expected)
+        ok = response.status_code < 400 and served == expected and (check is None or check(response.get_json()))
+        checks.append({'check': name, 'status': response.status_code, 'expected': sorted(expected),
+                       'servedBy': sorted(served), 'ok': bool(ok)})
+        return response
+
+    has_comment = lambda text: lambda body: text in json.dumps(body)
+    anonymous, member = app.test_client(), app.test_client()
+
+    request('anonymous read goes to the healthy replica', anonymous, 'GET', '/api/recipes/1/comments', 'replica_0')
+    for _ in range(10):
+        request('unreachable replica stays out of rotation', anonymous, 'GET', '/api/recipes/1/comments', 'replica_0')
+    request('login goes to the primary', member, 'POST', '/api/login', 'primary',
+            {'email': 'cook1@bench.procook', 'password': 'Password123'})
+    request('write goes to the primary', member, 'POST', '/api/recipes/1/comments', 'primary',
+            {'comment': 'Replica routing check comment'})
+    request('writer reads its own write from the primary', member, 'GET', '/api/recipes/1/comments', 'primary',
+            check=has_comment('Replica routing check comment'))
+    request('other clients keep reading the replica', anonymous, 'GET', '/api/recipes/1/comments', 'replica_0',
+            check=(lambda body: not has_comment('Replica routing check comment')(body)) if sqlite else None)
+    time.sleep(STICKY_SECONDS + 0.5)
+    request('writer returns to the replica after the sticky window', member, 'GET', '/api/saved-recipes', 'replica_0')
+
+    response_cache.backend.clear()
+    app.config['CACHE_BACKEND'] = 'lru'
+    response_cache.init_app(app)
+    path = f'/api/recipes/{own_recipe}'
+    request('response cache misses are built from the replica', anonymous, 'GET', path, 'replica_0')
+    request('response cache hits only read the validator from the replica', anonymous, 'GET', path, 'replica_0')
+    request('pinned writer updates the recipe', member, 'PUT', path, 'primary', {
+        'title': 'Pinned title', 'short_description': 'Edited while pinned to the primary',
+        'cuisine_type': 'Italian', 'category': 'Pasta', 'prep_time': 5, 'cook_time': 5, 'serving_size': 2,
+        'preparation_notes': 'Edited to check that the writer skips the cached copy.',
+        'ingredients': [{'name': 'Salt', 'measurement': '1 tsp'}],
+    })
+    request('pinned writer skips the cached copy', member, 'GET', path, 'primary',
+            check=lambda body: body['data']['title'] == 'Pinned title')
+
+    replica_router.max_lag = -1  # every replica now counts as lagging
+    with app.app_context():
+        for replica in replica_router.replicas:
+            replica_router.check(replica)
+    request('lagging replicas fall back to the primary', anonymous, 'GET', '/api/recipes/3/comments', 'primary')
+
+    with app.app_context():
+        health = replica_router.status()
+    report = {'database': database_url.split('://', 1)[0], 'replicas': health, 'checks': checks,
+              'ok': all(c['ok'] for c in checks)}
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    sys.exit(0 if report['ok'] else 1)
+
+
+def record(served, name, conn, cursor, statement, *args):
+    if not SESSION_STORE_SQL.search(statement):
+        served.add(name)
+
+
+def wait_for_replica(engine, count_query, timeout):
+    """Polls the replica until the seed data has been replayed"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with engine.connect() as conn:
+            if conn.execute(count_query).scalar():
+                return
+        time.sleep(0.2)
+    sys.exit(f'Seed data did not reach the replica within {timeout}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Route micro-benchmarks: drives every blueprint through the Flask test client against a generated
+dataset and reports p50/p95/p99 latency plus SQL queries per request for each route.
+
+Usage:
+    python -m bench.routes --users 200 --recipes 2000 --iterations 200 > bench_output.json
+    python -m bench.routes --database-url postgresql://.../procook_bench --only recipes.index
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from bench.common import configure_environment, create_bench_app, QueryCounter, latency_summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--recipes', type=int, default=1000)
+    parser.add_argument('--comments-per-recipe', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', action='append', default=[], help='run only these scenario names (repeatable)')
+    parser.add_argument('--skip-generate', action='store_true', help='reuse data already in --database-url')
+    return parser.parse_args()
+
+
+def scenarios(n_recipes):
+    """(name, method, path factory, json body factory, needs login) - writes are paired so data stays stable"""
+    rid = lambda rng: rng.randint(1, n_recipes)
+    return [
+        ('recipes.index', 'GET', lambda rng: '/api/recipes?limit=24', None, False),
+        ('recipes.index.filtered', 'GET', lambda rng: '/api/recipes?limit=24&cuisine_type=Thai&max_total_time=60', None, False),
+        ('recipes.search', 'GET', lambda rng: '/api/recipes/search?q=garlic+tomato', None, False),
+        ('recipes.show', 'GET', lambda rng: f'/api/recipes/{rid(rng)}', None, False),
+        ('recipes.state', 'POST', lambda rng: '/api/recipes/state',
+         lambda rng: {'ids': [rid(rng) for _ in range(24)]}, True),
+        ('comments.index', 'GET', lambda rng: f'/api/recipes/{rid(rng)}/comments', None, False),
+        ('ratings.show_public', 'GET', lambda rng: f'/api/recipes/{rid(rng)}/rating/public', None, False),
+        ('ratings.show', 'GET', lambda rng: f'/api/recipes/{rid(rng)}/rating', None, True),
+        ('ratings.store', 'POST', lambda rng: f'/api/recipes/{rid(rng)}/rating',
+         lambda rng: {'rating': rng.randint(1, 5)}, True),
+        ('saved.index', 'GET', lambda rng: '/api/saved-recipes', None, True),
+        ('saved.check', 'GET', lambda rng: f'/api/recipes/{rid(rng)}/saved', None, True),
+        ('auth.my_recipes', 'GET', lambda rng: '/api/my-recipes', None, True),
+        ('auth.profile', 'GET', lambda rng: '/api/profile', None, True),
+        ('auth.get_user', 'GET', lambda rng: '/api/user', None, True),
+    ]
+
+
+def run_scenario(app, counter, client, scenario, iterations, warmup, rng):
+    name, method, path_for, body_for, _ = scenario
+    latencies, queries, statuses = [], [], {}
+    for i in range(warmup + iterations):
+        path = path_for(rng)
+        body = body_for(rng) if body_for else None
+        counter.count = 0
+        with counter.listening():
+            start = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            elapsed = (time.perf_counter() - start) * 1000
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        queries.append(counter.count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    result = latency_summary(latencies)
+    result['queries_per_request'] = round(sum(queries) / len(queries), 2) if queries else None
+    result['max_queries'] = max(queries) if queries else None
+    result['status_codes'] = statuses
+    return name, result
+
+
+def main():
+    args = parse_args()
+    database_url = configure_environment(args.database_url)
+
+    from backend.models import db
+    from bench.datagen import generate
+
+    app = create_bench_app()
+    report = {'database': database_url.split('://', 1)[0], 'iterations': args.iterations, 'dataset': None, 'routes': {}}
+    with app.app_context():
+        db.create_all()
+        if not args.skip_generate:
+            report['dataset'] = generate(db, users=args.users, recipes=args.recipes,
+                                         comments_per_recipe=args.comments_per_recipe)
+        counter = QueryCounter(db.engine)
+
+    anonymous = app.test_client()
+    member = app.test_client()
+    login = member.post('/api/login', json={'email': 'cook1@bench.procook', 'password': 'Password123'})
+    if login.status_code != 200:
+        sys.exit(f'Benchmark login failed ({login.status_code}); generate data first or drop --skip-generate')
+
+    rng = random.Random(7)
+    for scenario in scenarios(args.recipes):
+        if args.only and scenario[0] not in args.only:
+            continue
+        client = member if scenario[4] else anonymous
+        name, result = run_scenario(app, counter, client, scenario, args.iterations, args.warmup, rng)
+        report['routes'][name] = result
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -9,14 +9,18 @@ CREATE TABLE IF NOT EXISTS users (
     email_verified_at TIMESTAMP NULL,
     password VARCHAR(255) NOT NULL,
     remember_token VARCHAR(100) NULL,
+    session_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Login revocation counter for databases created before it existed
+ALTER TABLE users ADD COLUMN IF NOT EXISTS session_version INTEGER NOT NULL DEFAULT 0;
+
 -- Create recipes table
 CREATE TABLE IF NOT EXISTS recipes (
     id BIGSERIAL PRIMARY KEY,
-    user_id BIGINT NOT NULL,
+    user_id BIGINT NULL,
     title VARCHAR(255) NOT NULL,
     short_description TEXT NOT NULL,
     image VARCHAR(255) NULL,
@@ -27,11 +31,26 @@ CREATE TABLE IF NOT EXISTS recipes (
     total_time INTEGER NOT NULL,
     serving_size INTEGER NOT NULL,
     preparation_notes TEXT NULL,
+    ratings_sum INTEGER NOT NULL DEFAULT 0,
+    ratings_count INTEGER NOT NULL DEFAULT 0,
+    ratings_updated_at TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
 );
 
+-- Denormalized rating aggregates for databases created before these columns existed
+-- (backfill afterwards with: flask procook reconcile-ratings)
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS ratings_sum INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS ratings_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS ratings_updated_at TIMESTAMP NULL;
+
+-- Full-text search document (populate with: flask procook reindex-search)
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_vector TSVECTOR NULL;
+
+-- Resized image renditions (backfill with: flask procook process-images)
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS image_variants JSON NULL;
+
 -- Create ingredients table
 CREATE TABLE IF NOT EXISTS ingredients (
     id BIGSERIAL PRIMARY KEY,
@@ -50,13 +69,13 @@ CREATE TABLE IF NOT EXISTS ingredients (
 CREATE TABLE IF NOT EXISTS comments (
     id BIGSERIAL PRIMARY KEY,
     recipe_id BIGINT NOT NULL,
-    user_id BIGINT NOT NULL,
+    user_id BIGINT NULL,
     parent_id BIGINT NULL,
     comment TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (recipe_id) REFERENCES recipes(id) ON DELETE CASCADE,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
     FOREIGN KEY (parent_id) REFERENCES comments(id) ON DELETE CASCADE
 );
 
@@ -64,15 +83,27 @@ CREATE TABLE IF NOT EXISTS comments (
 CREATE TABLE IF NOT EXISTS ratings (
     id BIGSERIAL PRIMARY KEY,
     recipe_id BIGINT NOT NULL,
-    user_id BIGINT NOT NULL,
+    user_id BIGINT NULL,
     rating SMALLINT NOT NULL CHECK (rating >= 1 AND rating <= 5),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (recipe_id) REFERENCES recipes(id) ON DELETE CASCADE,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
     UNIQUE (recipe_id, user_id)
 );
 
+-- Deleting an account keeps its recipes, comments and ratings, detached from the user (as in backend/models.py);
+-- databases created when these foreign keys cascaded are switched over here
+ALTER TABLE recipes ALTER COLUMN user_id DROP NOT NULL;
+ALTER TABLE recipes DROP CONSTRAINT IF EXISTS recipes_user_id_fkey;
+ALTER TABLE recipes ADD CONSTRAINT recipes_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL;
+ALTER TABLE comments ALTER COLUMN user_id DROP NOT NULL;
+ALTER TABLE comments DROP CONSTRAINT IF EXISTS comments_user_id_fkey;
+ALTER TABLE comments ADD CONSTRAINT comments_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL;
+ALTER TABLE ratings ALTER COLUMN user_id DROP NOT NULL;
+ALTER TABLE ratings DROP CONSTRAINT IF EXISTS ratings_user_id_fkey;
+ALTER TABLE ratings ADD CONSTRAINT ratings_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL;
+
 -- Create saved_recipes table
 CREATE TABLE IF NOT EXISTS saved_recipes (
     id BIGSERIAL PRIMARY KEY,
@@ -85,16 +116,61 @@ CREATE TABLE IF NOT EXISTS saved_recipes (
     UNIQUE (user_id, recipe_id)
 );
 
+-- Create sessions table (server-side sessions, keyed by the SHA-256 of the cookie value)
+CREATE TABLE IF NOT EXISTS sessions (
+    id VARCHAR(64) PRIMARY KEY,
+    user_id BIGINT NULL,
+    data TEXT NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Create jobs table (deferred work for `flask procook worker`)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    queue VARCHAR(50) NOT NULL DEFAULT 'default',
+    name VARCHAR(100) NOT NULL,
+    payload JSON NOT NULL DEFAULT '{}',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(255) NULL,
+    locked_at TIMESTAMP NULL,
+    last_error TEXT NULL,
+    dedupe_key VARCHAR(255) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_recipes_user_id ON recipes(user_id);
+-- Keyset pagination indexes for GET /api/recipes (filter column, created_at, id)
+CREATE INDEX IF NOT EXISTS ix_recipes_created_id ON recipes(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_recipes_user_created ON recipes(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_recipes_cuisine_created ON recipes(cuisine_type, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_recipes_category_created ON recipes(category, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_recipes_total_time ON recipes(total_time, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_recipes_image ON recipes(image);
+CREATE INDEX IF NOT EXISTS ix_recipes_search_vector ON recipes USING GIN (search_vector);
 CREATE INDEX IF NOT EXISTS idx_ingredients_recipe_id ON ingredients(recipe_id);
 CREATE INDEX IF NOT EXISTS idx_comments_recipe_id ON comments(recipe_id);
 CREATE INDEX IF NOT EXISTS idx_comments_user_id ON comments(user_id);
 CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments(parent_id);
+-- Keyset pagination of top-level comments per recipe
+CREATE INDEX IF NOT EXISTS ix_comments_recipe_parent_created ON comments(recipe_id, parent_id, created_at, id);
 CREATE INDEX IF NOT EXISTS idx_ratings_recipe_id ON ratings(recipe_id);
 CREATE INDEX IF NOT EXISTS idx_ratings_user_id ON ratings(user_id);
 CREATE INDEX IF NOT EXISTS idx_saved_recipes_user_id ON saved_recipes(user_id);
 CREATE INDEX IF NOT EXISTS idx_saved_recipes_recipe_id ON saved_recipes(recipe_id);
+-- Session revocation per user and the expiry sweeper
+CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions(user_id);
+CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions(expires_at);
+-- Job claiming (status/run_at per queue) and enqueue de-duplication
+CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs(queue, status, run_at, id);
+CREATE INDEX IF NOT EXISTS ix_jobs_dedupe_key ON jobs(dedupe_key);
 
 -- Verify tables created
 SELECT 'Tables Created Successfully!' as status;
@@ -20,17 +20,21 @@ export default function CommentSection({ recipeId }) {
     const [replyingToId, setReplyingToId] = useState(null);
     const [replyText, setReplyText] = useState('');
     const [loading, setLoading] = useState(false);
+    const [nextCursor, setNextCursor] = useState(null);
     const [submitting, setSubmitting] = useState(false);
 
     useEffect(() => {
         fetchComments();
     }, [recipeId]);
 
-    const fetchComments = async () => {
+    // Top-level comments are paginated by cursor; each page carries its full reply threads
+    const fetchComments = async (cursor = null) => {
         setLoading(true);
         try {
-            const response = await api.get(`/recipes/${recipeId}/comments`);
-            setComments(response.data.data || []);
+            const response = await api.get(`/recipes/${recipeId}/comments`, { params: cursor ? { cursor } : {} });
+            const page = response.data.data || [];
+            setComments(prev => cursor ? [...prev, ...page] : page);
+            setNextCursor(response.data.next_cursor || null);
         } catch (error) {
             console.error('Error fetching comments:', error);
         } finally {
@@ -384,6 +388,11 @@ export default function CommentSection({ recipeId }) {
             ) : (
                 <div className="comments-list">
                     {comments.map(comment => renderComment(comment))}
+                    {nextCursor && (
+                        <button type="button" className="btn-secondary" onClick={() => fetchComments(nextCursor)} disabled={loading}>
+                            Load more comments
+                        </button>
+                    )}
                 </div>
             )}
         </div>
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { IoStar, IoStarOutline } from 'react-icons/io5';
 import { useAuth } from '../context/AuthContext';
 import api from '../services/api';
+import { loadRecipeState } from '../services/recipeState';
 
 export default function RatingStars({ recipeId, recipeOwnerId, size = 'medium', showCount = true, interactive = true }) {
     const { user } = useAuth();
@@ -13,35 +14,22 @@ export default function RatingStars({ recipeId, recipeOwnerId, size = 'medium',
     const [isOwner, setIsOwner] = useState(false);
 
     useEffect(() => {
-        fetchPublicRating();
-        if (user) {
-            fetchUserRating();
-        }
+        fetchRatingState();
     }, [recipeId, user]);
 
-    const fetchPublicRating = async () => {
+    // Batched with every other card on the page into a single POST /recipes/state
+    const fetchRatingState = async () => {
         try {
-            const response = await api.get(`/recipes/${recipeId}/rating/public`);
-            const data = response.data.data;
+            const data = await loadRecipeState(recipeId);
+            if (!data) return;
             setAverageRating(data.averageRating || 0);
             setRatingsCount(data.ratingsCount || 0);
+            setUserRating(user ? data.userRating : null);
             
             // Check if current user is the recipe owner
-            if (user && data.recipeOwnerId === user.id) {
-                setIsOwner(true);
-            }
-        } catch (error) {
-            console.error('Error fetching public rating:', error);
-        }
-    };
-
-    const fetchUserRating = async () => {
-        try {
-            const response = await api.get(`/recipes/${recipeId}/rating`);
-            const data = response.data.data;
-            setUserRating(data.userRating);
+            setIsOwner(Boolean(user && data.recipeOwnerId === user.id));
         } catch (error) {
-            console.error('Error fetching user rating:', error);
+            console.error('Error fetching rating:', error);
         }
     };
 
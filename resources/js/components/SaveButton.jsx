@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { IoBookmark, IoBookmarkOutline } from 'react-icons/io5';
 import { useAuth } from '../context/AuthContext';
 import api from '../services/api';
+import { loadRecipeState } from '../services/recipeState';
 
 export default function SaveButton({ recipeId, size = 'medium', showLabel = true, onSaveChange }) {
     const { user } = useAuth();
@@ -14,10 +15,11 @@ export default function SaveButton({ recipeId, size = 'medium', showLabel = true
         }
     }, [recipeId, user]);
 
+    // Batched with every other card on the page into a single POST /recipes/state
     const checkSavedStatus = async () => {
         try {
-            const response = await api.get(`/recipes/${recipeId}/saved`);
-            setIsSaved(response.data.data.isSaved);
+            const data = await loadRecipeState(recipeId);
+            setIsSaved(Boolean(data?.isSaved));
         } catch (error) {
             console.error('Error checking saved status:', error);
         }
@@ -18,6 +18,7 @@ import {
     IoTrendingUpOutline,
     IoLockClosedOutline
 } from 'react-icons/io5';
+import { recipeImageProps } from '../services/images';
 
 export default function Home() {
     const [allRecipes, setAllRecipes] = useState([]);
@@ -195,7 +196,7 @@ export default function Home() {
                                 <div className="recipe-image">
                                     {recipe.image ? (
                                         <img 
-                                            src={`${import.meta.env.VITE_API_BASE_URL || ''}/uploads/${recipe.image}`} 
+                                            {...recipeImageProps(recipe, 'card')} 
                                             alt={recipe.title}
                                             onError={(e) => {
                                                 e.target.style.display = 'none';
@@ -23,6 +23,7 @@ import {
     IoPersonAddOutline,
     IoLogInOutline
 } from 'react-icons/io5';
+import { recipeImageProps } from '../services/images';
 
 export default function RecipeDetail() {
     const { id } = useParams();
@@ -162,7 +163,7 @@ export default function RecipeDetail() {
                 {recipe.image && (
                     <div className="recipe-detail-image-container">
                         <img 
-                            src={`${import.meta.env.VITE_API_BASE_URL || ''}/uploads/${recipe.image}`} 
+                            {...recipeImageProps(recipe, 'detail')} 
                             alt={recipe.title}
                             className="recipe-detail-image"
                         />
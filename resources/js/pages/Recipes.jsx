@@ -15,9 +15,13 @@ import {
     IoAddCircleOutline,
     IoGridOutline
 } from 'react-icons/io5';
+import { recipeImageProps } from '../services/images';
 
 export default function Recipes() {
     const [recipes, setRecipes] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [cuisineTypes, setCuisineTypes] = useState([]);
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
     const [filterCuisine, setFilterCuisine] = useState('');
@@ -35,19 +39,32 @@ export default function Recipes() {
 
     useEffect(() => {
         fetchRecipes();
-    }, []);
+    }, [filterCuisine]);
 
-    const fetchRecipes = async () => {
+    // Fetches one keyset page; cuisine filtering happens server-side
+    const fetchRecipes = async (cursor = null) => {
         try {
-            const response = await api.get('/recipes');
-            setRecipes(response.data.data || response.data);
+            const params = {};
+            if (filterCuisine) params.cuisine_type = filterCuisine;
+            if (cursor) params.cursor = cursor;
+            const response = await api.get('/recipes', { params });
+            const page = response.data.data || [];
+            setRecipes(prev => cursor ? [...prev, ...page] : page);
+            setNextCursor(response.data.next_cursor || null);
+            setCuisineTypes(prev => [...new Set([...prev, ...page.map(r => r.cuisine_type)])].filter(Boolean));
         } catch (error) {
             console.error('Error:', error);
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
+    const handleLoadMore = () => {
+        setLoadingMore(true);
+        fetchRecipes(nextCursor);
+    };
+
     const handleRecipeClick = (e, recipeId) => {
         e.preventDefault();
         requireAuth(
@@ -64,13 +81,9 @@ export default function Recipes() {
         );
     };
 
-    const cuisineTypes = [...new Set(recipes.map(r => r.cuisine_type))].filter(Boolean);
-
     const filteredRecipes = recipes.filter(recipe => {
-        const matchesSearch = recipe.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                             recipe.short_description?.toLowerCase().includes(searchTerm.toLowerCase());
-        const matchesCuisine = !filterCuisine || recipe.cuisine_type === filterCuisine;
-        return matchesSearch && matchesCuisine;
+        return recipe.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
+               recipe.short_description?.toLowerCase().includes(searchTerm.toLowerCase());
     });
 
     if (loading) {
@@ -182,7 +195,7 @@ export default function Recipes() {
                             <div className="recipe-image">
                                 {recipe.image ? (
                                     <img 
-                                        src={`${import.meta.env.VITE_API_BASE_URL || ''}/uploads/${recipe.image}`} 
+                                        {...recipeImageProps(recipe, 'card')} 
                                         alt={recipe.title}
                                         onError={(e) => {
                                             e.target.style.display = 'none';
@@ -229,6 +242,14 @@ export default function Recipes() {
                     ))}
                 </div>
             )}
+
+            {nextCursor && (
+                <div style={{ display: 'flex', justifyContent: 'center', marginTop: '2rem' }}>
+                    <button onClick={handleLoadMore} className="btn-primary" disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load More Recipes'}
+                    </button>
+                </div>
+            )}
             
             {/* Auth Prompt Modal */}
             <AuthPrompt 
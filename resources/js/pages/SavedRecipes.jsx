@@ -12,6 +12,7 @@ import {
     IoPersonOutline,
     IoHeartOutline
 } from 'react-icons/io5';
+import { recipeImageProps } from '../services/images';
 
 export default function SavedRecipes() {
     const { user } = useAuth();
@@ -95,7 +96,7 @@ export default function SavedRecipes() {
                             <div className="recipe-image">
                                 {recipe.image ? (
                                     <img 
-                                        src={`${import.meta.env.VITE_API_BASE_URL || ''}/uploads/${recipe.image}`} 
+                                        {...recipeImageProps(recipe, 'card')} 
                                         alt={recipe.title}
                                         onError={(e) => {
                                             e.target.style.display = 'none';
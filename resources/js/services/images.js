@@ -0,0 +1,28 @@
+const uploadsBase = `${import.meta.env.VITE_API_BASE_URL || ''}/uploads/`;
+
+// Card images fill a grid column; the detail image spans the content width
+const SIZES = {
+    card: '(max-width: 640px) 100vw, (max-width: 1024px) 50vw, 33vw',
+    detail: '(max-width: 1200px) 100vw, 1200px',
+};
+
+// Returns <img> props for a recipe image: a WebP srcset over the rendered variants (image_variants)
+// with the JPEG rendition as src, or the original upload while variants are still being processed.
+export const recipeImageProps = (recipe, size = 'card') => {
+    const variants = recipe.image_variants;
+    if (!variants) {
+        return { src: uploadsBase + recipe.image };
+    }
+
+    const entries = Object.values(variants).sort((a, b) => a.width - b.width);
+    const srcSet = [...new Map(entries.map(v => [v.width, `${uploadsBase}${v.webp} ${v.width}w`])).values()].join(', ');
+    const fallback = variants[size] || entries[entries.length - 1];
+    return {
+        src: uploadsBase + fallback.jpeg,
+        srcSet,
+        sizes: SIZES[size] || SIZES.card,
+        width: fallback.width,
+        height: fallback.height,
+        loading: size === 'card' ? 'lazy' : undefined,
+    };
+};
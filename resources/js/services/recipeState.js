@@ -0,0 +1,31 @@
+import api from './api';
+
+// Batches per-card state lookups (saved, my rating, averages) into one POST /recipes/state call.
+// Components call loadRecipeState(id); every id requested in the same tick shares a request.
+let pending = new Map();
+let timer = null;
+
+const flush = async () => {
+    const batch = pending;
+    pending = new Map();
+    timer = null;
+
+    const ids = [...batch.keys()];
+    for (let i = 0; i < ids.length; i += 100) {
+        const chunk = ids.slice(i, i + 100);
+        try {
+            const response = await api.post('/recipes/state', { ids: chunk });
+            const data = response.data.data || {};
+            chunk.forEach(id => batch.get(id).forEach(({ resolve }) => resolve(data[id] || null)));
+        } catch (error) {
+            chunk.forEach(id => batch.get(id).forEach(({ reject }) => reject(error)));
+        }
+    }
+};
+
+export const loadRecipeState = (recipeId) => new Promise((resolve, reject) => {
+    const id = String(recipeId);
+    if (!pending.has(id)) pending.set(id, []);
+    pending.get(id).push({ resolve, reject });
+    if (!timer) timer = setTimeout(flush, 0);
+});
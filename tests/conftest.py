@@ -0,0 +1,29 @@
+import pytest
+from backend.app import create_app
+from backend.config import config, DevelopmentConfig
+from backend.models import db
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Builds an app on a throwaway SQLite file; keyword arguments override config settings"""
+    def factory(**settings):
+        settings.setdefault('SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primary.db"}')
+        settings.setdefault('UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+        testing_config = type('TestingConfig', (DevelopmentConfig,), dict(TESTING=True, **settings))
+        monkeypatch.setitem(config, 'testing', testing_config)
+        app = create_app('testing')
+        with app.app_context():
+            db.create_all(bind_key=None)
+        return app
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,82 @@
+import fnmatch
+import math
+import time
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis-py calls made by RedisCache, RedisSessionStore and RedisCounter.
+    Values come back as bytes like redis-py's; `clock` can be replaced to step through expiry.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.data = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= self.clock():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = self._encode(value)
+        if ex is not None:
+            self.expires[key] = self.clock() + ex
+        else:
+            self.expires.pop(key, None)
+        return True
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = self._encode(value)
+        return value
+
+    def expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self.expires[key] = self.clock() + seconds
+        return True
+
+    def ttl(self, key):
+        if not self._alive(key):
+            return -2
+        if key not in self.expires:
+            return -1
+        return math.ceil(self.expires[key] - self.clock())
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    def scan_iter(self, match='*'):
+        return [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatchcase(key, match)]
+
+    def sadd(self, key, *members):
+        members = {self._encode(m) for m in members}
+        current = self.data[key] if self._alive(key) else set()
+        added = len(members - current)
+        self.data[key] = current | members
+        return added
+
+    def smembers(self, key):
+        return set(self.data[key]) if self._alive(key) else set()
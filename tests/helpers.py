@@ -0,0 +1,28 @@
+RECIPE = {
+    'title': 'Tomato soup',
+    'short_description': 'A quick weeknight tomato soup',
+    'cuisine_type': 'Italian',
+    'category': 'Soup',
+    'prep_time': 10,
+    'cook_time': 20,
+    'serving_size': 2,
+    'preparation_notes': 'Simmer the tomatoes with garlic, then blend until smooth.',
+    'ingredients': [{'name': 'Tomato', 'measurement': '6'}, {'name': 'Garlic', 'measurement': '2 cloves'}],
+}
+
+
+def register(client, email='cook@example.com', password='Password123', name='Cook'):
+    response = client.post('/api/register', json={'name': name, 'email': email, 'password': password,
+                                                  'password_confirmation': password})
+    assert response.status_code == 201, response.get_json()
+    return response
+
+
+def login(client, email='cook@example.com', password='Password123'):
+    return client.post('/api/login', json={'email': email, 'password': password})
+
+
+def create_recipe(client, **fields):
+    response = client.post('/api/recipes', json=dict(RECIPE, **fields))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['data']
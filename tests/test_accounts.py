@@ -0,0 +1,45 @@
+from backend.jobs import job_queue
+from backend.models import db, Comment, Ingredient, Rating
+from tests.helpers import RECIPE, create_recipe, register
+
+
+def test_deleted_account_leaves_its_ratings_detached(app, client, monkeypatch):
+    register(client)
+    recipe = create_recipe(client)
+    rater = app.test_client()
+    register(rater, email='rater@example.com')
+    assert rater.post(f'/api/recipes/{recipe["id"]}/rating', json={'rating': 4}).status_code in (200, 201)
+
+    enqueued = []
+    enqueue = job_queue.enqueue
+
+    def recording_enqueue(name, payload=None, **options):
+        enqueued.append((name, payload))
+        return enqueue(name, payload, **options)
+    monkeypatch.setattr(job_queue, 'enqueue', recording_enqueue)
+    assert rater.delete('/api/profile').status_code == 200
+    assert enqueued == []  # content is detached in the deleting transaction
+
+    with app.app_context():
+        assert db.session.scalars(db.select(Rating.user_id)).all() == [None]
+    summary = client.get(f'/api/recipes/{recipe["id"]}/rating/public').get_json()['data']
+    assert (summary['ratingsCount'], summary['averageRating']) == (1, 4)
+
+
+def test_recipe_reusing_a_deleted_id_starts_without_children(make_app):
+    app = make_app(JOBS_INLINE=False)  # as in production: nothing queued has run yet
+    client = app.test_client()
+    register(client)
+    recipe = create_recipe(client)
+    rater = app.test_client()
+    register(rater, email='rater@example.com')
+    rater.post(f'/api/recipes/{recipe["id"]}/rating', json={'rating': 5})
+    rater.post(f'/api/recipes/{recipe["id"]}/comments', json={'comment': 'Left behind?'})
+    assert client.delete(f'/api/recipes/{recipe["id"]}').status_code == 200
+
+    reused = create_recipe(client, title='Pea soup')
+    assert reused['id'] == recipe['id']  # SQLite hands out the highest rowid again
+    with app.app_context():
+        assert db.session.scalars(db.select(Rating).where(Rating.recipe_id == reused['id'])).all() == []
+        assert db.session.scalars(db.select(Comment).where(Comment.recipe_id == reused['id'])).all() == []
+        assert db.session.scalar(db.select(db.func.count(Ingredient.id))) == len(RECIPE['ingredients'])
@@ -0,0 +1,48 @@
+import pytest
+from backend.passwords import HasherBusy, password_hasher
+from tests.helpers import login, register
+
+LIMITS = {'login': '100/minute', 'login_email': '3/minute', 'register': '100/minute'}
+
+
+@pytest.fixture
+def limited_app(make_app):
+    return make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS=LIMITS)
+
+
+def login_from(client, address, password='Password123', **environ):
+    return client.post('/api/login', json={'email': 'cook@example.com', 'password': password},
+                       environ_base=dict(REMOTE_ADDR=address, **environ))
+
+
+def test_failed_logins_from_one_address_do_not_lock_out_the_owner(limited_app):
+    register(limited_app.test_client())
+    attacker, owner = limited_app.test_client(), limited_app.test_client()
+    for _ in range(3):
+        assert login_from(attacker, '203.0.113.9', password='wrong-password').status_code == 401
+    assert login_from(attacker, '203.0.113.9', password='wrong-password').status_code == 429
+    assert login_from(owner, '198.51.100.4').status_code == 200
+
+
+@pytest.mark.parametrize('proxies, limited', [(0, True), (1, False)])
+def test_forwarded_client_address_is_trusted_only_behind_configured_proxies(make_app, proxies, limited):
+    app = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS=LIMITS, TRUSTED_PROXY_COUNT=proxies)
+    register(app.test_client())
+    client = app.test_client()
+    for i in range(3):
+        login_from(client, '10.0.0.1', password='wrong-password', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+    response = login_from(client, '10.0.0.1', password='wrong-password', HTTP_X_FORWARDED_FOR='203.0.113.50')
+    assert (response.status_code == 429) == limited
+
+
+def test_change_password_reports_a_busy_hasher(client, monkeypatch):
+    register(client)
+
+    def busy(password):
+        raise HasherBusy('Too many password checks in progress.')
+    monkeypatch.setattr(password_hasher, 'hash', busy)
+    response = client.put('/api/profile/password', json={'current_password': 'Password123',
+                                                         'new_password': 'Password456',
+                                                         'password_confirmation': 'Password456'})
+    assert response.status_code == 503
+    assert login(client).status_code == 200  # the old password still works
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+import pytest
+from tests.helpers import RECIPE, register
+
+
+def post_ndjson(client, records):
+    body = ''.join(json.dumps(record) + '\n' for record in records)
+    return client.post('/api/recipes/bulk', data=body, content_type='application/x-ndjson')
+
+
+@pytest.mark.parametrize('malformed, field', [
+    (dict(RECIPE, title=12345), 'title'),
+    (dict(RECIPE, ingredients=['salt']), 'ingredients.0'),
+    (dict(RECIPE, ingredients={'name': 'Salt'}), 'ingredients'),
+    (dict(RECIPE, ingredients=[{'name': 'Salt', 'measurement': 1}]), 'ingredients.0.measurement'),
+])
+def test_malformed_record_fails_its_row_only(client, malformed, field):
+    register(client)
+    response = post_ndjson(client, [RECIPE, malformed, dict(RECIPE, title='Pea soup')])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['imported'], body['failed']) == (2, 1)
+    assert [error['line'] for error in body['errors']] == [2]
+    assert list(body['errors'][0]['errors']) == [field]
+
+
+def test_unexpected_failure_hides_the_exception(client, monkeypatch):
+    register(client)
+    monkeypatch.setattr('backend.bulk.RecipeImporter._insert', lambda self, records: 1 / 0)
+    response = post_ndjson(client, [RECIPE])
+    assert response.status_code == 500
+    assert response.get_json()['message'] == 'Failed to import recipes. Please try again.'
+
+
+def test_malformed_csv_row_fails_its_row_only(client):
+    register(client)
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(RECIPE))
+    writer.writeheader()
+    for fields in ({}, {'preparation_notes': 'x' * (csv.field_size_limit() + 1)}, {'title': 'Pea soup'}):
+        writer.writerow(dict(RECIPE, ingredients=json.dumps(RECIPE['ingredients']), **fields))
+    response = client.post('/api/recipes/bulk', data=out.getvalue(), content_type='text/csv')
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['imported'], body['failed']) == (2, 1), body
+    assert body['errors'][0]['line'] == 3
+    assert body['errors'][0]['errors']['record'][0].startswith('Invalid CSV:')
@@ -0,0 +1,125 @@
+import pytest
+from backend.cache import LRUCache, RedisCache, recipe_tag, response_cache
+from tests.fake_redis import FakeRedis
+from tests.helpers import RECIPE, create_recipe, register
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['lru', 'redis'])
+def cache_backend(request, app):
+    backend = LRUCache(max_entries=64) if request.param == 'lru' else RedisCache(FakeRedis())
+    response_cache.backend = backend
+    return backend
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', '1', 60)
+    cache.set('b', '2', 60)
+    assert cache.get('a') == '1'  # 'a' is now the most recently used
+    cache.set('c', '3', 60)
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    assert cache.get('c') == '3'
+
+
+def test_lru_eviction_keeps_tag_versions():
+    cache = LRUCache(max_entries=1)
+    cache.bump(['recipe:1'])
+    cache.set('a', '1', 60)
+    cache.set('b', '2', 60)
+    assert cache.get_versions(['recipe:1']) == [1]
+
+
+def test_lru_entries_expire():
+    cache = LRUCache()
+    cache.set('a', '1', 0)
+    assert cache.get('a') is None
+
+
+def test_redis_backend_expires_entries_and_counts_versions():
+    clock = Clock()
+    cache = RedisCache(FakeRedis(clock=clock))
+    cache.set('a', '1', 30)
+    assert cache.get('a') == '1'
+    clock.now += 31
+    assert cache.get('a') is None
+
+    assert cache.get_versions(['x', 'y']) == [0, 0]
+    cache.bump(['x'])
+    cache.bump(['x', 'y'])
+    assert cache.get_versions(['x', 'y']) == [2, 1]
+    cache.clear()
+    assert cache.get_versions(['x']) == [0]
+
+
+def test_detail_served_from_cache_until_its_recipe_changes(app, client, cache_backend):
+    register(client)
+    recipe = create_recipe(client)
+    other = create_recipe(client, title='Pea soup')
+    anonymous = app.test_client()
+
+    assert anonymous.get(f'/api/recipes/{recipe["id"]}').status_code == 200
+    hits = response_cache.hits
+    assert anonymous.get(f'/api/recipes/{recipe["id"]}').status_code == 200
+    assert response_cache.hits == hits + 1
+
+    # Another recipe's tag leaves this entry alone
+    with app.test_request_context():
+        response_cache.invalidate(recipe_tag(other['id']))
+    anonymous.get(f'/api/recipes/{recipe["id"]}')
+    assert response_cache.hits == hits + 2
+
+    response = client.put(f'/api/recipes/{recipe["id"]}', json=dict(RECIPE, title='Roasted tomato soup'))
+    assert response.status_code == 200
+    misses = response_cache.misses
+    body = anonymous.get(f'/api/recipes/{recipe["id"]}').get_json()
+    assert response_cache.misses == misses + 1
+    assert body['data']['title'] == 'Roasted tomato soup'
+
+
+def test_new_comment_invalidates_only_the_comment_thread(app, client, cache_backend):
+    register(client)
+    recipe = create_recipe(client)
+    anonymous = app.test_client()
+    detail, comments = f'/api/recipes/{recipe["id"]}', f'/api/recipes/{recipe["id"]}/comments'
+    anonymous.get(detail)
+    anonymous.get(comments)
+
+    assert client.post(comments, json={'comment': 'Lovely and simple.'}).status_code == 201
+    hits, misses = response_cache.hits, response_cache.misses
+    anonymous.get(detail)
+    body = anonymous.get(comments).get_json()
+    assert (response_cache.hits, response_cache.misses) == (hits + 1, misses + 1)
+    assert 'Lovely and simple.' in str(body)
+
+
+def test_response_is_not_stored_when_invalidated_while_the_view_runs(app, client, cache_backend, monkeypatch):
+    register(client)
+    recipe = create_recipe(client)
+    anonymous = app.test_client()
+    path = f'/api/recipes/{recipe["id"]}'
+
+    from backend.routes import recipes
+    load_recipe_detail = recipes.load_recipe_detail
+
+    def load_then_write(recipe_id):
+        loaded = load_recipe_detail(recipe_id)
+        response_cache.invalidate(recipe_tag(recipe_id))  # a write commits after this read
+        return loaded
+    monkeypatch.setattr(recipes, 'load_recipe_detail', load_then_write)
+    assert anonymous.get(path).status_code == 200
+    monkeypatch.setattr(recipes, 'load_recipe_detail', load_recipe_detail)
+
+    misses = response_cache.misses
+    anonymous.get(path)
+    assert response_cache.misses == misses + 1  # nothing was stored under the new version
+    anonymous.get(path)
+    assert response_cache.misses == misses + 1
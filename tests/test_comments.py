@@ -0,0 +1,64 @@
+from sqlalchemy import event
+from backend.models import db
+from backend.routes.comments import load_comment_page
+from tests.helpers import create_recipe, register
+
+
+def post_comment(client, recipe_id, text, parent_id=None):
+    response = client.post(f'/api/recipes/{recipe_id}/comments', json={'comment': text, 'parent_id': parent_id})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['data']['id']
+
+
+def shape(nodes):
+    return [(n['comment'], shape(n['replies'])) for n in nodes]
+
+
+def test_comment_threads_are_nested_under_their_root_page(app, client):
+    register(client)
+    recipe_id = create_recipe(client)['id']
+    other_id = create_recipe(client)['id']
+    first = post_comment(client, recipe_id, 'first')
+    reply = post_comment(client, recipe_id, 'reply', first)
+    post_comment(client, recipe_id, 'deep reply', reply)
+    post_comment(client, recipe_id, 'second reply', first)
+    post_comment(client, recipe_id, 'newest')
+    post_comment(client, other_id, 'elsewhere')
+
+    page = client.get(f'/api/recipes/{recipe_id}/comments?limit=1').get_json()
+    assert shape(page['data']) == [('newest', [])]
+    page = client.get(f'/api/recipes/{recipe_id}/comments?limit=1&cursor={page["next_cursor"]}').get_json()
+    assert shape(page['data']) == [('first', [('reply', [('deep reply', [])]), ('second reply', [])])]
+    assert page['next_cursor'] is None
+    assert page['data'][0]['replies'][0]['user'] == {'id': page['data'][0]['user_id'], 'name': 'Cook'}
+
+
+def test_comment_page_costs_two_queries_whatever_the_depth(app, client):
+    register(client)
+    recipe_id = create_recipe(client)['id']
+    parent = post_comment(client, recipe_id, 'root')
+    for depth in range(6):
+        parent = post_comment(client, recipe_id, f'depth {depth}', parent)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            data, _ = load_comment_page(recipe_id, limit=10)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    assert len(statements) == 2
+    node, depth = data[0], 0
+    while node['replies']:
+        node, depth = node['replies'][0], depth + 1
+    assert depth == 6
+
+
+def test_comments_reject_a_malformed_cursor(client):
+    register(client)
+    recipe_id = create_recipe(client)['id']
+    assert client.get(f'/api/recipes/{recipe_id}/comments?cursor=nope').status_code == 422
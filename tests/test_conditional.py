@@ -0,0 +1,29 @@
+import pytest
+from tests.helpers import create_recipe, register
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip', 'identity'])
+def test_304_carries_the_same_validator_as_the_200(app, client, accept_encoding):
+    register(client)
+    recipe = create_recipe(client, preparation_notes='Simmer gently and stir. ' * 40)  # big enough to compress
+    anonymous = app.test_client()
+    path = f'/api/recipes/{recipe["id"]}'
+
+    first = anonymous.get(path, headers={'Accept-Encoding': accept_encoding})
+    assert first.status_code == 200
+    assert (first.headers.get('Content-Encoding') == 'gzip') == (accept_encoding == 'gzip')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    second = anonymous.get(path, headers={'Accept-Encoding': accept_encoding, 'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+
+
+def test_body_hash_etag_matches_on_revalidation(client):
+    register(client)
+    first = client.get('/api/profile', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200 and first.headers['ETag'].startswith('W/')
+    second = client.get('/api/profile', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
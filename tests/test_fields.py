@@ -0,0 +1,45 @@
+import pytest
+from tests.helpers import RECIPE, create_recipe, register
+
+FULL_KEYS = {'id', 'user_id', 'title', 'short_description', 'image', 'image_variants', 'cuisine_type', 'category',
+             'prep_time', 'cook_time', 'total_time', 'serving_size', 'preparation_notes', 'average_rating',
+             'ratings_count', 'created_at', 'updated_at', 'user'}
+
+
+@pytest.fixture(params=['compact', 'orm'])
+def app(request, make_app):
+    """Both serializer engines must project the same keys"""
+    return make_app() if request.param == 'compact' else make_app(COMPACT_SERIALIZER_ENDPOINTS=set())
+
+
+@pytest.fixture
+def cook(client):
+    register(client)
+    create_recipe(client)
+    return client
+
+
+@pytest.mark.parametrize('url', ['/api/recipes', '/api/my-recipes'])
+def test_fields_select_the_output_keys(cook, url):
+    default = cook.get(url).get_json()['data'][0]
+    assert set(default) == FULL_KEYS - {'preparation_notes'}
+    assert set(cook.get(f'{url}?fields=full').get_json()['data'][0]) == FULL_KEYS
+
+    picked = cook.get(f'{url}?fields=title,average_rating').get_json()['data'][0]
+    assert picked == {'id': picked['id'], 'title': RECIPE['title'], 'average_rating': 0}
+
+    with_ingredients = cook.get(f'{url}?fields=title,ingredients').get_json()['data'][0]
+    assert [i['name'] for i in with_ingredients['ingredients']] == ['Tomato', 'Garlic']
+
+
+@pytest.mark.parametrize('url', ['/api/recipes', '/api/my-recipes'])
+def test_unknown_fields_are_rejected(cook, url):
+    response = cook.get(f'{url}?fields=title,password')
+    assert response.status_code == 422
+    assert response.get_json()['errors'] == {'fields': ['Unknown field: password.']}
+
+
+def test_full_projection_matches_the_detail_view(cook):
+    listed = cook.get('/api/recipes?fields=full').get_json()['data'][0]
+    detail = cook.get(f'/api/recipes/{listed["id"]}').get_json()['data']
+    assert listed == {key: value for key, value in detail.items() if key != 'ingredients'}
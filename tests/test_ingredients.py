@@ -0,0 +1,49 @@
+from tests.helpers import RECIPE, create_recipe, register
+
+
+def update_ingredients(client, recipe_id, ingredients):
+    response = client.put(f'/api/recipes/{recipe_id}', json=dict(RECIPE, ingredients=ingredients))
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']['ingredients']
+
+
+def test_update_diffs_ingredients_in_place(client):
+    register(client)
+    recipe = create_recipe(client, ingredients=[{'name': 'Tomato', 'measurement': '6'},
+                                                {'name': 'Garlic', 'measurement': '2 cloves'},
+                                                {'name': 'Basil', 'measurement': '1 bunch'}])
+    tomato, garlic, basil = recipe['ingredients']
+
+    result = update_ingredients(client, recipe['id'], [
+        {'id': garlic['id'], 'name': 'Garlic', 'measurement': '3 cloves'},  # updated and moved up
+        {'name': 'Onion', 'measurement': '1'},                               # inserted
+        {'name': 'basil', 'measurement': '1 bunch'},                         # matched by name, no id sent
+    ])                                                                       # Tomato deleted
+
+    assert [(i['name'], i['measurement'], i['order']) for i in result] == [
+        ('Garlic', '3 cloves', 1), ('Onion', '1', 2), ('basil', '1 bunch', 3)]
+    assert result[0]['id'] == garlic['id'] and result[2]['id'] == basil['id']
+    assert result[1]['id'] not in {tomato['id'], garlic['id'], basil['id']}
+    detail = client.get(f'/api/recipes/{recipe["id"]}').get_json()['data']['ingredients']
+    assert [i['id'] for i in detail] == [i['id'] for i in result]
+
+
+def test_unchanged_ingredients_are_not_rewritten(client):
+    register(client)
+    recipe = create_recipe(client)
+    before = recipe['ingredients']
+
+    after = update_ingredients(client, recipe['id'], [
+        {'id': i['id'], 'name': i['name'], 'measurement': i['measurement']} for i in before])
+    assert [(i['id'], i['updated_at']) for i in after] == [(i['id'], i['updated_at']) for i in before]
+
+
+def test_ids_of_another_recipe_are_treated_as_new_rows(client):
+    register(client)
+    first, second = create_recipe(client), create_recipe(client)
+    foreign = second['ingredients'][0]
+
+    result = update_ingredients(client, first['id'], [{'id': foreign['id'], 'name': 'Salt', 'measurement': '1 tsp'}])
+    assert [i['name'] for i in result] == ['Salt'] and result[0]['id'] != foreign['id']
+    untouched = client.get(f'/api/recipes/{second["id"]}').get_json()['data']['ingredients']
+    assert untouched == second['ingredients']
@@ -0,0 +1,46 @@
+from datetime import datetime
+import pytest
+from backend.pagination import decode_cursor, encode_cursor
+from tests.helpers import create_recipe, register
+
+
+@pytest.fixture(params=['compact', 'orm'])
+def app(request, make_app):
+    """The list endpoint with the compact row serializer (default) and with ORM objects"""
+    return make_app() if request.param == 'compact' else make_app(COMPACT_SERIALIZER_ENDPOINTS=set())
+
+
+def walk(client, query):
+    ids, cursor = [], None
+    while True:
+        url = f'/api/recipes?{query}' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        ids += [r['id'] for r in body['data']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_cursor_pages_cover_every_recipe_once_newest_first(app, client):
+    register(client)
+    created = [create_recipe(client, cuisine_type='Thai' if i % 2 else 'Italian')['id'] for i in range(5)]
+
+    assert walk(client, 'limit=2') == created[::-1]
+    assert walk(client, 'limit=1&cuisine_type=Thai') == [created[3], created[1]]
+    assert client.get('/api/recipes?limit=5').get_json()['next_cursor'] is None
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor(None, 1)[:-2] + '!!', 'WzEsMiwzXQ'])
+def test_malformed_cursor_is_rejected(client, cursor):
+    response = client.get(f'/api/recipes?cursor={cursor}')
+    assert response.status_code == 422
+    assert response.get_json()['message'] == 'Invalid cursor.'
+
+
+def test_malformed_filter_is_rejected(client):
+    assert client.get('/api/recipes?max_total_time=soon').status_code == 422
+
+
+def test_cursor_round_trips_its_keyset():
+    created_at = datetime(2026, 1, 2, 3, 4, 5, 678000)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
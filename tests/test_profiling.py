@@ -0,0 +1,52 @@
+import logging
+import re
+import pytest
+from backend.profiling import query_profiler
+from tests.helpers import create_recipe, register
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(QUERY_PROFILING=True, DEBUG_ENDPOINTS=True, SLOW_QUERY_MS=10_000)
+    query_profiler.reset()
+    return app
+
+
+def timings(response):
+    return {m.group(1): m for m in (re.match(r'(\w+);dur=([\d.]+)(?:;desc="(.*)")?', h)
+                                    for h in response.headers.getlist('Server-Timing'))}
+
+
+def test_responses_carry_server_timing_per_request(client):
+    register(client)
+    create_recipe(client)
+    response = client.get('/api/recipes?fields=id,title')
+    entries = timings(response)
+    assert set(entries) == {'db', 'pool', 'app'}
+    queries = int(entries['db'].group(3).split()[0])
+    assert queries >= 1
+    assert float(entries['app'].group(2)) >= float(entries['db'].group(2))
+
+
+def test_profile_endpoint_aggregates_per_route(client):
+    client.get('/api/recipes')
+    client.get('/api/recipes')
+    rows = {r['route']: r for r in client.get('/api/_debug/profile?reset=1').get_json()['data']}
+    assert rows['GET /api/recipes']['requests'] == 2
+    assert rows['GET /api/recipes']['maxQueries'] >= 1
+    # Only the reporting request itself was recorded after the reset
+    assert [r['route'] for r in client.get('/api/_debug/profile').get_json()['data']] == ['GET /api/_debug/profile']
+
+
+def test_slow_queries_are_logged_with_their_route(client, caplog, monkeypatch):
+    monkeypatch.setattr(query_profiler, 'slow_query_ms', 0)
+    with caplog.at_level(logging.WARNING):
+        client.get('/api/recipes')
+    assert any('Slow query' in r.message and 'GET /api/recipes' in r.message for r in caplog.records)
+
+
+def test_disabled_profiler_adds_no_headers(make_app):
+    app = make_app(QUERY_PROFILING=False, DEBUG_ENDPOINTS=True)
+    client = app.test_client()
+    assert client.get('/api/recipes').headers.get('Server-Timing') is None
+    assert client.get('/api/_debug/profile').status_code == 404
@@ -0,0 +1,58 @@
+from backend.models import db, Recipe
+from tests.helpers import create_recipe, register
+
+
+def aggregates(app, recipe_id):
+    with app.app_context():
+        recipe = db.session.get(Recipe, recipe_id)
+        return recipe.ratings_sum, recipe.ratings_count, recipe.average_rating()
+
+
+def test_rating_writes_keep_the_recipe_aggregates_in_step(app):
+    owner, alice, bob = app.test_client(), app.test_client(), app.test_client()
+    register(owner)
+    recipe_id = create_recipe(owner)['id']
+    register(alice, email='alice@example.com')
+    register(bob, email='bob@example.com')
+
+    response = alice.post(f'/api/recipes/{recipe_id}/rating', json={'rating': 4})
+    assert response.get_json()['data']['averageRating'] == 4 and response.get_json()['data']['ratingsCount'] == 1
+    bob.post(f'/api/recipes/{recipe_id}/rating', json={'rating': 5})
+    assert aggregates(app, recipe_id) == (9, 2, 4.5)
+
+    alice.post(f'/api/recipes/{recipe_id}/rating', json={'rating': 2})  # update: count unchanged
+    assert aggregates(app, recipe_id) == (7, 2, 3.5)
+    public = owner.get(f'/api/recipes/{recipe_id}/rating/public').get_json()['data']
+    assert (public['averageRating'], public['ratingsCount']) == (3.5, 2)
+
+    assert bob.delete(f'/api/recipes/{recipe_id}/rating').status_code == 200
+    assert aggregates(app, recipe_id) == (2, 1, 2)
+    assert alice.delete(f'/api/recipes/{recipe_id}/rating').status_code == 200
+    assert aggregates(app, recipe_id) == (0, 0, 0)
+
+
+def test_rejected_ratings_leave_the_aggregates_alone(app):
+    owner, alice = app.test_client(), app.test_client()
+    register(owner)
+    recipe_id = create_recipe(owner)['id']
+    register(alice, email='alice@example.com')
+
+    assert owner.post(f'/api/recipes/{recipe_id}/rating', json={'rating': 5}).status_code == 403
+    assert alice.post(f'/api/recipes/{recipe_id}/rating', json={'rating': 9}).status_code == 422
+    assert alice.delete(f'/api/recipes/{recipe_id}/rating').status_code == 404
+    assert aggregates(app, recipe_id) == (0, 0, 0)
+
+
+def test_reconcile_repairs_drifted_aggregates(app):
+    owner, alice = app.test_client(), app.test_client()
+    register(owner)
+    recipe_id = create_recipe(owner)['id']
+    register(alice, email='alice@example.com')
+    alice.post(f'/api/recipes/{recipe_id}/rating', json={'rating': 3})
+    with app.app_context():
+        db.session.execute(db.update(Recipe).values(ratings_sum=40, ratings_count=10))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['procook', 'reconcile-ratings'])
+    assert result.exit_code == 0, result.output
+    assert aggregates(app, recipe_id) == (3, 1, 3)
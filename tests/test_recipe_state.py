@@ -0,0 +1,36 @@
+import pytest
+from tests.helpers import create_recipe, register
+
+
+def test_state_reports_saved_rating_and_aggregates_per_recipe(app):
+    owner, cook = app.test_client(), app.test_client()
+    owner_id = register(owner, email='owner@example.com').get_json()['data']['user']['id']
+    first, second = create_recipe(owner)['id'], create_recipe(owner)['id']
+    register(cook)
+    cook.post(f'/api/recipes/{first}/save')
+    cook.post(f'/api/recipes/{second}/rating', json={'rating': 4})
+
+    response = cook.post('/api/recipes/state', json={'ids': [first, second, 9999, str(first)]})
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert set(data) == {str(first), str(second)}  # unknown ids are absent, duplicates collapse
+    assert data[str(first)] == {'isSaved': True, 'userRating': None, 'averageRating': 0,
+                                'ratingsCount': 0, 'recipeOwnerId': owner_id}
+    assert data[str(second)]['isSaved'] is False
+    assert (data[str(second)]['userRating'], data[str(second)]['averageRating'],
+            data[str(second)]['ratingsCount']) == (4, 4, 1)
+
+
+def test_state_for_anonymous_visitors_has_no_personal_fields_set(app):
+    owner = app.test_client()
+    register(owner)
+    recipe_id = create_recipe(owner)['id']
+    data = app.test_client().post('/api/recipes/state', json={'ids': [recipe_id]}).get_json()['data']
+    assert data[str(recipe_id)]['isSaved'] is False and data[str(recipe_id)]['userRating'] is None
+
+
+@pytest.mark.parametrize('body', [{}, {'ids': []}, {'ids': 'abc'}, {'ids': ['x']}, {'ids': list(range(101))}])
+def test_state_validates_the_id_list(client, body):
+    response = client.post('/api/recipes/state', json=body)
+    assert response.status_code == 422
+    assert 'ids' in response.get_json()['errors']
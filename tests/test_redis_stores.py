@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from backend.ratelimit import RedisCounter
+from backend.sessions import RedisSessionStore
+from tests.fake_redis import FakeRedis
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_redis_counter_counts_per_key_and_window():
+    client = FakeRedis()
+    counter = RedisCounter(client)
+    assert [counter.hit('login:a', 60)[0] for _ in range(3)] == [1, 2, 3]
+    assert counter.hit('login:b', 60)[0] == 1
+    assert all(0 < client.ttl(key) <= 60 for key in client.scan_iter('procook:rl:*'))
+    counter.clear()
+    assert counter.hit('login:a', 60)[0] == 1
+
+
+def test_redis_session_store_round_trip_and_revocation():
+    clock = Clock()
+    store = RedisSessionStore(FakeRedis(clock=clock))
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    store.save('k1', '{"a":1}', 7, expires_at, new=True)
+    store.save('k2', '{"a":2}', 7, expires_at, new=True)
+    store.save('k3', '{"a":3}', 8, expires_at, new=True)
+
+    data, loaded_expiry = store.load('k1')
+    assert data == '{"a":1}'
+    assert abs((loaded_expiry - expires_at).total_seconds()) < 5
+    assert store.delete_for_user(7) == 2
+    assert store.load('k1') is None and store.load('k2') is None
+    assert store.load('k3') is not None
+
+    clock.now += 3601
+    assert store.load('k3') is None
+
+
+def test_redis_session_touch_keeps_the_user_set_alive():
+    clock = Clock()
+    client = FakeRedis(clock=clock)
+    store = RedisSessionStore(client)
+    store.save('k1', '{"a":1}', 7, datetime.utcnow() + timedelta(hours=1), new=True)
+
+    clock.now += 3000
+    store.touch('k1', datetime.utcnow() + timedelta(hours=1), 7)
+    clock.now += 3000
+    assert store.load('k1') is not None
+    assert store.delete_for_user(7) == 1
+    assert store.load('k1') is None
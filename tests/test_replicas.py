@@ -0,0 +1,137 @@
+import re
+import shutil
+import threading
+import time
+from functools import partial
+import pytest
+from sqlalchemy import event
+from backend.cache import response_cache
+from backend.models import db
+from backend.replicas import PRIMARY_COOKIE, replica_router
+from tests.helpers import RECIPE, create_recipe, register
+
+DOWN_URL = 'sqlite:////nonexistent/procook/replica.db'
+STICKY_SECONDS = 1
+# The server-side session store always reads the primary
+SESSION_STORE_SQL = re.compile(r'\bsessions\b')
+
+
+def record(served, name, conn, cursor, statement, *args):
+    if not SESSION_STORE_SQL.search(statement):
+        served.add(name)
+
+
+def make_replicated_app(make_app, tmp_path, replica_urls, **settings):
+    app = make_app(REPLICA_DATABASE_URLS=replica_urls, REPLICA_STICKY_SECONDS=STICKY_SECONDS,
+                   REPLICA_MAX_LAG_SECONDS=0.5, REPLICA_CHECK_INTERVAL=60, **settings)
+    app.served = set()
+    with app.app_context():
+        for key, engine in db.engines.items():
+            event.listen(engine, 'before_cursor_execute', partial(record, app.served, key or 'primary'))
+    return app
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    return make_replicated_app(make_app, tmp_path, [f'sqlite:///{tmp_path / "replica.db"}', DOWN_URL])
+
+
+@pytest.fixture
+def recipe(app, tmp_path):
+    """A recipe written by a separate client, then replicated by copying the primary file"""
+    author = app.test_client()
+    register(author, email='author@example.com')
+    recipe = create_recipe(author)
+    shutil.copyfile(tmp_path / 'primary.db', tmp_path / 'replica.db')
+    return recipe
+
+
+def served_by(app, client, method, path, **kwargs):
+    app.served.clear()
+    response = client.open(path, method=method, **kwargs)
+    assert response.status_code < 400, response.get_json()
+    return set(app.served)
+
+
+def test_reads_go_to_the_healthy_replica(app, client, recipe):
+    for _ in range(5):
+        assert served_by(app, client, 'GET', f'/api/recipes/{recipe["id"]}/comments') == {'replica_0'}
+    assert [r['healthy'] for r in replica_router.status()] == [True, False]
+
+
+def test_write_pins_the_client_until_the_pin_expires(app, client, recipe):
+    comments = f'/api/recipes/{recipe["id"]}/comments'
+    register(client)
+    assert client.get_cookie(PRIMARY_COOKIE) is not None
+    assert served_by(app, client, 'POST', comments, json={'comment': 'Pinned comment'}) == {'primary'}
+    assert served_by(app, client, 'GET', comments) == {'primary'}
+    assert 'Pinned comment' in client.get(comments).get_data(as_text=True)
+
+    time.sleep(STICKY_SECONDS + 0.1)
+    assert served_by(app, client, 'GET', comments) == {'replica_0'}
+
+
+def test_read_only_post_reads_the_replica_without_pinning(app, client, recipe):
+    assert served_by(app, client, 'POST', '/api/recipes/state', json={'ids': [recipe['id']]}) == {'replica_0'}
+    assert client.get_cookie(PRIMARY_COOKIE) is None
+    assert served_by(app, client, 'GET', f'/api/recipes/{recipe["id"]}/comments') == {'replica_0'}
+
+
+def test_failed_write_does_not_pin(app, client, recipe):
+    register(client)
+    client.delete_cookie(PRIMARY_COOKIE)
+    response = client.post(f'/api/recipes/{recipe["id"]}/comments', json={'comment': ''})
+    assert response.status_code == 422
+    assert client.get_cookie(PRIMARY_COOKIE) is None
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(make_app, tmp_path):
+    app = make_replicated_app(make_app, tmp_path, [DOWN_URL])
+    assert served_by(app, app.test_client(), 'GET', '/api/recipes') == {'primary'}
+    [status] = replica_router.status()
+    assert not status['healthy'] and status['error']
+
+
+def test_due_probes_run_outside_the_request(app, client, recipe, monkeypatch):
+    client.get(f'/api/recipes/{recipe["id"]}/comments')  # first probes, inline
+    probed, release = [], threading.Event()
+
+    def slow_check(replica):
+        probed.append(threading.current_thread().name)
+        release.wait(5)
+        return replica.healthy
+    monkeypatch.setattr(replica_router, 'check', slow_check)
+    monkeypatch.setattr(replica_router, 'check_interval', 0)
+
+    assert served_by(app, client, 'GET', f'/api/recipes/{recipe["id"]}/comments') == {'replica_0'}
+    release.set()
+    deadline = time.monotonic() + 5
+    while any(r.lock.locked() for r in replica_router.replicas) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(probed) == ['probe-replica_0', 'probe-replica_1']
+
+
+def test_cache_is_not_filled_from_a_replica_right_after_an_invalidation(app, client, recipe, tmp_path):
+    path = f'/api/recipes/{recipe["id"]}'
+    author = app.test_client()
+    assert author.post('/api/login', json={'email': 'author@example.com', 'password': 'Password123'}).status_code == 200
+    assert author.put(path, json=dict(RECIPE, title='Edited title')).status_code == 200
+
+    # The replica (a copy taken before the edit) still returns the old title: it must not be cached
+    misses = response_cache.misses
+    assert client.get(path).get_json()['data']['title'] == RECIPE['title']
+    assert client.get(path).get_json()['data']['title'] == RECIPE['title']
+    assert response_cache.misses == misses + 2
+
+    shutil.copyfile(tmp_path / 'primary.db', tmp_path / 'replica.db')  # the replica catches up
+    time.sleep(STICKY_SECONDS + 0.1)
+    assert client.get(path).get_json()['data']['title'] == 'Edited title'
+    hits = response_cache.hits
+    assert client.get(path).get_json()['data']['title'] == 'Edited title'
+    assert response_cache.hits == hits + 1
+
+
+def test_lag_settings_are_only_checked_with_replicas(make_app):
+    make_app(REPLICA_DATABASE_URLS=[], REPLICA_STICKY_SECONDS=1, REPLICA_MAX_LAG_SECONDS=5)
+    with pytest.raises(ValueError):
+        make_app(REPLICA_DATABASE_URLS=[DOWN_URL], REPLICA_STICKY_SECONDS=1, REPLICA_MAX_LAG_SECONDS=5)
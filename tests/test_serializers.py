@@ -0,0 +1,30 @@
+import pytest
+from backend.models import db, Recipe
+from backend.serializers import (RECIPE_FULL_FIELDS, json_response, orjson, recipe_rows_select,
+                                 serialize_recipe_rows)
+from tests.helpers import create_recipe, register
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_orjson_output_matches_the_json_provider(app, monkeypatch):
+    app.json.compact = True  # production output: compact and key-sorted
+    payload = {'title': 'Crème brûlée 🍮', 'notes': 'line break "quoted" \\', 'é': [1, 2.5, None, True]}
+    with app.test_request_context():
+        expected = app.json.response(payload).get_data()
+        monkeypatch.setattr(app.json, 'response', None)  # the orjson path must not fall back
+        response = json_response(payload, status=201)
+    assert response.status_code == 201
+    assert response.get_data() == expected and expected.isascii()
+
+
+def test_compact_rows_match_the_model_dicts(app, client):
+    register(client)
+    create_recipe(client, title='Pâté en croûte')
+    with app.app_context():
+        db.session.execute(db.update(Recipe).values(ratings_sum=7, ratings_count=2))
+        rows = db.session.execute(recipe_rows_select(RECIPE_FULL_FIELDS)).all()
+        expected = [r.to_dict(include_user=True) for r in Recipe.query.all()]
+        assert serialize_recipe_rows(rows, RECIPE_FULL_FIELDS) == expected
+        rating_fields = frozenset({'id', 'average_rating'})
+        rows = db.session.execute(recipe_rows_select(rating_fields)).all()
+        assert serialize_recipe_rows(rows, rating_fields) == [{'id': expected[0]['id'], 'average_rating': 3.5}]
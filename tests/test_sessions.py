@@ -0,0 +1,66 @@
+import pytest
+from backend.models import db, User
+from backend.passwords import password_hasher
+from tests.helpers import login, register
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(IDENTITY_TTL=0)  # every request checks the login against the users table
+
+
+def stored_hash(app):
+    with app.app_context():
+        return db.session.scalar(db.select(User.password))
+
+
+def drop_session_cookie(app, client):
+    """Leaves only the remember cookie, as after a browser restart"""
+    client.delete_cookie(app.config['SESSION_COOKIE_NAME'])
+
+
+def test_rehash_on_login_keeps_other_devices_signed_in(app, monkeypatch):
+    laptop, phone = app.test_client(), app.test_client()
+    register(laptop)
+    old_hash = stored_hash(app)
+
+    monkeypatch.setattr(password_hasher, 'method', 'pbkdf2:sha256:1000')
+    monkeypatch.setattr(password_hasher, '_reference_hash', None)
+    assert login(phone).status_code == 200
+    assert stored_hash(app) != old_hash and stored_hash(app).startswith('pbkdf2:')
+
+    assert laptop.get('/api/user').status_code == 200
+    drop_session_cookie(app, laptop)
+    assert laptop.get('/api/user').status_code == 200
+
+
+def test_password_change_signs_out_other_devices(app):
+    laptop, phone, tablet = app.test_client(), app.test_client(), app.test_client()
+    register(laptop)
+    login(phone)
+    login(tablet)
+    drop_session_cookie(app, tablet)
+
+    response = laptop.put('/api/profile/password', json={'current_password': 'Password123',
+                                                         'new_password': 'Password456',
+                                                         'password_confirmation': 'Password456'})
+    assert response.status_code == 200
+    assert laptop.get('/api/user').status_code == 200
+    assert phone.get('/api/user').status_code == 401
+    assert tablet.get('/api/user').status_code == 401
+
+
+def test_identity_recheck_does_not_rewrite_an_unchanged_session(make_app, monkeypatch):
+    app = make_app(IDENTITY_TTL=60)
+    client = app.test_client()
+    register(client)
+    store = app.extensions['session_store']
+    saves = []
+    original_save = store.save
+    monkeypatch.setattr(store, 'save', lambda *args, **kwargs: saves.append(args) or original_save(*args, **kwargs))
+
+    identity_cache = app.extensions['identity_cache']
+    identity_cache.verified.clear()  # as after the TTL: the next request re-reads the users row
+    assert client.get('/api/user').status_code == 200
+    assert identity_cache.verified
+    assert saves == []
@@ -0,0 +1,34 @@
+import os
+from backend import static_files as static_module
+from backend.static_files import StaticFiles
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_debug_lookups_rebuild_the_manifest_only_after_a_build(make_app, tmp_path, monkeypatch):
+    dist = tmp_path / 'dist'
+    write(dist / 'index.html', '<html></html>')
+    write(dist / 'assets' / 'index-4f1c2b9a.js', 'console.log(1)')
+    app = make_app(STATIC_DIST_DIR=str(dist))
+    app.debug = True
+    files = StaticFiles(app)
+
+    walks = []
+    build_manifest = static_module.build_manifest
+    monkeypatch.setattr(static_module, 'build_manifest', lambda root: walks.append(root) or build_manifest(root))
+    for _ in range(3):
+        assert files.lookup('assets/index-4f1c2b9a.js') is not None
+    assert walks == []
+
+    # A rebuild replaces the hashed bundle and rewrites index.html
+    os.remove(dist / 'assets' / 'index-4f1c2b9a.js')
+    write(dist / 'assets' / 'index-7d2e9c01.js', 'console.log(2)')
+    later = os.stat(dist / 'index.html').st_mtime + 5
+    for path in (dist / 'index.html', dist / 'assets', dist):
+        os.utime(path, (later, later))
+    assert files.lookup('assets/index-7d2e9c01.js') is not None
+    assert files.lookup('assets/index-4f1c2b9a.js') is None
+    assert len(walks) == 1
@@ -0,0 +1,40 @@
+import json
+from backend.models import Recipe
+from backend.streaming import stream_query
+from tests.helpers import create_recipe, register
+
+
+def failing_serializer(fail_at):
+    seen = []
+
+    def serialize(recipe):
+        seen.append(recipe.id)
+        if len(seen) == fail_at:
+            raise RuntimeError('serializer failed')
+        return {'id': recipe.id}
+    return serialize
+
+
+def stream_body(app, headers=None):
+    with app.test_request_context(headers=headers or {}):
+        response = stream_query(Recipe.query.order_by(Recipe.id), failing_serializer(2))
+        return response.get_data(as_text=True)
+
+
+def test_interrupted_envelope_is_closed_with_an_error(app, client):
+    register(client)
+    create_recipe(client)
+    create_recipe(client, title='Pea soup')
+    body = json.loads(stream_body(app))
+    assert body['success'] is False
+    assert body['count'] == 1 and len(body['data']) == 1
+    assert body['message'] == 'Stream interrupted.'
+
+
+def test_interrupted_ndjson_ends_with_an_error_line(app, client):
+    register(client)
+    create_recipe(client)
+    create_recipe(client, title='Pea soup')
+    lines = [json.loads(line) for line in stream_body(app, {'Accept': 'application/x-ndjson'}).splitlines()]
+    assert len(lines) == 2
+    assert lines[-1] == {'success': False, 'message': 'Stream interrupted.'}
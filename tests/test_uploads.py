@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import threading
+import time
+import pytest
+from backend.models import db, Job, Recipe
+from backend.uploads import upload_store
+from backend.images import Image, image_pipeline, render_variants
+from tests.helpers import RECIPE, create_recipe, register
+
+
+def write_file(root, relative, age):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x')
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+
+def test_sweep_rechecks_references_right_before_unlinking(app, client, monkeypatch):
+    register(client)
+    recipe_id = create_recipe(client)['id']
+    root = app.config['UPLOAD_FOLDER']
+    blob = write_file(root, 'blobs/ab/abc.jpg', age=7200)
+    variant = write_file(root, 'variants/ab/abc_160.webp', age=7200)
+    orphan = write_file(root, 'blobs/cd/cde.jpg', age=7200)
+    with app.app_context():
+        db.session.execute(db.update(Recipe).where(Recipe.id == recipe_id).values(
+            image='blobs/ab/abc.jpg',
+            image_variants={'thumb': {'width': 160, 'height': 90, 'webp': 'variants/ab/abc_160.webp'}}))
+        db.session.commit()
+        # A snapshot taken before the recipe committed its image
+        monkeypatch.setattr(upload_store, 'referenced_paths', lambda: set())
+        assert upload_store.sweep()[0] == 1
+    assert os.path.exists(blob) and os.path.exists(variant)
+    assert not os.path.exists(orphan)
+
+
+@pytest.mark.skipif(Image is None, reason='Pillow is not installed')
+def test_reused_variants_restart_their_grace_period(tmp_path):
+    Image.new('RGB', (320, 200), (200, 40, 40)).save(tmp_path / 'original.jpg')
+    variants = render_variants(str(tmp_path), 'original.jpg')
+    thumb = tmp_path / variants['thumb']['webp']
+    old = time.time() - 7200
+    os.utime(thumb, (old, old))
+
+    assert render_variants(str(tmp_path), 'original.jpg') == variants
+    assert thumb.stat().st_mtime > old + 3600
+
+
+def multipart_recipe(**fields):
+    image = io.BytesIO()
+    Image.new('RGB', (64, 48), (40, 120, 40)).save(image, 'PNG')
+    image.seek(0)
+    return dict(RECIPE, ingredients=json.dumps(RECIPE['ingredients']), image=(image, 'dish.png'), **fields)
+
+
+@pytest.mark.skipif(Image is None, reason='Pillow is not installed')
+def test_failed_recipe_write_queues_a_sweep_for_its_upload(make_app, monkeypatch):
+    app = make_app(JOBS_INLINE=False)
+    client = app.test_client()
+    register(client)
+    monkeypatch.setattr('backend.routes.recipes.recipe_search.index_recipe', lambda recipe: 1 / 0)
+
+    response = client.post('/api/recipes', data=multipart_recipe(), content_type='multipart/form-data')
+    assert response.status_code == 500
+    with app.app_context():
+        jobs = db.session.execute(db.select(Job.name, Job.run_at, Job.created_at)
+                                  .where(Job.name == 'uploads.gc')).all()
+    assert len(jobs) == 1
+    # Runs once the abandoned blob is old enough for the sweep to take it
+    assert (jobs[0].run_at - jobs[0].created_at).total_seconds() > app.config['UPLOAD_GC_GRACE_SECONDS']
+
+
+@pytest.mark.skipif(Image is None, reason='Pillow is not installed')
+def test_inline_jobs_render_variants_off_the_request(app, client, monkeypatch):
+    register(client)
+    release = threading.Event()
+    original = image_pipeline.process
+    monkeypatch.setattr(image_pipeline, 'process', lambda *args: release.wait(5) and original(*args))
+
+    response = client.post('/api/recipes', data=multipart_recipe(), content_type='multipart/form-data')
+    assert response.status_code == 201
+    recipe_id = response.get_json()['data']['id']
+    assert response.get_json()['data']['image_variants'] is None
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        variants = client.get(f'/api/recipes/{recipe_id}').get_json()['data']['image_variants']
+        if variants:
+            break
+        time.sleep(0.05)
+    assert set(variants) == {'thumb', 'card', 'detail'}